@@ -1,4 +1,5 @@
 const { analyzeTeam, teamSummary, analyzeMultipleTeams } = require('../services/analysisService');
+const { analyzeTeamsBatch } = require('../services/batchAnalysisService');
 
 exports.analyzeTeam = async (req, res) => {
     try {
@@ -34,4 +35,16 @@ exports.analyzeMultipleTeams = async (req, res) => {
     } catch (error) {
         res.status(500).json({ success: false, message: 'Failed to analyze multiple teams', error: error.message });
     }
-}; 
\ No newline at end of file
+};
+
+exports.analyzeBatch = async (req, res) => {
+    try {
+        const result = await analyzeTeamsBatch(req.body);
+        if (!result.success) {
+            return res.status(400).json(result);
+        }
+        res.json(result);
+    } catch (error) {
+        res.status(500).json({ success: false, message: 'Failed to analyze teams in batch', error: error.message });
+    }
+};
@@ -1,9 +1,12 @@
+const { cacheStats } = require('../services/fixtureCache');
+
 exports.healthCheck = (req, res) => {
     res.json({
         status: 'healthy',
         message: 'cricbuzz11 Team Analyzer Backend is running',
         timestamp: new Date().toISOString(),
         environment: process.env.NODE_ENV || 'development',
-        version: '2.0.0'
+        version: '2.0.0',
+        fixtureCache: cacheStats()
     });
-}; 
\ No newline at end of file
+};
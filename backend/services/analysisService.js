@@ -1,12 +1,15 @@
 const openai = require('./openaiClient');
 const supabase = require('./supabaseClient');
 
-// Helper: Fetch head-to-head from team_head_to_head view
+// Helper: Fetch head-to-head from the team_head_to_head materialized view
+// (an index lookup on its unique (team1, team2, venue_name) index)
 async function fetchHeadToHead(teamA, teamB, venueName = null) {
-  let query = supabase.from('team_head_to_head').select('*');
+  let query = supabase
+    .from('team_head_to_head')
+    .select('team1, team2, venue_name, total_matches, team1_avg_score, team2_avg_score');
   query = query.or(`and(team1.eq.${teamA},team2.eq.${teamB}),and(team1.eq.${teamB},team2.eq.${teamA})`);
   if (venueName) query = query.eq('venue_name', venueName);
-  const { data, error } = await query;
+  const { data, error } = await query.limit(1);
   if (error) return null;
   return data && data.length ? data[0] : null;
 }
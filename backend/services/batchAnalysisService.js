@@ -0,0 +1,169 @@
+const supabase = require('./supabaseClient');
+const { fetchMatchTeams } = require('./teamLookup');
+const { getVenueStats } = require('./venueStatsService');
+const { getHeadToHead } = require('./headToHeadService');
+const { getTeamRecentForm } = require('./teamFormService');
+const { loadPlayerPools, matchPlayerNames } = require('./validationService');
+const { analyzeTeam } = require('./analysisService');
+
+const MAX_BATCH_TEAMS = 500;
+// OpenAI calls in flight at once when AI analysis is requested
+const AI_CONCURRENCY = 4;
+
+const FORM_MATCHES = 5;
+
+// Form summary for every squad player of the fixture in one call, keyed by player_id
+async function fetchSquadForm(pools, matchDate) {
+    const playerIds = [...new Set(Object.values(pools.recentPlayersByTeam).flat().map(p => p.player_id))];
+    if (playerIds.length === 0) return {};
+    const { data, error } = await supabase.rpc('get_players_form_summary', {
+        p_player_ids: playerIds,
+        p_reference_date: matchDate,
+        p_last_matches: FORM_MATCHES
+    });
+    if (error || !data) return {};
+    return Object.fromEntries(data.map(row => [row.player_id, row]));
+}
+
+// Match-level context shared by every team of the fixture; built once per batch
+async function buildMatchContext({ teamA, teamB, matchDate }) {
+    const teams = await fetchMatchTeams(teamA, teamB);
+    if (teams.length < 2) {
+        return null;
+    }
+    const fixture = { teamA, teamB, matchDate };
+    const poolsLoaded = loadPlayerPools(teams, matchDate);
+    const [venueStats, headToHead, teamForm, pools, squadForm] = await Promise.all([
+        getVenueStats(fixture, teams),
+        getHeadToHead(fixture, teams),
+        getTeamRecentForm(fixture, teams),
+        poolsLoaded,
+        poolsLoaded.then(pools => fetchSquadForm(pools, matchDate))
+    ]);
+    return { teams, venueStats, headToHead, teamForm, pools, squadForm };
+}
+
+// Per-team work: validate names against the shared pools and summarise composition
+function scoreTeam(team, index, context) {
+    const validation = matchPlayerNames(team.players || [], context.teams, context.pools);
+    const resolved = validation.validationResults;
+    const roleCounts = {};
+    const teamCounts = {};
+    const formRatings = {};
+    resolved.filter(p => p.isValid).forEach(p => {
+        const role = p.role || 'Unknown';
+        const side = p.team || 'Unknown';
+        const form = context.squadForm[p.playerId]?.form_rating || 'Unknown';
+        roleCounts[role] = (roleCounts[role] || 0) + 1;
+        teamCounts[side] = (teamCounts[side] || 0) + 1;
+        formRatings[form] = (formRatings[form] || 0) + 1;
+    });
+    const isSelected = name => !!name && resolved.some(p => p.inputName === name && p.isValid);
+    return {
+        teamId: team.teamId || index + 1,
+        teamName: team.teamName || `Team ${index + 1}`,
+        players: team.players,
+        captain: team.captain,
+        viceCaptain: team.viceCaptain,
+        validation: {
+            validPlayers: validation.validPlayers,
+            invalidPlayers: validation.invalidPlayers,
+            missingPlayers: validation.missingPlayers,
+            requiresCorrection: validation.requiresCorrection,
+            validationResults: resolved
+        },
+        composition: {
+            roleCounts,
+            teamCounts,
+            formRatings,
+            captainValid: isSelected(team.captain),
+            viceCaptainValid: isSelected(team.viceCaptain)
+        }
+    };
+}
+
+// Run fn over items with at most `limit` promises pending
+async function mapWithConcurrency(items, limit, fn) {
+    const results = new Array(items.length);
+    let next = 0;
+    const workers = Array.from({ length: Math.min(limit, items.length) }, async () => {
+        while (next < items.length) {
+            const index = next++;
+            results[index] = await fn(items[index], index);
+        }
+    });
+    await Promise.all(workers);
+    return results;
+}
+
+async function analyzeTeamsBatch({ teams, teamA, teamB, matchDate, includeAiAnalysis = false }) {
+    if (!teams || !Array.isArray(teams) || teams.length === 0) {
+        return { success: false, message: 'Teams data is required' };
+    }
+    if (teams.length > MAX_BATCH_TEAMS) {
+        return { success: false, message: `At most ${MAX_BATCH_TEAMS} teams can be analyzed per request` };
+    }
+    if (!teamA || !teamB || !matchDate) {
+        return { success: false, message: 'Match details (teamA, teamB, matchDate) are required' };
+    }
+
+    const contextStarted = Date.now();
+    const context = await buildMatchContext({ teamA, teamB, matchDate });
+    if (!context) {
+        return { success: false, message: 'One or both teams not found in database' };
+    }
+    const contextMs = Date.now() - contextStarted;
+
+    const scoringStarted = Date.now();
+    const results = teams.map((team, index) => scoreTeam(team, index, context));
+    const scoringMs = Date.now() - scoringStarted;
+
+    if (includeAiAnalysis) {
+        await mapWithConcurrency(results, AI_CONCURRENCY, async result => {
+            const players = result.validation.validationResults.map(p => ({
+                name: p.validatedName || p.inputName,
+                role: p.role || 'Unknown',
+                team: p.team || 'Unknown'
+            }));
+            try {
+                const analysis = await analyzeTeam({
+                    players,
+                    captain: result.captain,
+                    viceCaptain: result.viceCaptain,
+                    teamA,
+                    teamB,
+                    matchDate
+                });
+                if (analysis.success) {
+                    result.analysis = analysis.analysis;
+                } else {
+                    result.error = analysis.message;
+                }
+            } catch (error) {
+                result.error = error.message;
+            }
+        });
+    }
+
+    console.log(`BATCH: ${teams.length} teams for ${teamA} vs ${teamB} on ${matchDate} - context ${contextMs}ms, scoring ${scoringMs}ms`);
+    return {
+        success: true,
+        context: {
+            venueStats: context.venueStats,
+            headToHead: context.headToHead,
+            teamForm: context.teamForm,
+            squadForm: context.squadForm
+        },
+        teams: results,
+        summary: {
+            totalTeams: teams.length,
+            teamsRequiringCorrection: results.filter(r => r.validation.requiresCorrection).length,
+            failedAnalyses: results.filter(r => r.error).length,
+            contextMs,
+            scoringMs
+        },
+        message: `Analyzed ${teams.length} teams with one shared match context`
+    };
+}
+
+module.exports = { analyzeTeamsBatch, buildMatchContext };
@@ -0,0 +1,108 @@
+const supabase = require('./supabaseClient');
+
+// Read-through cache for fixture-level historical stats (venue stats, head-to-head, team form).
+// Entries are keyed by (kind, teamA, teamB, matchDate), evicted least-recently-used beyond
+// MAX_ENTRIES, expire after TTL_MS, and are all dropped when data_generation changes, which
+// the Python loaders bump after committing new data.
+const MAX_ENTRIES = parseInt(process.env.FIXTURE_CACHE_MAX_ENTRIES || '1000', 10);
+const TTL_MS = parseInt(process.env.FIXTURE_CACHE_TTL_MS || String(30 * 60 * 1000), 10);
+// How stale the generation we compare against may be; one small query per interval at most
+const GENERATION_CHECK_MS = parseInt(process.env.FIXTURE_CACHE_GENERATION_CHECK_MS || '5000', 10);
+
+// Map iteration order is insertion order: re-inserting on hit keeps the oldest entry first
+const entries = new Map();
+// Concurrent misses for the same key share one load
+const inFlight = new Map();
+
+let generation = null;
+let generationCheckedAt = 0;
+let generationCheck = null;
+const stats = { hits: 0, misses: 0, evictions: 0, invalidations: 0 };
+
+async function readGeneration() {
+    const { data, error } = await supabase
+        .from('data_generation')
+        .select('generation')
+        .limit(1);
+    // Without the table (schema.sql not re-applied) entries just expire by TTL
+    if (error || !data || data.length === 0) return null;
+    return data[0].generation;
+}
+
+// Refresh the known generation at most every GENERATION_CHECK_MS, clearing the cache when it moved
+async function checkGeneration() {
+    if (Date.now() - generationCheckedAt < GENERATION_CHECK_MS) return;
+    if (!generationCheck) {
+        generationCheck = readGeneration()
+            .then(current => {
+                if (current !== generation) {
+                    if (generation !== null) {
+                        console.log(`CACHE: data generation ${generation} -> ${current}, dropping ${entries.size} entries`);
+                        stats.invalidations++;
+                    }
+                    entries.clear();
+                    generation = current;
+                }
+            })
+            .catch(error => console.error('CACHE: generation check failed:', error.message))
+            .finally(() => {
+                generationCheckedAt = Date.now();
+                generationCheck = null;
+            });
+    }
+    await generationCheck;
+}
+
+function fixtureKey(kind, { teamA, teamB, matchDate }) {
+    return JSON.stringify([kind, teamA, teamB, matchDate]);
+}
+
+function store(key, value) {
+    entries.delete(key);
+    entries.set(key, { value, generation, expiresAt: Date.now() + TTL_MS });
+    while (entries.size > MAX_ENTRIES) {
+        entries.delete(entries.keys().next().value);
+        stats.evictions++;
+    }
+}
+
+// Return the cached result for this fixture or run load() once and cache it.
+// Only successful results ({ success: true }) are cached; failures are retried next time.
+// Cached objects are shared between requests and must not be mutated by callers.
+async function getOrLoad(kind, fixture, load) {
+    await checkGeneration();
+    const key = fixtureKey(kind, fixture);
+
+    const entry = entries.get(key);
+    if (entry && entry.expiresAt > Date.now() && entry.generation === generation) {
+        entries.delete(key);
+        entries.set(key, entry);
+        stats.hits++;
+        return entry.value;
+    }
+    if (entry) entries.delete(key);
+
+    if (inFlight.has(key)) return inFlight.get(key);
+    stats.misses++;
+    const loading = (async () => {
+        const loadedGeneration = generation;
+        const value = await load();
+        // Skip results that raced a generation change
+        if (value && value.success && loadedGeneration === generation) {
+            store(key, value);
+        }
+        return value;
+    })().finally(() => inFlight.delete(key));
+    inFlight.set(key, loading);
+    return loading;
+}
+
+function cacheStats() {
+    return { ...stats, size: entries.size, maxEntries: MAX_ENTRIES, ttlMs: TTL_MS, generation };
+}
+
+function clearCache() {
+    entries.clear();
+}
+
+module.exports = { getOrLoad, cacheStats, clearCache };
@@ -0,0 +1,76 @@
+const supabase = require('./supabaseClient');
+const { fetchMatchTeams } = require('./teamLookup');
+const { getOrLoad } = require('./fixtureCache');
+
+// teams: optional [{ team_id, team_name }] already resolved by the caller (batch analysis)
+async function loadHeadToHead({ teamA, teamB, matchDate }, teams = null) {
+    if (!teamA || !teamB || !matchDate) {
+        return {
+            success: false,
+            message: 'teamA, teamB, and matchDate are required'
+        };
+    }
+    try {
+        if (!teams) teams = await fetchMatchTeams(teamA, teamB);
+        if (teams.length < 2) {
+            return {
+                success: false,
+                message: `One or both teams not found in database. Available teams: ${teams.map(t => t.team_name).join(', ')}`
+            };
+        }
+        const teamAId = teams.find(t => t.team_name === teamA)?.team_id;
+        const teamBId = teams.find(t => t.team_name === teamB)?.team_id;
+        const { data: matches, error: matchesError } = await supabase
+            .from('matches')
+            .select(`
+                match_id,
+                match_date,
+                team1_id,
+                team2_id,
+                winner_team_id,
+                teams_team1:teams!team1_id(team_name),
+                teams_team2:teams!team2_id(team_name),
+                teams_winner:teams!winner_team_id(team_name)
+            `)
+            .or(`and(team1_id.eq.${teamAId},team2_id.eq.${teamBId}),and(team1_id.eq.${teamBId},team2_id.eq.${teamAId})`)
+            .lt('match_date', matchDate)
+            .order('match_date', { ascending: false });
+        if (matchesError) throw matchesError;
+        const teamAWins = matches.filter(match => match.winner_team_id === teamAId).length;
+        const teamBWins = matches.filter(match => match.winner_team_id === teamBId).length;
+        const draws = matches.filter(match => !match.winner_team_id).length;
+        const allHistoricalMatches = matches.map(match => ({
+            match_id: match.match_id,
+            match_date: match.match_date,
+            team1: match.teams_team1?.team_name || teamA,
+            team2: match.teams_team2?.team_name || teamB,
+            winner: match.teams_winner?.team_name || null
+        }));
+        return {
+            success: true,
+            data: {
+                teamA: teamA,
+                teamB: teamB,
+                totalMatches: matches.length,
+                teamAWins: teamAWins,
+                teamBWins: teamBWins,
+                draws: draws,
+                allHistoricalMatches: allHistoricalMatches
+            },
+            supabaseQuery: true
+        };
+    } catch (error) {
+        return {
+            success: false,
+            message: 'Failed to fetch head-to-head data',
+            error: error.message
+        };
+    }
+}
+
+// Served from the fixture cache until the loader bumps the data generation
+function getHeadToHead(fixture, teams = null) {
+    return getOrLoad('head-to-head', fixture, () => loadHeadToHead(fixture, teams));
+}
+
+module.exports = { getHeadToHead };
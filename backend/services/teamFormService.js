@@ -1,6 +1,9 @@
 const supabase = require('./supabaseClient');
+const { fetchMatchTeams } = require('./teamLookup');
+const { getOrLoad } = require('./fixtureCache');
 
-async function getTeamRecentForm({ teamA, teamB, matchDate }) {
+// teams: optional [{ team_id, team_name }] already resolved by the caller (batch analysis)
+async function loadTeamRecentForm({ teamA, teamB, matchDate }, teams = null) {
     if (!teamA || !teamB || !matchDate) {
         return { 
             success: false, 
@@ -12,12 +15,7 @@ async function getTeamRecentForm({ teamA, teamB, matchDate }) {
         console.log(`INFO: Finding recent form for ${teamA} and ${teamB} before ${matchDate}`);
 
         // Get team IDs for the specified teams
-        const { data: teams, error: teamsError } = await supabase
-            .from('teams')
-            .select('team_id, team_name')
-            .in('team_name', [teamA, teamB]);
-
-        if (teamsError) throw teamsError;
+        if (!teams) teams = await fetchMatchTeams(teamA, teamB);
 
         if (teams.length < 2) {
             return {
@@ -107,4 +105,9 @@ async function getTeamRecentForm({ teamA, teamB, matchDate }) {
     }
 }
 
+// Served from the fixture cache until the loader bumps the data generation
+function getTeamRecentForm(fixture, teams = null) {
+    return getOrLoad('team-form', fixture, () => loadTeamRecentForm(fixture, teams));
+}
+
 module.exports = { getTeamRecentForm }; 
\ No newline at end of file
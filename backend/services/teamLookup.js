@@ -0,0 +1,13 @@
+const supabase = require('./supabaseClient');
+
+// Resolve the two fixture teams to { team_id, team_name } rows in one query
+async function fetchMatchTeams(teamA, teamB) {
+    const { data: teams, error } = await supabase
+        .from('teams')
+        .select('team_id, team_name')
+        .in('team_name', [teamA, teamB]);
+    if (error) throw error;
+    return teams;
+}
+
+module.exports = { fetchMatchTeams };
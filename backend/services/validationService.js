@@ -1,38 +1,28 @@
 const supabase = require('./supabaseClient');
 
-// Helper: Get recent players for a team from their last 10 matches
-async function getRecentPlayersForTeam(teamId, matchLimit = 10) {
-    // Step 1: Get recent match IDs
-    const { data: matches, error: matchError } = await supabase
-        .from('matches')
-        .select('match_id')
-        .or(`team1_id.eq.${teamId},team2_id.eq.${teamId}`)
-        .order('match_date', { ascending: false })
-        .limit(matchLimit);
-    if (matchError || !matches || matches.length === 0) return [];
-    const matchIds = matches.map(m => m.match_id);
-    // Step 2: Get players from those matches
-    const { data: playerRows, error: playerError } = await supabase
-        .from('player_match_stats')
-        .select('player_id, team_id, players!inner(player_name, role, is_active)')
-        .in('match_id', matchIds)
-        .eq('team_id', teamId);
-    if (playerError || !playerRows) return [];
-    // Only unique players
+// Helper: Get each team's squad as of a date from player_team_history (latest season before the date)
+async function getSquadsAsOf(teamIds, matchDate) {
+    const referenceDate = matchDate || new Date().toISOString().slice(0, 10);
+    const { data: squadRows, error: squadError } = await supabase
+        .rpc('get_team_squad_as_of', { p_team_ids: teamIds, p_reference_date: referenceDate });
+    const squads = {};
+    teamIds.forEach(teamId => { squads[teamId] = []; });
+    if (squadError || !squadRows) return squads;
+    // Only unique players per team
     const seen = new Set();
-    const uniquePlayers = [];
-    for (const row of playerRows) {
-        if (!seen.has(row.player_id)) {
-            seen.add(row.player_id);
-            uniquePlayers.push({
+    for (const row of squadRows) {
+        const key = `${row.team_id}:${row.player_id}`;
+        if (!seen.has(key)) {
+            seen.add(key);
+            squads[row.team_id].push({
                 player_id: row.player_id,
-                player_name: row.players.player_name,
-                role: row.players.role,
+                player_name: row.player_name,
+                role: row.role,
                 team_id: row.team_id
             });
         }
     }
-    return uniquePlayers;
+    return squads;
 }
 
 async function validateMatch({ teamA, teamB, matchDate }) {
@@ -91,7 +81,7 @@ async function validateMatch({ teamA, teamB, matchDate }) {
     };
 }
 
-async function validatePlayers({ players, teamA, teamB }) {
+async function validatePlayers({ players, teamA, teamB, matchDate }) {
     if (!players || !Array.isArray(players) || players.length === 0) {
         return {
             success: false,
@@ -120,28 +110,38 @@ async function validatePlayers({ players, teamA, teamB }) {
             message: 'Teams not found in database'
         };
     }
+    const pools = await loadPlayerPools(teams, matchDate);
+    return matchPlayerNames(players, teams, pools);
+}
+
+// Name pools for player validation, loaded once per fixture: every active player who appeared
+// for either team before matchDate (with their most frequent team) and each team's squad as of matchDate
+async function loadPlayerPools(teams, matchDate) {
     const teamIds = teams.map(t => t.team_id);
     // Debug: Log team IDs
     console.log('VALIDATE: team IDs =', teamIds);
-    // Get active players for selected teams (full pool for validation)
-    const { data: playerMatchData, error: matchStatsError } = await supabase
-        .from('player_match_stats')
+    // Get active players for selected teams (full pool for validation), one row per player-season-team
+    let historyQuery = supabase
+        .from('player_team_history')
         .select(`
             player_id,
             team_id,
+            matches_played,
             players!inner(player_name, role, is_active)
         `)
         .in('team_id', teamIds)
         .eq('players.is_active', true);
-    if (matchStatsError) throw matchStatsError;
+    if (matchDate) historyQuery = historyQuery.lt('first_match_date', matchDate);
+    const { data: historyData, error: historyError } = await historyQuery;
+    if (historyError) throw historyError;
     // Debug: Log number of players fetched and a sample
-    console.log('VALIDATE: fetched', playerMatchData.length, 'player records');
-    if (playerMatchData.length > 0) {
-        console.log('VALIDATE: sample players:', playerMatchData.slice(0, 10).map(p => `${p.players.player_name} (${p.team_id})`).join(', '));
+    console.log('VALIDATE: fetched', historyData.length, 'player-season records');
+    if (historyData.length > 0) {
+        console.log('VALIDATE: sample players:', historyData.slice(0, 10).map(p => `${p.players.player_name} (${p.team_id})`).join(', '));
     }
     // Process to get unique players with their most frequent team
     const playerTeamCounts = {};
-    playerMatchData.forEach(record => {
+    historyData.forEach(record => {
         const playerId = record.player_id;
         const teamId = record.team_id;
         if (!playerTeamCounts[playerId]) {
@@ -154,7 +154,7 @@ async function validatePlayers({ players, teamA, teamB }) {
         if (!playerTeamCounts[playerId].teams[teamId]) {
             playerTeamCounts[playerId].teams[teamId] = 0;
         }
-        playerTeamCounts[playerId].teams[teamId]++;
+        playerTeamCounts[playerId].teams[teamId] += record.matches_played;
     });
     // Create final player list with most frequent team assignment
     const playersWithTeams = Object.keys(playerTeamCounts).map(playerId => {
@@ -174,92 +174,33 @@ async function validatePlayers({ players, teamA, teamB }) {
             match_count: teamCounts[mostFrequentTeamId]
         };
     });
-    // Fetch recent players for each team for suggestions
-    const recentPlayersByTeam = {};
-    for (const t of teams) {
-        recentPlayersByTeam[t.team_id] = await getRecentPlayersForTeam(t.team_id, 10);
-    }
+    playersWithTeams.sort((a, b) => a.player_name.localeCompare(b.player_name));
+    const playersByName = new Map();
+    playersWithTeams.forEach(p => {
+        const key = p.player_name.toLowerCase();
+        if (!playersByName.has(key)) playersByName.set(key, p);
+    });
+    // Fetch each team's squad as of the match date for suggestions
+    const recentPlayersByTeam = await getSquadsAsOf(teamIds, matchDate);
+    return {
+        playersWithTeams,
+        playersByName,
+        recentPlayersByTeam,
+        // Per-name results, reused when many submitted teams share players
+        resultsByName: new Map()
+    };
+}
+
+// Validate submitted names against pools from loadPlayerPools; no database access
+function matchPlayerNames(players, teams, pools) {
+    const { playersWithTeams, playersByName, recentPlayersByTeam, resultsByName } = pools;
     // Validate each player and provide suggestions
     const processedPlayers = players;
     const validationResults = processedPlayers.map(playerName => {
-        const trimmedName = playerName.trim();
-        if (!trimmedName || trimmedName.includes('(Missing)')) {
-            return {
-                inputName: playerName,
-                validatedName: null,
-                playerId: null,
-                role: null,
-                team: null,
-                isValid: false,
-                confidence: 0,
-                suggestions: [],
-                isMissing: true
-            };
+        if (!resultsByName.has(playerName)) {
+            resultsByName.set(playerName, matchPlayerName(playerName, teams, playersByName, recentPlayersByTeam));
         }
-        // Exact match
-        const exactMatch = playersWithTeams.find(p =>
-            p.player_name.toLowerCase() === trimmedName.toLowerCase()
-        );
-        if (exactMatch) {
-            return {
-                inputName: playerName,
-                validatedName: exactMatch.player_name,
-                playerId: exactMatch.player_id,
-                role: exactMatch.role,
-                team: exactMatch.team_name,
-                isValid: true,
-                confidence: 1.0
-            };
-        }
-        // Fuzzy match - use only recent players for suggestions
-        let suggestions = [];
-        for (const t of teams) {
-            const recentPlayers = recentPlayersByTeam[t.team_id] || [];
-            const teamSuggestions = recentPlayers
-                .map(p => ({
-                    ...p,
-                    similarity: calculateSimilarity(trimmedName.toLowerCase(), p.player_name.toLowerCase())
-                }))
-                .filter(p => p.similarity > 0.3);
-            suggestions = suggestions.concat(teamSuggestions);
-        }
-        
-        // Sort all suggestions by similarity (highest first)
-        suggestions.sort((a, b) => b.similarity - a.similarity);
-        
-        // Auto-replace if high confidence match (85%+ similarity)
-        if (suggestions.length > 0 && suggestions[0].similarity >= 0.85) {
-            const bestMatch = suggestions[0];
-            return {
-                inputName: playerName,
-                validatedName: bestMatch.player_name,
-                playerId: bestMatch.player_id,
-                role: bestMatch.role,
-                team: teams.find(t => t.team_id === bestMatch.team_id)?.team_name || null,
-                isValid: true,
-                confidence: bestMatch.similarity,
-                autoReplaced: true
-            };
-        }
-        
-        // Convert suggestions to format expected by frontend (already sorted by similarity)
-        const formattedSuggestions = suggestions.slice(0, 5).map(p => ({
-            playerId: p.player_id,
-            playerName: p.player_name,
-            role: p.role,
-            team: teams.find(t => t.team_id === p.team_id)?.team_name || null,
-            similarity: p.similarity
-        }));
-        return {
-            inputName: playerName,
-            validatedName: null,
-            playerId: null,
-            role: null,
-            team: null,
-            isValid: false,
-            confidence: 0,
-            suggestions: formattedSuggestions
-        };
+        return resultsByName.get(playerName);
     });
     const validPlayers = validationResults.filter(p => p.isValid);
     const invalidPlayers = validationResults.filter(p => !p.isValid && !p.isMissing);
@@ -275,7 +216,87 @@ async function validatePlayers({ players, teamA, teamB }) {
         message: `Validated ${validPlayers.length} out of ${processedPlayers.length} players${missingPlayers.length > 0 ? ` (${missingPlayers.length} missing from screenshot)` : ''}`,
         requiresCorrection: invalidPlayers.length > 0 || missingPlayers.length > 0,
         availablePlayersCount: playersWithTeams.length,
-        availablePlayers: playersWithTeams.sort((a, b) => a.player_name.localeCompare(b.player_name))
+        availablePlayers: playersWithTeams
+    };
+}
+
+// Validation result for one submitted name: exact match, auto-replaced squad match, or suggestions
+function matchPlayerName(playerName, teams, playersByName, recentPlayersByTeam) {
+    const trimmedName = playerName.trim();
+    if (!trimmedName || trimmedName.includes('(Missing)')) {
+        return {
+            inputName: playerName,
+            validatedName: null,
+            playerId: null,
+            role: null,
+            team: null,
+            isValid: false,
+            confidence: 0,
+            suggestions: [],
+            isMissing: true
+        };
+    }
+    // Exact match
+    const exactMatch = playersByName.get(trimmedName.toLowerCase());
+    if (exactMatch) {
+        return {
+            inputName: playerName,
+            validatedName: exactMatch.player_name,
+            playerId: exactMatch.player_id,
+            role: exactMatch.role,
+            team: exactMatch.team_name,
+            isValid: true,
+            confidence: 1.0
+        };
+    }
+    // Fuzzy match - use only recent players for suggestions
+    let suggestions = [];
+    for (const t of teams) {
+        const recentPlayers = recentPlayersByTeam[t.team_id] || [];
+        const teamSuggestions = recentPlayers
+            .map(p => ({
+                ...p,
+                similarity: calculateSimilarity(trimmedName.toLowerCase(), p.player_name.toLowerCase())
+            }))
+            .filter(p => p.similarity > 0.3);
+        suggestions = suggestions.concat(teamSuggestions);
+    }
+    
+    // Sort all suggestions by similarity (highest first)
+    suggestions.sort((a, b) => b.similarity - a.similarity);
+    
+    // Auto-replace if high confidence match (85%+ similarity)
+    if (suggestions.length > 0 && suggestions[0].similarity >= 0.85) {
+        const bestMatch = suggestions[0];
+        return {
+            inputName: playerName,
+            validatedName: bestMatch.player_name,
+            playerId: bestMatch.player_id,
+            role: bestMatch.role,
+            team: teams.find(t => t.team_id === bestMatch.team_id)?.team_name || null,
+            isValid: true,
+            confidence: bestMatch.similarity,
+            autoReplaced: true
+        };
+    }
+    
+    // Convert suggestions to format expected by frontend (already sorted by similarity)
+    const formattedSuggestions = suggestions.slice(0, 5).map(p => ({
+        playerId: p.player_id,
+        playerName: p.player_name,
+        role: p.role,
+        team: teams.find(t => t.team_id === p.team_id)?.team_name || null,
+        similarity: p.similarity
+    }));
+    return {
+        inputName: playerName,
+        validatedName: null,
+        playerId: null,
+        role: null,
+        team: null,
+        isValid: false,
+        confidence: 0,
+        suggestions: formattedSuggestions
     };
 }
 
@@ -310,4 +331,4 @@ function levenshteinDistance(str1, str2) {
     return matrix[str2.length][str1.length];
 }
 
-module.exports = { validateMatch, validatePlayers }; 
\ No newline at end of file
+module.exports = { validateMatch, validatePlayers, loadPlayerPools, matchPlayerNames }; 
\ No newline at end of file
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+
+import pandas as pd
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+import logging
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as pa_dataset
+except ImportError:  # Parquet cache is optional; readers fall back to the CSV
+    pa = pa_dataset = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CSV_FILE = "../data/ipl_ball_by_ball.csv"
+CACHE_DIR = "../data/cache"
+
+# Bump when the cleaned layout changes so existing caches are rebuilt
+CACHE_VERSION = 1
+
+# CSV rows parsed at a time while building the cache, so a rebuild never holds the whole file
+BUILD_CHUNK_SIZE = 250_000
+
+# Compact dtypes for CSV parsing and the cache: names as categoricals, counters as small ints.
+# Nullable integer types are used because extras columns are blank in some CSV rows.
+CSV_DTYPES = {
+    'match_id': 'Int32',
+    'innings': 'Int8',
+    'over': 'Int8',
+    'ball': 'Int8',
+    'batsman_runs': 'Int8',
+    'extras': 'Int8',
+    'total_runs': 'Int16',
+    'wides': 'Int8',
+    'noballs': 'Int8',
+    'byes': 'Int8',
+    'legbyes': 'Int8',
+    'team': 'category',
+    'team1': 'category',
+    'team2': 'category',
+    'venue': 'category',
+    'batsman': 'category',
+    'non_striker': 'category',
+    'bowler': 'category',
+    'player_out': 'category',
+    'wicket': 'category',
+    'kind': 'category',
+    'fielders': 'category',
+}
+
+# Columns added by clean_ball_by_ball that do not exist in the raw CSV
+DERIVED_COLUMNS = ['season', 'is_complete_match']
+
+def file_sha256(path, block_size=1 << 20):
+    """Hash a file in fixed-size blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def clean_ball_by_ball(df, complete_match_ids=None):
+    """Parse dates, derive the season and flag incomplete matches (only one batting team).
+
+    complete_match_ids flags matches from a pass over the whole file, for chunks that may
+    hold only part of a match; without it completeness is judged from df alone.
+    """
+    df['date'] = pd.to_datetime(df['date'])
+    df['season'] = df['date'].dt.year.astype('Int16')
+    if complete_match_ids is None:
+        df['is_complete_match'] = df.groupby('match_id')['team'].transform('nunique') >= 2
+    else:
+        df['is_complete_match'] = df['match_id'].isin(complete_match_ids).to_numpy()
+    return df
+
+def find_complete_matches(csv_file, chunk_size=BUILD_CHUNK_SIZE):
+    """Match ids with two batting teams, streaming only match_id and team through the CSV"""
+    # A match split over chunk boundaries keeps the teams seen on both sides
+    pairs = [chunk.dropna().astype({'team': 'object'}).drop_duplicates()
+             for chunk in pd.read_csv(csv_file, usecols=['match_id', 'team'], dtype=CSV_DTYPES, chunksize=chunk_size)]
+    if not pairs:
+        return pd.Index([])
+    teams = pd.concat(pairs, ignore_index=True).groupby('match_id')['team'].nunique()
+    return teams.index[teams >= 2]
+
+def cache_schema(df):
+    """Arrow schema of a cleaned chunk with every categorical stored as string dictionaries,
+    so chunks where a column happens to be all blank still write the same types"""
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            schema = schema.set(schema.get_field_index(col), pa.field(col, pa.dictionary(pa.int32(), pa.string())))
+    return schema
+
+def restore_dtypes(df):
+    """Re-apply the compact CSV dtypes to columns read back from Parquet"""
+    return df.astype({col: CSV_DTYPES[col] for col in df.columns if col in CSV_DTYPES})
+
+class BallByBallCache:
+    """Cleaned ball-by-ball data as Parquet partitioned by season, rebuilt when the CSV changes"""
+
+    def __init__(self, csv_file=CSV_FILE, cache_dir=CACHE_DIR):
+        self.csv_file = csv_file
+        self.dataset_path = os.path.join(cache_dir, 'ball_by_ball.parquet')
+        self.meta_path = os.path.join(cache_dir, 'ball_by_ball.meta.json')
+
+    @property
+    def available(self):
+        """Parquet support needs pyarrow"""
+        return pa_dataset is not None
+
+    def read_meta(self):
+        """Load the cache metadata, or None if the cache was never built"""
+        if not (os.path.exists(self.meta_path) and os.path.isdir(self.dataset_path)):
+            return None
+        with open(self.meta_path) as handle:
+            return json.load(handle)
+
+    def write_meta(self, meta):
+        """Persist cache metadata next to the dataset"""
+        with open(self.meta_path, 'w') as handle:
+            json.dump(meta, handle, indent=2)
+
+    def is_fresh(self):
+        """Check the cache against the CSV: size and mtime first, content hash only if mtime moved"""
+        meta = self.read_meta()
+        if meta is None or meta.get('version') != CACHE_VERSION:
+            return False
+
+        stat = os.stat(self.csv_file)
+        if stat.st_size != meta['source_size']:
+            return False
+        if stat.st_mtime_ns == meta['source_mtime_ns']:
+            return True
+
+        # The file was touched or copied; only its content decides
+        if file_sha256(self.csv_file) != meta['source_sha256']:
+            return False
+        meta['source_mtime_ns'] = stat.st_mtime_ns
+        self.write_meta(meta)
+        return True
+
+    def build(self, chunk_size=None):
+        """Clean the CSV chunk by chunk into the season-partitioned Parquet dataset.
+
+        A first pass over match_id and team finds complete matches, so memory stays bounded
+        by chunk_size rows however large the file is.
+        """
+        started = time.perf_counter()
+        chunk_size = chunk_size or BUILD_CHUNK_SIZE
+        logger.info(f"📦 Building Parquet cache from {self.csv_file} (chunk size {chunk_size:,})...")
+
+        stat = os.stat(self.csv_file)
+        complete_match_ids = find_complete_matches(self.csv_file, chunk_size)
+
+        # Write beside the old dataset and swap, so readers never see a half-built cache
+        staging_path = self.dataset_path + '.tmp'
+        shutil.rmtree(staging_path, ignore_errors=True)
+        os.makedirs(staging_path)
+
+        rows = 0
+        schema = None
+        for chunk in pd.read_csv(self.csv_file, dtype=CSV_DTYPES, chunksize=chunk_size):
+            df = clean_ball_by_ball(chunk, complete_match_ids)
+            schema = schema or cache_schema(df)
+            # Each call adds new files under the season directories it touches
+            df.to_parquet(staging_path, partition_cols=['season'], index=False, schema=schema)
+            rows += len(df)
+        shutil.rmtree(self.dataset_path, ignore_errors=True)
+        os.rename(staging_path, self.dataset_path)
+
+        self.write_meta({
+            'version': CACHE_VERSION,
+            'source_size': stat.st_size,
+            'source_mtime_ns': stat.st_mtime_ns,
+            'source_sha256': file_sha256(self.csv_file),
+            'rows': rows,
+            'built_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        })
+        logger.info(f"✅ Cached {rows:,} rows in {time.perf_counter() - started:.1f}s")
+
+    def ensure(self, rebuild=False, chunk_size=None):
+        """Build the cache if it is missing or stale; returns False when Parquet is unavailable"""
+        if not self.available:
+            return False
+        if rebuild or not self.is_fresh():
+            self.build(chunk_size)
+        return True
+
+    def dataset_filter(self, seasons=None, complete_only=False):
+        """Partition and row filter for the requested seasons / complete matches"""
+        conditions = []
+        if seasons is not None:
+            conditions.append(pa_dataset.field('season').isin(list(seasons)))
+        if complete_only:
+            conditions.append(pa_dataset.field('is_complete_match'))
+
+        combined = None
+        for condition in conditions:
+            combined = condition if combined is None else combined & condition
+        return combined
+
+    def open_dataset(self):
+        """Open the cached dataset with season partitions"""
+        return pa_dataset.dataset(self.dataset_path, format='parquet', partitioning='hive')
+
+    def read(self, columns=None, seasons=None, complete_only=False):
+        """Read cleaned ball-by-ball data, loading only the requested columns"""
+        if not self.ensure():
+            return self.read_from_csv(columns, seasons, complete_only)
+
+        table = self.open_dataset().to_table(columns=columns,
+                                             filter=self.dataset_filter(seasons, complete_only))
+        return restore_dtypes(table.to_pandas())
+
+    def iter_chunks(self, columns, chunk_size, seasons=None, complete_only=False):
+        """Yield cleaned data in bounded batches of at most chunk_size rows (call ensure() first)"""
+        batches = self.open_dataset().to_batches(columns=columns, batch_size=chunk_size,
+                                                 filter=self.dataset_filter(seasons, complete_only))
+        for batch in batches:
+            if batch.num_rows:
+                yield restore_dtypes(batch.to_pandas())
+
+    def read_from_csv(self, columns=None, seasons=None, complete_only=False):
+        """Fallback without pyarrow: parse and clean the CSV directly"""
+        usecols = None
+        if columns is not None:
+            # Cleaning needs match_id, team and date even when they are not requested
+            source = [col for col in columns if col not in DERIVED_COLUMNS]
+            usecols = list(dict.fromkeys(source + ['match_id', 'team', 'date']))
+
+        df = clean_ball_by_ball(pd.read_csv(self.csv_file, usecols=usecols, dtype=CSV_DTYPES))
+        if seasons is not None:
+            df = df[df['season'].isin(list(seasons))]
+        if complete_only:
+            df = df[df['is_complete_match']]
+        return df if columns is None else df[columns]
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Build the Parquet cache of the ball-by-ball CSV")
+    parser.add_argument('--rebuild', action='store_true', help="Rebuild even if the cache is fresh")
+    args = parser.parse_args()
+
+    cache = BallByBallCache()
+    if not cache.ensure(rebuild=args.rebuild):
+        logger.error("❌ pyarrow is not installed - pip install -r requirements.txt")
+        return 1
+
+    started = time.perf_counter()
+    sample = cache.read(['match_id', 'team', 'batsman'])
+    logger.info(f"⚡ Projected read of {len(sample):,} rows x {len(sample.columns)} columns "
+                f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+import pandas as pd
+import numpy as np
+import argparse
+import time
+import logging
+
+from fix_player_teams import resolve_player_teams
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def make_synthetic_deliveries(rows, players=800, teams=10, seed=42):
+    """Build a synthetic ball-by-ball frame with players that change teams between seasons"""
+    rng = np.random.default_rng(seed)
+    team_names = np.array([f"Team {i}" for i in range(teams)])
+    player_names = np.array([f"Player {i}" for i in range(players)])
+
+    match_ids = np.arange(rows) // 240
+    team1 = team_names[match_ids % teams]
+    team2 = team_names[(match_ids + 1 + match_ids // teams % (teams - 1)) % teams]
+    second_innings = (np.arange(rows) % 240) >= 120
+    batting = np.where(second_innings, team2, team1)
+
+    # Each player has a home squad per "season" block of matches
+    season = match_ids // 60
+    squad_of = lambda team: np.searchsorted(team_names, team)
+    per_squad = players // teams
+
+    def pick(team_idx):
+        offset = rng.integers(0, per_squad, rows)
+        shuffled = (team_idx * per_squad + offset + season * 7) % players
+        return player_names[shuffled]
+
+    batting_idx = squad_of(batting)
+    bowling_idx = squad_of(np.where(second_innings, team1, team2))
+
+    return pd.DataFrame({
+        'team': batting,
+        'team1': team1,
+        'team2': team2,
+        'batsman': pick(batting_idx),
+        'non_striker': pick(batting_idx),
+        'bowler': pick(bowling_idx),
+    })
+
+def resolve_player_teams_iterative(df):
+    """Previous iterrows-based resolver, kept here only as the benchmark baseline"""
+    player_teams = {}
+    for _, row in df[['batsman', 'team']].dropna().iterrows():
+        player_teams.setdefault(row['batsman'], set()).add(row['team'])
+    for _, row in df[['non_striker', 'team']].dropna().iterrows():
+        player_teams.setdefault(row['non_striker'], set()).add(row['team'])
+
+    team_opponents = {}
+    for _, row in df[['team1', 'team2']].drop_duplicates().iterrows():
+        if pd.notna(row['team1']) and pd.notna(row['team2']):
+            team_opponents[row['team1']] = row['team2']
+            team_opponents[row['team2']] = row['team1']
+
+    for _, row in df[['bowler', 'team']].dropna().iterrows():
+        bowling_team = team_opponents.get(row['team'])
+        if bowling_team:
+            player_teams.setdefault(row['bowler'], set()).add(bowling_team)
+
+    resolved_assignments = {}
+    for player, teams in player_teams.items():
+        if len(teams) == 1:
+            resolved_assignments[player] = list(teams)[0]
+        else:
+            team_counts = {}
+            for team in teams:
+                team_counts[team] = len(df[(df['batsman'] == player) & (df['team'] == team)]) + \
+                                  len(df[(df['non_striker'] == player) & (df['team'] == team)])
+            resolved_assignments[player] = max(team_counts, key=team_counts.get)
+
+    return resolved_assignments
+
+def time_call(func, *args):
+    """Return (result, seconds) for a single call"""
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Benchmark player-team resolution")
+    parser.add_argument('--rows', type=int, default=3_000_000,
+                        help="Synthetic deliveries for the vectorized resolver")
+    parser.add_argument('--legacy-rows', type=int, default=20_000,
+                        help="Deliveries for the iterrows baseline (it does not finish on millions)")
+    args = parser.parse_args()
+
+    df = make_synthetic_deliveries(args.rows)
+    logger.info(f"Generated {len(df):,} synthetic deliveries")
+
+    (resolved, conflicts), seconds = time_call(resolve_player_teams, df)
+    logger.info(f"⚡ Vectorized: {len(resolved):,} players ({len(conflicts):,} conflicts) "
+                f"in {seconds:.2f}s ({len(df) / seconds:,.0f} rows/sec)")
+
+    if args.legacy_rows:
+        sample = df.iloc[:args.legacy_rows]
+        (fast, _), fast_seconds = time_call(resolve_player_teams, sample)
+        slow, slow_seconds = time_call(resolve_player_teams_iterative, sample)
+
+        logger.info(f"🐢 Iterative on {len(sample):,} rows: {slow_seconds:.2f}s "
+                    f"({len(sample) / slow_seconds:,.0f} rows/sec)")
+        logger.info(f"⚡ Vectorized on {len(sample):,} rows: {fast_seconds:.3f}s "
+                    f"({slow_seconds / fast_seconds:,.0f}x faster)")
+
+        # The baseline ignores bowling appearances when breaking ties, so a few players can differ
+        same = sum(1 for player, team in slow.items() if fast.get(player) == team)
+        logger.info(f"Agreement with iterative resolver: {same}/{len(slow)} players")
+
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -1,30 +1,12 @@
 #!/usr/bin/env python3
 
-import os
 import pandas as pd
-from sqlalchemy import create_engine
-from dotenv import load_dotenv
-import urllib.parse
 
-# Load environment variables
-load_dotenv()
-
-# Database connection
-db_user = os.getenv('DB_USER')
-db_password = os.getenv('DB_PASSWORD')
-db_host = os.getenv('DB_HOST')
-db_port = os.getenv('DB_PORT')
-db_name = os.getenv('DB_NAME')
-
-# URL encode the password to handle special characters
-encoded_password = urllib.parse.quote_plus(db_password)
-
-# Create connection string
-connection_string = f"postgresql://{db_user}:{encoded_password}@{db_host}:{db_port}/{db_name}"
+from db_engine import get_engine, dispose_engine
 
 try:
-    # Create engine
-    engine = create_engine(connection_string)
+    # Shared pooled engine; quick checks should never hang on a locked table
+    engine = get_engine(statement_timeout_ms=30_000)
     
     # Check each table
     tables = ['teams', 'venues', 'players', 'matches', 'ball_by_ball']
@@ -46,7 +28,7 @@ try:
         except Exception as e:
             print(f"{table}: Error - {e}")
     
-    engine.dispose()
+    dispose_engine()
     
 except Exception as e:
     print(f"Database connection error: {e}") 
\ No newline at end of file
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+
+from sqlalchemy import text
+import logging
+
+logger = logging.getLogger(__name__)
+
+DATA_GENERATION_DDL = """
+    CREATE TABLE IF NOT EXISTS data_generation (
+        singleton BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (singleton),
+        generation BIGINT NOT NULL DEFAULT 0,
+        updated_by VARCHAR(50),
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+BUMP_DATA_GENERATION = """
+    INSERT INTO data_generation (singleton, generation, updated_by)
+    VALUES (TRUE, 1, :source)
+    ON CONFLICT (singleton) DO UPDATE SET
+        generation = data_generation.generation + 1,
+        updated_by = EXCLUDED.updated_by,
+        updated_at = CURRENT_TIMESTAMP
+    RETURNING generation
+"""
+
+def bump_data_generation(engine, source):
+    """Advance the data generation after a load commits, so API caches of historical stats are dropped"""
+    with engine.connect() as conn:
+        conn.execute(text(DATA_GENERATION_DDL))
+        generation = conn.execute(text(BUMP_DATA_GENERATION), {"source": source}).scalar()
+        conn.commit()
+    
+    logger.info(f"🔢 Data generation is now {generation} ({source})")
+    return generation
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+import os
+import urllib.parse
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Process-wide engine shared by every tool that runs in the same process
+_engine = None
+
+def env_int(name, default):
+    """Read an integer setting from the environment"""
+    value = os.getenv(name)
+    return int(value) if value not in (None, '') else default
+
+def database_url():
+    """Build the PostgreSQL URL from the DB_* settings in .env"""
+    load_dotenv()
+
+    db_password = os.getenv('DB_PASSWORD')
+    if not db_password:
+        raise ValueError("Database password not found - set DB_PASSWORD in database/.env")
+
+    db_user = os.getenv('DB_USER', 'postgres')
+    db_host = os.getenv('DB_HOST', 'localhost')
+    db_port = os.getenv('DB_PORT', '5432')
+    db_name = os.getenv('DB_NAME', 'ipl_fantasy_db')
+
+    # URL encode the password to handle special characters
+    encoded_password = urllib.parse.quote_plus(db_password)
+    # Explicit driver: the loaders rely on psycopg2 COPY and execute_values
+    return f"postgresql+psycopg2://{db_user}:{encoded_password}@{db_host}:{db_port}/{db_name}"
+
+def create_database_engine(pool_size=None, max_overflow=None, statement_timeout_ms=None,
+                           application_name='ipl-fantasy-tools'):
+    """Create a pooled engine: pre-ping, server-side statement timeout and batched executemany.
+
+    Settings default to DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE and
+    DB_STATEMENT_TIMEOUT_MS from .env; a statement timeout of 0 disables it.
+    """
+    url = database_url()
+    pool_size = pool_size if pool_size is not None else env_int('DB_POOL_SIZE', 5)
+    max_overflow = max_overflow if max_overflow is not None else env_int('DB_MAX_OVERFLOW', 5)
+    if statement_timeout_ms is None:
+        statement_timeout_ms = env_int('DB_STATEMENT_TIMEOUT_MS', 0)
+
+    connect_args = {
+        'application_name': application_name,
+        'connect_timeout': env_int('DB_CONNECT_TIMEOUT', 10),
+    }
+    if statement_timeout_ms:
+        connect_args['options'] = f"-c statement_timeout={statement_timeout_ms}"
+
+    return create_engine(
+        url,
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_pre_ping=True,
+        pool_recycle=env_int('DB_POOL_RECYCLE', 1800),
+        # executemany() goes through psycopg2 execute_values / execute_batch pages
+        executemany_mode='values_plus_batch',
+        executemany_batch_page_size=env_int('DB_EXECUTEMANY_PAGE_SIZE', 1000),
+        connect_args=connect_args,
+    )
+
+def get_engine(**settings):
+    """Return the shared engine, creating it on first use.
+
+    Jobs chained in one process (loader, team fix, verification) reuse its pooled
+    connections; settings only apply to the call that creates the engine.
+    """
+    global _engine
+    if _engine is None:
+        _engine = create_database_engine(**settings)
+        logger.info(f"Created pooled database engine (pool_size={_engine.pool.size()})")
+    return _engine
+
+def reset_engine_after_fork():
+    """Process-pool initializer: drop pooled connections inherited from the parent without closing them"""
+    if _engine is not None:
+        _engine.dispose(close=False)
+
+def dispose_engine():
+    """Close all pooled connections at the end of the process"""
+    global _engine
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
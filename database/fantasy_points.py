@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+
+import pandas as pd
+import numpy as np
+import argparse
+import json
+import time
+import logging
+
+from sqlalchemy import text
+
+from db_engine import get_engine, dispose_engine
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Dream11 T20 scoring. Milestones and hauls are [threshold, points] pairs, highest reached wins
+# (a century does not also earn the half-century bonus). Bands are [low, high, points] with
+# inclusive bounds, null for open-ended, first match wins; rates are rounded to 2 decimals first.
+DREAM11_T20_RULES = {
+    'name': 'dream11_t20',
+    'playing_xi': 4,
+    'run': 1,
+    'four_bonus': 1,
+    'six_bonus': 2,
+    'run_milestones': [[100, 16], [50, 8], [30, 4]],
+    'duck': -2,
+    'wicket': 25,
+    'lbw_bowled_bonus': 8,
+    'wicket_hauls': [[5, 16], [4, 8], [3, 4]],
+    'maiden': 12,
+    'catch': 8,
+    'catch_hauls': [[3, 4]],
+    'stumping': 12,
+    'run_out_direct': 12,
+    'run_out_indirect': 6,
+    'economy_min_balls': 12,
+    'economy_bands': [
+        [None, 4.99, 6], [5, 5.99, 4], [6, 7, 2],
+        [10, 11, -2], [11.01, 12, -4], [12.01, None, -6],
+    ],
+    'strike_rate_min_balls': 10,
+    'strike_rate_bands': [
+        [170.01, None, 6], [150.01, 170, 4], [130, 150, 2],
+        [60, 70, -2], [50, 59.99, -4], [None, 49.99, -6],
+    ],
+    # Duck and strike-rate penalties do not apply to these roles (compared case-insensitively)
+    'batting_penalty_exempt_roles': ['bowler'],
+}
+
+# Dismissals not credited to the bowler
+NON_BOWLER_DISMISSALS = ['run out', 'retired hurt', 'retired out', 'obstructing the field']
+# Not dismissals at all, so no duck
+NOT_OUT_DISMISSALS = ['retired hurt']
+
+PLAYER_MATCH_POINTS_DDL = """
+    CREATE TABLE IF NOT EXISTS player_match_points (
+        ruleset VARCHAR(50) NOT NULL,
+        match_id INTEGER REFERENCES matches(match_id) ON DELETE CASCADE,
+        player_id INTEGER REFERENCES players(player_id) ON DELETE CASCADE,
+        batting_points INTEGER NOT NULL DEFAULT 0,
+        bowling_points INTEGER NOT NULL DEFAULT 0,
+        fielding_points INTEGER NOT NULL DEFAULT 0,
+        other_points INTEGER NOT NULL DEFAULT 0,
+        total_points INTEGER NOT NULL DEFAULT 0,
+        computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (ruleset, match_id, player_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_player_match_points_player ON player_match_points(player_id, ruleset);
+"""
+
+# Super overs (innings 3 and later) are not scored, as in the head-to-head and innings summaries
+DELIVERIES_SELECT = """
+    SELECT
+        bb.match_id,
+        bb.innings,
+        bb.over_number,
+        bb.batsman_id,
+        bb.non_striker_id,
+        bb.bowler_id,
+        COALESCE(bb.batsman_runs, 0) AS batsman_runs,
+        COALESCE(bb.total_runs, 0) AS total_runs,
+        COALESCE(bb.wides, 0) AS wides,
+        COALESCE(bb.noballs, 0) AS noballs,
+        COALESCE(bb.byes, 0) AS byes,
+        COALESCE(bb.legbyes, 0) AS legbyes,
+        COALESCE(bb.is_wicket, false) AS is_wicket,
+        bb.player_out_id,
+        bb.dismissal_kind
+    FROM ball_by_ball bb
+    WHERE bb.match_id IS NOT NULL AND bb.innings <= 2 {match_filter}
+"""
+
+# One row per fielder credited with a dismissal; fielder names are resolved like the stats query.
+# fielder_count tells a direct-hit run out (one fielder) from a shared one.
+FIELDING_SELECT = """
+    WITH player_ids AS (
+        SELECT player_name, MIN(player_id) AS player_id
+        FROM players
+        GROUP BY player_name
+    ),
+    credits AS (
+        SELECT
+            bb.match_id,
+            btrim(f.name, ' []''"') AS fielder_name,
+            bb.dismissal_kind,
+            COUNT(*) OVER (PARTITION BY bb.ball_id) AS fielder_count
+        FROM ball_by_ball bb
+        CROSS JOIN LATERAL unnest(string_to_array(bb.fielders, ',')) AS f(name)
+        WHERE bb.is_wicket = true AND bb.innings <= 2 AND COALESCE(btrim(bb.fielders), '') <> '' {match_filter}
+    )
+    SELECT c.match_id, pid.player_id, c.dismissal_kind, c.fielder_count
+    FROM credits c
+    JOIN player_ids pid ON pid.player_name = c.fielder_name
+    UNION ALL
+    -- Caught and bowled is often recorded without a fielder
+    SELECT bb.match_id, bb.bowler_id, bb.dismissal_kind, 1
+    FROM ball_by_ball bb
+    WHERE bb.is_wicket = true AND bb.innings <= 2 AND bb.dismissal_kind = 'caught and bowled'
+    AND COALESCE(btrim(bb.fielders), '') = '' AND bb.bowler_id IS NOT NULL {match_filter}
+"""
+
+# Matches with deliveries but no points under the ruleset yet
+UNSCORED_MATCHES = """
+    SELECT DISTINCT s.match_id
+    FROM innings_summary s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM player_match_points p
+        WHERE p.ruleset = :ruleset AND p.match_id = s.match_id
+    )
+"""
+
+KEY = ['match_id', 'player_id']
+
+def load_rules(path=None):
+    """Default ruleset, with keys from a JSON file laid over it; the file must set its own name"""
+    rules = dict(DREAM11_T20_RULES)
+    if path:
+        with open(path) as handle:
+            overrides = json.load(handle)
+        if overrides.get('name', rules['name']) == rules['name']:
+            raise ValueError(f"Ruleset {path} needs a 'name' other than '{rules['name']}'")
+        rules.update(overrides)
+    return rules
+
+def milestone_points(values, milestones):
+    """Points for the highest [threshold, points] milestone each value reaches"""
+    ordered = sorted(milestones, key=lambda m: m[0], reverse=True)
+    return np.select([values >= threshold for threshold, _ in ordered], [points for _, points in ordered], 0)
+
+def band_points(values, bands, eligible):
+    """Points for the first [low, high, points] band containing each value, 0 where not eligible"""
+    rounded = np.round(values, 2)
+    conditions = []
+    for low, high, _ in bands:
+        inside = eligible.copy()
+        if low is not None:
+            inside &= rounded >= low
+        if high is not None:
+            inside &= rounded <= high
+        conditions.append(inside)
+    return np.select(conditions, [points for _, _, points in bands], 0)
+
+def sum_by_player(frame, player_column, values):
+    """Sum value columns per (match, player) into a frame indexed by KEY"""
+    grouped = frame.assign(player_id=frame[player_column]).dropna(subset=['player_id'])
+    grouped['player_id'] = grouped['player_id'].astype('int64')
+    return grouped.groupby(KEY)[values].sum()
+
+def compute_match_points(deliveries, fielding, roles, rules=DREAM11_T20_RULES):
+    """Fantasy points per player and match for the given deliveries, one vectorized pass.
+
+    deliveries has the DELIVERIES_SELECT columns, fielding the FIELDING_SELECT columns and
+    roles maps player_id -> role. Every player seen batting, at the non-striker's end,
+    bowling or fielding counts as in the playing XI.
+    """
+    d = deliveries
+    not_wide = d['wides'].to_numpy() == 0
+    legal = not_wide & (d['noballs'].to_numpy() == 0)
+    kind = d['dismissal_kind'].fillna('')
+    is_wicket = d['is_wicket'].to_numpy(dtype=bool)
+
+    # Batting
+    batting = d[['match_id', 'batsman_id']].assign(
+        runs=d['batsman_runs'],
+        balls=not_wide.astype('int64'),
+        fours=(d['batsman_runs'] == 4).astype('int64'),
+        sixes=(d['batsman_runs'] == 6).astype('int64'),
+    )
+    batting = sum_by_player(batting, 'batsman_id', ['runs', 'balls', 'fours', 'sixes'])
+    outs = d.loc[is_wicket & ~kind.isin(NOT_OUT_DISMISSALS), ['match_id', 'player_out_id']].assign(dismissed=1)
+    dismissed = sum_by_player(outs, 'player_out_id', ['dismissed'])
+
+    # Bowling: byes and leg byes are not charged to the bowler
+    credited = is_wicket & d['player_out_id'].notna().to_numpy() & ~kind.isin(NON_BOWLER_DISMISSALS).to_numpy()
+    bowling_rows = d[['match_id', 'innings', 'over_number', 'bowler_id']].assign(
+        legal_balls=legal.astype('int64'),
+        conceded=d['total_runs'] - d['byes'] - d['legbyes'],
+        wickets=credited.astype('int64'),
+        lbw_bowled=(credited & kind.isin(['lbw', 'bowled']).to_numpy()).astype('int64'),
+    ).dropna(subset=['bowler_id'])
+    overs = bowling_rows.groupby(['match_id', 'innings', 'over_number', 'bowler_id'])[['legal_balls', 'conceded']].sum()
+    maidens = overs[(overs['legal_balls'] == 6) & (overs['conceded'] == 0)].assign(maidens=1).reset_index()
+    bowling = sum_by_player(bowling_rows, 'bowler_id', ['legal_balls', 'conceded', 'wickets', 'lbw_bowled'])
+    maidens = sum_by_player(maidens, 'bowler_id', ['maidens'])
+
+    # Fielding
+    fielding_kind = fielding['dismissal_kind'].fillna('')
+    fielding = fielding.assign(
+        catches=fielding_kind.isin(['caught', 'caught and bowled']).astype('int64'),
+        stumpings=(fielding_kind == 'stumped').astype('int64'),
+        direct_run_outs=((fielding_kind == 'run out') & (fielding['fielder_count'] == 1)).astype('int64'),
+        shared_run_outs=((fielding_kind == 'run out') & (fielding['fielder_count'] > 1)).astype('int64'),
+    )
+    fielding = sum_by_player(fielding, 'player_id', ['catches', 'stumpings', 'direct_run_outs', 'shared_run_outs'])
+
+    # Everyone who took part, then every aggregate aligned to that index
+    appeared = pd.concat([
+        d[['match_id', column]].set_axis(KEY, axis=1)
+        for column in ('batsman_id', 'non_striker_id', 'bowler_id')
+    ] + [fielding.index.to_frame(index=False)]).dropna().astype('int64').drop_duplicates()
+    index = pd.MultiIndex.from_frame(appeared.sort_values(KEY))
+    stats = pd.concat([batting, dismissed, bowling, maidens, fielding], axis=1).reindex(index).fillna(0)
+
+    runs = stats['runs'].to_numpy()
+    balls = stats['balls'].to_numpy()
+    legal_balls = stats['legal_balls'].to_numpy()
+    exempt_roles = {role.lower() for role in rules['batting_penalty_exempt_roles']}
+    role = index.get_level_values('player_id').map(roles).fillna('').str.lower()
+    penalised = ~np.asarray(role.isin(exempt_roles))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        strike_rate = np.where(balls > 0, runs * 100.0 / balls, 0.0)
+        economy = np.where(legal_balls > 0, stats['conceded'].to_numpy() * 6.0 / legal_balls, 0.0)
+
+    batting_points = (
+        runs * rules['run']
+        + stats['fours'].to_numpy() * rules['four_bonus']
+        + stats['sixes'].to_numpy() * rules['six_bonus']
+        + milestone_points(runs, rules['run_milestones'])
+        + np.where(penalised & (stats['dismissed'].to_numpy() > 0) & (runs == 0), rules['duck'], 0)
+        + band_points(strike_rate, rules['strike_rate_bands'], penalised & (balls >= rules['strike_rate_min_balls']))
+    )
+    wickets = stats['wickets'].to_numpy()
+    bowling_points = (
+        wickets * rules['wicket']
+        + stats['lbw_bowled'].to_numpy() * rules['lbw_bowled_bonus']
+        + milestone_points(wickets, rules['wicket_hauls'])
+        + stats['maidens'].to_numpy() * rules['maiden']
+        + band_points(economy, rules['economy_bands'], legal_balls >= rules['economy_min_balls'])
+    )
+    catches = stats['catches'].to_numpy()
+    fielding_points = (
+        catches * rules['catch']
+        + milestone_points(catches, rules['catch_hauls'])
+        + stats['stumpings'].to_numpy() * rules['stumping']
+        + stats['direct_run_outs'].to_numpy() * rules['run_out_direct']
+        + stats['shared_run_outs'].to_numpy() * rules['run_out_indirect']
+    )
+    other_points = np.full(len(index), rules['playing_xi'])
+
+    points = index.to_frame(index=False)
+    points.insert(0, 'ruleset', rules['name'])
+    points['batting_points'] = batting_points.astype('int32')
+    points['bowling_points'] = bowling_points.astype('int32')
+    points['fielding_points'] = fielding_points.astype('int32')
+    points['other_points'] = other_points.astype('int32')
+    points['total_points'] = (batting_points + bowling_points + fielding_points + other_points).astype('int32')
+    return points
+
+def ensure_points_table(engine):
+    """Create player_match_points when schema.sql has not been re-applied"""
+    with engine.connect() as conn:
+        conn.execute(text(PLAYER_MATCH_POINTS_DDL))
+        conn.commit()
+
+def refresh_player_match_points(engine, match_ids=None, full=False, rules=DREAM11_T20_RULES):
+    """Score matches into player_match_points.
+
+    Incremental by default: matches without points under this ruleset plus match_ids
+    (reloaded matches) are scored. full=True rescores every match, e.g. after a rule change.
+    """
+    logger.info(f"🏆 Refreshing fantasy points ({rules['name']})...")
+    started = time.perf_counter()
+
+    try:
+        ensure_points_table(engine)
+
+        if full:
+            match_filter = ""
+            params = {}
+        else:
+            unscored = pd.read_sql(text(UNSCORED_MATCHES), engine, params={"ruleset": rules['name']})
+            pending = sorted(set(unscored['match_id'].astype(int)) | {int(m) for m in (match_ids or [])})
+            if not pending:
+                logger.info("✅ Fantasy points are already current")
+                return 0
+            match_filter = "AND bb.match_id = ANY(:match_ids)"
+            params = {"match_ids": pending}
+
+        deliveries = pd.read_sql(text(DELIVERIES_SELECT.format(match_filter=match_filter)), engine, params=params)
+        fielding = pd.read_sql(text(FIELDING_SELECT.format(match_filter=match_filter)), engine, params=params)
+        roles = pd.read_sql("SELECT player_id, role FROM players", engine).set_index('player_id')['role']
+        loaded = time.perf_counter()
+
+        points = compute_match_points(deliveries, fielding, roles, rules)
+        scored = time.perf_counter()
+
+        with engine.connect() as conn:
+            if full:
+                conn.execute(text("DELETE FROM player_match_points WHERE ruleset = :ruleset"), {"ruleset": rules['name']})
+            else:
+                conn.execute(text("DELETE FROM player_match_points WHERE ruleset = :ruleset AND match_id = ANY(:match_ids)"),
+                             {"ruleset": rules['name'], "match_ids": params["match_ids"]})
+            points.to_sql('player_match_points', conn, if_exists='append', index=False,
+                          method='multi', chunksize=1000)
+            conn.commit()
+
+        logger.info(f"✅ Scored {len(points)} player-matches in {points['match_id'].nunique()} matches "
+                    f"(read {loaded - started:.1f}s, scoring {scored - loaded:.2f}s, "
+                    f"total {time.perf_counter() - started:.1f}s)")
+        return len(points)
+
+    except Exception as e:
+        logger.error(f"❌ Error refreshing fantasy points: {e}")
+        raise
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Compute per-player fantasy points for every match from ball_by_ball")
+    parser.add_argument('--full', action='store_true', help="Rescore every match instead of only unscored ones")
+    parser.add_argument('--match-ids', type=int, nargs='*', default=[], help="Also rescore these matches")
+    parser.add_argument('--rules', help="JSON file with scoring rules laid over the Dream11 T20 defaults")
+    args = parser.parse_args()
+
+    try:
+        rules = load_rules(args.rules)
+        refresh_player_match_points(get_engine(), args.match_ids, full=args.full, rules=rules)
+        return 0
+    except Exception:
+        return 1
+    finally:
+        dispose_engine()
+
+if __name__ == "__main__":
+    exit(main())
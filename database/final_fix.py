@@ -2,48 +2,379 @@
 
 import pandas as pd
 import numpy as np
-from sqlalchemy import create_engine, text
-import urllib.parse
-import os
-from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+import io
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import logging
 
+from db_engine import get_engine, dispose_engine, reset_engine_after_fork
+from ball_by_ball_cache import BallByBallCache, CSV_DTYPES
+from materialized_views import refresh_materialized_views
+from data_generation import bump_data_generation
+from form_features import refresh_player_form_features
+from fantasy_points import refresh_player_match_points
+from load_manifest import MatchLoadManifest, compute_match_checksums, combine_match_checksums
+from name_index import NameIndexes
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+BALL_BY_BALL_CSV_COLUMNS = [
+    'match_id', 'innings', 'team', 'over', 'ball', 'batsman', 'non_striker', 'bowler',
+    'batsman_runs', 'extras', 'total_runs', 'wides', 'noballs', 'byes', 'legbyes',
+    'wicket', 'player_out', 'kind', 'fielders'
+]
+
+BALL_BY_BALL_COLUMNS = [
+    'match_id', 'innings', 'team_id', 'over_number', 'ball_number', 'delivery_seq',
+    'batsman_id', 'non_striker_id', 'bowler_id', 'batsman_runs',
+    'extras', 'total_runs', 'wides', 'noballs', 'byes', 'legbyes',
+    'is_wicket', 'player_out_id', 'dismissal_kind', 'fielders'
+]
+
+BALL_BY_BALL_INT_COLUMNS = [
+    'match_id', 'innings', 'team_id', 'over_number', 'ball_number', 'delivery_seq',
+    'batsman_id', 'non_striker_id', 'bowler_id', 'batsman_runs',
+    'extras', 'total_runs', 'wides', 'noballs', 'byes', 'legbyes', 'player_out_id'
+]
+
+# Natural key of a delivery; delivery_seq separates repeated ball numbers (wides, no-balls)
+DELIVERY_KEY_COLUMNS = ['match_id', 'innings', 'over_number', 'ball_number']
+DELIVERY_UNIQUE_INDEX = 'uq_ball_by_ball_delivery'
+
+BALL_BY_BALL_STAGING_DDL = """
+    match_id INTEGER,
+    innings INTEGER,
+    team_id INTEGER,
+    over_number INTEGER,
+    ball_number INTEGER,
+    delivery_seq SMALLINT,
+    batsman_id INTEGER,
+    non_striker_id INTEGER,
+    bowler_id INTEGER,
+    batsman_runs INTEGER,
+    extras INTEGER,
+    total_runs INTEGER,
+    wides INTEGER,
+    noballs INTEGER,
+    byes INTEGER,
+    legbyes INTEGER,
+    is_wicket BOOLEAN,
+    player_out_id INTEGER,
+    dismissal_kind VARCHAR(50),
+    fielders VARCHAR(200)
+"""
+
+# Chunk size used by parallel workers when --chunk-size is not given
+PARALLEL_CHUNK_SIZE = 250_000
+
+# Innings phases, counted from the first over of each innings (datasets number overs from 0 or 1)
+POWERPLAY_OVERS = 6
+DEATH_OVERS_FROM = 15
+
+INNINGS_SUMMARY_DDL = """
+CREATE TABLE IF NOT EXISTS innings_summary (
+    match_id INTEGER REFERENCES matches(match_id),
+    innings SMALLINT NOT NULL,
+    team_id INTEGER REFERENCES teams(team_id),
+    runs INTEGER NOT NULL DEFAULT 0,
+    wickets SMALLINT NOT NULL DEFAULT 0,
+    legal_balls SMALLINT NOT NULL DEFAULT 0,
+    extras SMALLINT NOT NULL DEFAULT 0,
+    powerplay_runs INTEGER NOT NULL DEFAULT 0,
+    powerplay_wickets SMALLINT NOT NULL DEFAULT 0,
+    death_runs INTEGER NOT NULL DEFAULT 0,
+    death_wickets SMALLINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (match_id, innings)
+);
+"""
+
+# Per-innings aggregates; {match_filter} restricts the ball_by_ball scan to a set of matches
+INNINGS_SUMMARY_SELECT = """
+SELECT
+    d.match_id,
+    d.innings,
+    MIN(d.team_id) AS team_id,
+    SUM(d.total_runs) AS runs,
+    COUNT(*) FILTER (WHERE d.is_dismissal) AS wickets,
+    COUNT(*) FILTER (WHERE COALESCE(d.wides, 0) = 0 AND COALESCE(d.noballs, 0) = 0) AS legal_balls,
+    COALESCE(SUM(d.extras), 0) AS extras,
+    COALESCE(SUM(d.total_runs) FILTER (WHERE d.over_index < {powerplay_overs}), 0) AS powerplay_runs,
+    COUNT(*) FILTER (WHERE d.is_dismissal AND d.over_index < {powerplay_overs}) AS powerplay_wickets,
+    COALESCE(SUM(d.total_runs) FILTER (WHERE d.over_index >= {death_overs_from}), 0) AS death_runs,
+    COUNT(*) FILTER (WHERE d.is_dismissal AND d.over_index >= {death_overs_from}) AS death_wickets
+FROM (
+    SELECT
+        bb.match_id,
+        bb.innings,
+        bb.team_id,
+        bb.total_runs,
+        bb.extras,
+        bb.wides,
+        bb.noballs,
+        bb.is_wicket AND COALESCE(bb.dismissal_kind, '') <> 'retired hurt' AS is_dismissal,
+        bb.over_number - MIN(bb.over_number) OVER (PARTITION BY bb.match_id, bb.innings) AS over_index
+    FROM ball_by_ball bb
+    WHERE bb.innings IS NOT NULL {match_filter}
+) d
+GROUP BY d.match_id, d.innings
+"""
+
+INNINGS_SUMMARY_COLUMNS = """
+    match_id, innings, team_id, runs, wickets, legal_balls, extras,
+    powerplay_runs, powerplay_wickets, death_runs, death_wickets
+"""
+
+# Wickets available to a chasing side, for "won by N wickets" margins
+TEAM_WICKETS = 10
+
+# Set-based result pass over innings_summary. Innings 1 and 2 decide the match: a defended total
+# wins by runs, a successful chase by wickets in hand. Level scores go to the last super over pair
+# (innings 3/4, 5/6, ...); a match without a second innings is recorded as no result.
+MATCH_RESULT_UPDATE = """
+WITH innings AS (
+    SELECT s.match_id, s.innings, s.team_id, s.runs, s.wickets
+    FROM innings_summary s
+    JOIN matches m ON m.match_id = s.match_id
+    {match_filter}
+),
+regular AS (
+    SELECT
+        match_id,
+        MAX(team_id) FILTER (WHERE innings = 1) AS first_team_id,
+        MAX(runs) FILTER (WHERE innings = 1) AS first_runs,
+        MAX(team_id) FILTER (WHERE innings = 2) AS second_team_id,
+        MAX(runs) FILTER (WHERE innings = 2) AS second_runs,
+        MAX(wickets) FILTER (WHERE innings = 2) AS second_wickets
+    FROM innings
+    GROUP BY match_id
+),
+super_overs AS (
+    SELECT DISTINCT ON (a.match_id)
+        a.match_id,
+        CASE
+            WHEN a.runs > b.runs THEN a.team_id
+            WHEN b.runs > a.runs THEN b.team_id
+        END AS winner_team_id
+    FROM innings a
+    JOIN innings b ON b.match_id = a.match_id AND b.innings = a.innings + 1
+    WHERE a.innings >= 3 AND a.innings % 2 = 1
+    ORDER BY a.match_id, a.innings DESC
+),
+results AS (
+    SELECT
+        r.match_id,
+        CASE
+            WHEN r.second_runs IS NULL THEN NULL
+            WHEN r.first_runs > r.second_runs THEN r.first_team_id
+            WHEN r.second_runs > r.first_runs THEN r.second_team_id
+            ELSE so.winner_team_id
+        END AS winner_team_id,
+        CASE
+            WHEN r.second_runs IS NULL THEN NULL
+            WHEN r.first_runs > r.second_runs THEN r.first_runs - r.second_runs
+            WHEN r.second_runs > r.first_runs THEN GREATEST({team_wickets} - r.second_wickets, 0)
+        END AS winning_margin,
+        CASE
+            WHEN r.second_runs IS NULL THEN 'no result'
+            WHEN r.first_runs > r.second_runs THEN 'runs'
+            WHEN r.second_runs > r.first_runs THEN 'wickets'
+            WHEN so.winner_team_id IS NOT NULL THEN 'super over'
+            ELSE 'tie'
+        END AS win_type
+    FROM regular r
+    LEFT JOIN super_overs so ON so.match_id = r.match_id
+    WHERE r.first_runs IS NOT NULL
+)
+UPDATE matches
+SET
+    winner_team_id = results.winner_team_id,
+    winning_margin = results.winning_margin,
+    win_type = results.win_type,
+    result_computed_at = CURRENT_TIMESTAMP
+FROM results
+WHERE matches.match_id = results.match_id
+"""
+
+BALL_BY_BALL_TRIGGER = 'trigger_update_player_match_stats'
+
+# One pass over ball_by_ball: every delivery fans out into batting, dismissal, bowling and
+# fielding role rows, which are aggregated together so each player-match row is built once.
+PLAYER_MATCH_STATS_COLUMNS = """
+    match_id, player_id, team_id, match_date, runs_scored, balls_faced, fours, sixes, strike_rate, is_not_out,
+    overs_bowled, runs_conceded, wickets_taken, economy_rate, catches, stumpings, run_outs
+"""
+
+PLAYER_MATCH_STATS_SELECT = """
+WITH player_ids AS (
+    SELECT player_name, MIN(player_id) AS player_id
+    FROM players
+    GROUP BY player_name
+),
+roles AS (
+    SELECT 
+        bb.match_id,
+        m.match_date,
+        r.role,
+        r.player_id,
+        r.team_id,
+        bb.batsman_runs,
+        bb.total_runs,
+        bb.is_wicket,
+        bb.player_out_id,
+        bb.dismissal_kind
+    FROM ball_by_ball bb
+    JOIN matches m ON m.match_id = bb.match_id
+    CROSS JOIN LATERAL (
+        SELECT CASE WHEN bb.team_id = m.team1_id THEN m.team2_id ELSE m.team1_id END AS bowling_team_id
+    ) side
+    CROSS JOIN LATERAL (
+        SELECT 'bat' AS role, bb.batsman_id AS player_id, bb.team_id AS team_id
+        UNION ALL
+        SELECT 'out', bb.player_out_id, bb.team_id WHERE bb.player_out_id IS NOT NULL
+        UNION ALL
+        SELECT 'bowl', bb.bowler_id, side.bowling_team_id
+        UNION ALL
+        SELECT 'field', pid.player_id, side.bowling_team_id
+        FROM unnest(string_to_array(bb.fielders, ',')) AS f(name)
+        JOIN player_ids pid ON pid.player_name = btrim(f.name, ' []''"')
+        WHERE bb.is_wicket = true
+        UNION ALL
+        -- Caught and bowled is often recorded without a fielder
+        SELECT 'field', bb.bowler_id, side.bowling_team_id
+        WHERE bb.dismissal_kind = 'caught and bowled' AND COALESCE(btrim(bb.fielders), '') = ''
+    ) r
+    WHERE r.player_id IS NOT NULL
+    {match_filter}
+),
+aggregated AS (
+    SELECT 
+        match_id,
+        player_id,
+        COALESCE(MAX(team_id) FILTER (WHERE role IN ('bat', 'out')), MAX(team_id)) AS team_id,
+        MAX(match_date) AS match_date,
+        COALESCE(SUM(batsman_runs) FILTER (WHERE role = 'bat'), 0) AS runs_scored,
+        COUNT(*) FILTER (WHERE role = 'bat') AS balls_faced,
+        COUNT(*) FILTER (WHERE role = 'bat' AND batsman_runs = 4) AS fours,
+        COUNT(*) FILTER (WHERE role = 'bat' AND batsman_runs = 6) AS sixes,
+        COUNT(*) FILTER (WHERE role = 'out') AS dismissals,
+        COUNT(*) FILTER (WHERE role = 'bowl') AS balls_bowled,
+        COALESCE(SUM(total_runs) FILTER (WHERE role = 'bowl'), 0) AS runs_conceded,
+        COUNT(*) FILTER (WHERE role = 'bowl' AND is_wicket = true AND player_out_id IS NOT NULL) AS wickets_taken,
+        COUNT(*) FILTER (WHERE role = 'field' AND dismissal_kind IN ('caught', 'caught and bowled')) AS catches,
+        COUNT(*) FILTER (WHERE role = 'field' AND dismissal_kind = 'stumped') AS stumpings,
+        COUNT(*) FILTER (WHERE role = 'field' AND dismissal_kind = 'run out') AS run_outs
+    FROM roles
+    GROUP BY match_id, player_id
+)
+SELECT 
+    match_id,
+    player_id,
+    team_id,
+    match_date,
+    runs_scored,
+    balls_faced,
+    fours,
+    sixes,
+    CASE WHEN balls_faced > 0 THEN ROUND((runs_scored * 100.0 / balls_faced)::numeric, 2) ELSE 0 END AS strike_rate,
+    balls_faced > 0 AND dismissals = 0 AS is_not_out,
+    ROUND((balls_bowled / 6.0)::numeric, 1) AS overs_bowled,
+    runs_conceded,
+    wickets_taken,
+    CASE WHEN balls_bowled > 0 THEN ROUND((runs_conceded * 6.0 / balls_bowled)::numeric, 2) ELSE 0 END AS economy_rate,
+    catches,
+    stumpings,
+    run_outs
+FROM aggregated
+"""
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unsupported)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def insert_on_conflict_do_nothing(table, conn, keys, data_iter):
+    """pandas.to_sql insert method that skips rows already present under a unique key"""
+    rows = [dict(zip(keys, row)) for row in data_iter]
+    if not rows:
+        return 0
+    statement = postgresql.insert(table.table).values(rows).on_conflict_do_nothing()
+    return conn.execute(statement).rowcount
+
+def assign_delivery_seq(frame, carry=None):
+    """Number repeated (match, innings, over, ball) rows in CSV order.
+    
+    carry holds the per-key counts from the previous chunk so a key split across a chunk
+    boundary keeps counting; the updated counts are returned for the next chunk.
+    """
+    seq = frame.groupby(DELIVERY_KEY_COLUMNS, sort=False).cumcount()
+    if carry is not None and not carry.empty:
+        offsets = frame[DELIVERY_KEY_COLUMNS].merge(carry, on=DELIVERY_KEY_COLUMNS, how='left')['seen']
+        seq = seq + offsets.fillna(0).astype('int64').to_numpy()
+    frame['delivery_seq'] = seq.astype('int16')
+    
+    next_carry = frame.groupby(DELIVERY_KEY_COLUMNS)['delivery_seq'].max().add(1).rename('seen').reset_index()
+    return frame, next_carry
+
+def map_categorical(series, mapping):
+    """Map a categorical name column to ids through a NameIndex, resolving each category once.
+    Only exact names and explicit aliases count; unknown names stay NULL and their rows are dropped."""
+    lookup = mapping.resolve_many(series.cat.categories, exact=True)
+    return pd.Series(lookup.take(series.cat.codes.to_numpy(), allow_fill=True), index=series.index)
+
+def load_partition_worker(options, partition):
+    """Process-pool entry point: load one partition through the worker's own pooled engine"""
+    return IPLDatabaseFinalFix(**options).load_partition(**partition)
+
 class IPLDatabaseFinalFix:
     """Final comprehensive fix for IPL database - handles incomplete matches correctly"""
     
-    def __init__(self):
+    def __init__(self, chunk_size=None, load_method='copy', use_staging=False, disable_triggers=False,
+                 incremental=False, force_reload=False, workers=1, recompute_winners=False):
         self.engine = None
         self.csv_file = "../data/ipl_ball_by_ball.csv"
         self.batch_size = 1000
+        self.chunk_size = chunk_size
+        self.load_method = load_method
+        self.use_staging = use_staging
+        self.disable_triggers = disable_triggers
+        self.incremental = incremental
+        self.delivery_carry = None
+        self.rows_loaded = 0
+        self.load_seconds = 0.0
+        self.force_reload = force_reload
+        self.workers = workers
+        self.recompute_winners = recompute_winners
+        self.loaded_match_ids = None
+        self.name_indexes = None
         self.connect_database()
+        self.manifest = MatchLoadManifest(self.engine, 'ball_by_ball')
+        self.cache = BallByBallCache(self.csv_file)
         
     def connect_database(self):
-        """Connect to database"""
+        """Connect to database through the shared pooled engine"""
         try:
-            load_dotenv()
-            
-            db_user = os.getenv('DB_USER')
-            db_password = os.getenv('DB_PASSWORD')
-            db_host = os.getenv('DB_HOST')
-            db_port = os.getenv('DB_PORT')
-            db_name = os.getenv('DB_NAME')
-            
-            if db_password:
-                encoded_password = urllib.parse.quote_plus(db_password)
-                connection_string = f'postgresql://{db_user}:{encoded_password}@{db_host}:{db_port}/{db_name}'
-                self.engine = create_engine(connection_string)
-                
-                # Test connection
-                with self.engine.connect() as conn:
-                    conn.execute(text("SELECT 1"))
-                
-                logger.info("Database connection successful")
-            else:
-                raise ValueError("Database password not found")
+            self.engine = get_engine()
+            
+            # Test connection
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            
+            logger.info("Database connection successful")
                 
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
@@ -54,18 +385,16 @@ class IPLDatabaseFinalFix:
         logger.info("⚾ Final ball-by-ball data loading (skipping incomplete matches)...")
         
         try:
-            # Load CSV data
-            df = pd.read_csv(self.csv_file)
-            df['date'] = pd.to_datetime(df['date'])
+            # Load cleaned data (Parquet cache when available, CSV otherwise)
+            df = self.cache.read(BALL_BY_BALL_CSV_COLUMNS + ['is_complete_match'])
             
-            # Identify incomplete matches (matches with only 1 team)
-            match_team_counts = df.groupby('match_id')['team'].nunique().reset_index()
-            incomplete_matches = match_team_counts[match_team_counts['team'] < 2]['match_id'].tolist()
+            # Incomplete matches (only 1 team) are flagged while cleaning
+            incomplete_matches = sorted(df.loc[~df['is_complete_match'], 'match_id'].unique().tolist())
             
             logger.info(f"Found {len(incomplete_matches)} incomplete matches to skip: {incomplete_matches}")
             
             # Filter out incomplete matches
-            df_complete = df[~df['match_id'].isin(incomplete_matches)]
+            df_complete = df[df['is_complete_match']]
             logger.info(f"Filtered dataset: {len(df_complete)} records (excluding {len(df) - len(df_complete)} incomplete records)")
             
             # Get existing matches from database
@@ -83,34 +412,22 @@ class IPLDatabaseFinalFix:
             df_valid = df_complete[df_complete['match_id'].isin(valid_matches)]
             logger.info(f"Valid ball-by-ball records to process: {len(df_valid)}")
             
-            # Get existing ball-by-ball data count
-            current_count = pd.read_sql("SELECT COUNT(*) as count FROM ball_by_ball", self.engine)['count'].iloc[0]
-            logger.info(f"Current ball_by_ball records: {current_count}")
+            # Only process matches that are new or changed since the last load
+            pending = self.select_pending_matches(compute_match_checksums(df_valid, BALL_BY_BALL_CSV_COLUMNS))
+            df_valid = df_valid[df_valid['match_id'].isin(pending.index)]
             
-            if len(df_valid) > current_count:
+            if len(df_valid) > 0:
                 # Get mappings
                 teams_map = self.get_teams_mapping()
                 players_map = self.get_players_mapping()
                 
-                # Get existing ball records to avoid duplicates
-                existing_balls = pd.read_sql("""
-                    SELECT DISTINCT match_id, innings, over_number, ball_number, batsman_id, bowler_id
-                    FROM ball_by_ball
-                """, self.engine)
-                
-                # Create composite key for existing records
-                existing_keys = set()
-                for _, row in existing_balls.iterrows():
-                    key = f"{row['match_id']}-{row['innings']}-{row['over_number']}-{row['ball_number']}-{row['batsman_id']}-{row['bowler_id']}"
-                    existing_keys.add(key)
-                
                 # Prepare CSV data
                 csv_data = df_valid.copy()
-                csv_data['team_id'] = csv_data['team'].map(teams_map)
-                csv_data['batsman_id'] = csv_data['batsman'].map(players_map)
-                csv_data['non_striker_id'] = csv_data['non_striker'].map(players_map)
-                csv_data['bowler_id'] = csv_data['bowler'].map(players_map)
-                csv_data['player_out_id'] = csv_data['player_out'].map(players_map)
+                csv_data['team_id'] = map_categorical(csv_data['team'], teams_map)
+                csv_data['batsman_id'] = map_categorical(csv_data['batsman'], players_map)
+                csv_data['non_striker_id'] = map_categorical(csv_data['non_striker'], players_map)
+                csv_data['bowler_id'] = map_categorical(csv_data['bowler'], players_map)
+                csv_data['player_out_id'] = map_categorical(csv_data['player_out'], players_map)
                 
                 # Rename columns
                 csv_data = csv_data.rename(columns={
@@ -121,46 +438,25 @@ class IPLDatabaseFinalFix:
                 
                 csv_data['is_wicket'] = csv_data['wicket'].notna()
                 
-                # Create composite key for CSV records
-                csv_data['composite_key'] = (
-                    csv_data['match_id'].astype(str) + '-' + 
-                    csv_data['innings'].astype(str) + '-' + 
-                    csv_data['over_number'].astype(str) + '-' + 
-                    csv_data['ball_number'].astype(str) + '-' + 
-                    csv_data['batsman_id'].astype(str) + '-' + 
-                    csv_data['bowler_id'].astype(str)
-                )
+                csv_data, _ = assign_delivery_seq(csv_data)
                 
-                # Filter out existing records
-                new_records = csv_data[~csv_data['composite_key'].isin(existing_keys)]
+                # Duplicates are skipped by the load itself via ON CONFLICT on the delivery key
+                new_records = csv_data
                 
                 if len(new_records) > 0:
-                    # Select required columns
-                    columns_to_insert = [
-                        'match_id', 'innings', 'team_id', 'over_number', 'ball_number',
-                        'batsman_id', 'non_striker_id', 'bowler_id', 'batsman_runs',
-                        'extras', 'total_runs', 'wides', 'noballs', 'byes', 'legbyes',
-                        'is_wicket', 'player_out_id', 'dismissal_kind', 'fielders'
-                    ]
-                    
-                    final_data = new_records[columns_to_insert].copy()
+                    final_data = new_records[BALL_BY_BALL_COLUMNS].copy()
                     
                     # Remove rows with missing essential data
                     final_data = final_data.dropna(subset=['match_id', 'team_id', 'batsman_id', 'bowler_id'])
                     
-                    logger.info(f"Loading {len(final_data)} new ball-by-ball records...")
-                    
-                    # Load in batches
-                    for i in range(0, len(final_data), self.batch_size):
-                        batch = final_data.iloc[i:i+self.batch_size]
-                        batch.to_sql('ball_by_ball', self.engine, if_exists='append', index=False)
-                        
-                        if (i // self.batch_size + 1) % 10 == 0:
-                            logger.info(f"Loaded {i + len(batch)}/{len(final_data)} records ({((i + len(batch))/len(final_data))*100:.1f}%)")
-                    
-                    logger.info(f"✅ Successfully loaded {len(final_data)} new ball-by-ball records")
+                    logger.info(f"Loading {len(final_data)} ball-by-ball records...")
+                    inserted = self.insert_ball_by_ball(final_data)
+                    logger.info(f"✅ Successfully loaded {inserted} new ball-by-ball records "
+                                f"({len(final_data) - inserted} already present)")
                 else:
                     logger.info("✅ All valid ball-by-ball records already loaded")
+                
+                self.manifest.record(pending)
             else:
                 logger.info("✅ Ball-by-ball data already complete")
                 
@@ -168,8 +464,386 @@ class IPLDatabaseFinalFix:
             logger.error(f"❌ Error completing ball-by-ball data: {e}")
             raise
     
-    def add_match_winner_column(self):
-        """Add winner column and calculate winners"""
+    def insert_ball_by_ball(self, final_data):
+        """Load prepared ball-by-ball rows using the configured load method, returning rows inserted"""
+        started = time.perf_counter()
+        
+        if self.load_method == 'copy':
+            inserted = self.copy_ball_by_ball(final_data)
+        else:
+            inserted = 0
+            for i in range(0, len(final_data), self.batch_size):
+                batch = final_data.iloc[i:i+self.batch_size]
+                inserted += batch.to_sql('ball_by_ball', self.engine, if_exists='append', index=False,
+                                         method=insert_on_conflict_do_nothing)
+                
+                if (i // self.batch_size + 1) % 10 == 0:
+                    logger.info(f"Loaded {i + len(batch)}/{len(final_data)} records ({((i + len(batch))/len(final_data))*100:.1f}%)")
+        
+        self.rows_loaded += len(final_data)
+        self.load_seconds += time.perf_counter() - started
+        return inserted
+    
+    def copy_ball_by_ball(self, final_data):
+        """COPY rows into a staging table and merge them into ball_by_ball, skipping known deliveries"""
+        rows = final_data[BALL_BY_BALL_COLUMNS].astype({col: 'Int64' for col in BALL_BY_BALL_INT_COLUMNS})
+        buffer = io.StringIO()
+        rows.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        
+        columns = ', '.join(BALL_BY_BALL_COLUMNS)
+        key = ', '.join(DELIVERY_KEY_COLUMNS + ['delivery_seq'])
+        staging = 'ball_by_ball_staging' if self.use_staging else 'ball_by_ball_load'
+        
+        raw_conn = self.engine.raw_connection()
+        try:
+            cursor = raw_conn.cursor()
+            if not self.use_staging:
+                cursor.execute(f"CREATE TEMP TABLE ball_by_ball_load ({BALL_BY_BALL_STAGING_DDL}) ON COMMIT DROP")
+            
+            cursor.copy_expert(f"COPY {staging} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+            
+            # Single set-based merge; the delivery key makes re-running the load idempotent
+            cursor.execute(f"""
+                INSERT INTO ball_by_ball ({columns})
+                SELECT {columns} FROM {staging}
+                ON CONFLICT ({key}) DO NOTHING
+            """)
+            inserted = cursor.rowcount
+            
+            if self.use_staging:
+                cursor.execute("TRUNCATE ball_by_ball_staging")
+            
+            raw_conn.commit()
+            cursor.close()
+            return inserted
+        except Exception:
+            raw_conn.rollback()
+            raise
+        finally:
+            raw_conn.close()
+    
+    def ensure_delivery_key(self, conn):
+        """Add delivery_seq and the natural-key unique index to ball_by_ball if missing"""
+        if conn.execute(text(f"SELECT to_regclass('{DELIVERY_UNIQUE_INDEX}')")).scalar() is not None:
+            return
+        
+        logger.info("Adding delivery natural key to ball_by_ball (one-time migration)...")
+        conn.execute(text("ALTER TABLE ball_by_ball ADD COLUMN IF NOT EXISTS delivery_seq SMALLINT NOT NULL DEFAULT 0"))
+        # Existing rows are numbered in load order, matching the CSV order used by the loaders
+        conn.execute(text("""
+            UPDATE ball_by_ball bb
+            SET delivery_seq = numbered.seq
+            FROM (
+                SELECT ball_id,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY match_id, innings, over_number, ball_number ORDER BY ball_id
+                       ) - 1 AS seq
+                FROM ball_by_ball
+            ) numbered
+            WHERE bb.ball_id = numbered.ball_id AND bb.delivery_seq <> numbered.seq
+        """))
+        conn.execute(text(f"""
+            CREATE UNIQUE INDEX IF NOT EXISTS {DELIVERY_UNIQUE_INDEX}
+            ON ball_by_ball(match_id, innings, over_number, ball_number, delivery_seq)
+        """))
+    
+    def prepare_bulk_load(self):
+        """Create the staging table and disable per-row triggers if requested"""
+        self.manifest.ensure_table()
+        with self.engine.connect() as conn:
+            self.ensure_delivery_key(conn)
+            
+            if self.use_staging:
+                conn.execute(text(f"CREATE UNLOGGED TABLE IF NOT EXISTS ball_by_ball_staging ({BALL_BY_BALL_STAGING_DDL})"))
+                conn.execute(text("ALTER TABLE ball_by_ball_staging ADD COLUMN IF NOT EXISTS delivery_seq SMALLINT"))
+                conn.execute(text("TRUNCATE ball_by_ball_staging"))
+            
+            if self.disable_triggers:
+                logger.info(f"Disabling {BALL_BY_BALL_TRIGGER} for bulk load")
+                conn.execute(text(f"ALTER TABLE ball_by_ball DISABLE TRIGGER {BALL_BY_BALL_TRIGGER}"))
+            
+            conn.commit()
+    
+    def finish_bulk_load(self):
+        """Re-enable per-row triggers and report load throughput"""
+        if self.disable_triggers:
+            with self.engine.connect() as conn:
+                conn.execute(text(f"ALTER TABLE ball_by_ball ENABLE TRIGGER {BALL_BY_BALL_TRIGGER}"))
+                conn.commit()
+            logger.info(f"Re-enabled {BALL_BY_BALL_TRIGGER}")
+        
+        if self.rows_loaded > 0 and self.load_seconds > 0:
+            logger.info(f"⏱️ Loaded {self.rows_loaded:,} rows in {self.load_seconds:.1f}s "
+                        f"({self.rows_loaded / self.load_seconds:,.0f} rows/sec, method={self.load_method})")
+    
+    def read_csv_chunks(self, columns):
+        """Stream selected columns in bounded chunks, from the Parquet cache when available"""
+        if self.cache.ensure(chunk_size=self.chunk_size):
+            return self.cache.iter_chunks(columns, self.chunk_size)
+        
+        dtypes = {col: CSV_DTYPES[col] for col in columns if col in CSV_DTYPES}
+        return pd.read_csv(self.csv_file, usecols=columns, dtype=dtypes, chunksize=self.chunk_size)
+    
+    def scan_csv_matches(self):
+        """Pre-pass over the CSV: find incomplete matches and checksum every match"""
+        pairs = []
+        checksums = []
+        for chunk in self.read_csv_chunks(BALL_BY_BALL_CSV_COLUMNS):
+            pairs.append(chunk[['match_id', 'team']].dropna().astype({'team': 'str'}).drop_duplicates())
+            checksums.append(compute_match_checksums(chunk, BALL_BY_BALL_CSV_COLUMNS))
+        
+        match_teams = pd.concat(pairs, ignore_index=True).drop_duplicates()
+        team_counts = match_teams.groupby('match_id')['team'].nunique()
+        return set(team_counts[team_counts < 2].index), combine_match_checksums(checksums)
+    
+    def select_pending_matches(self, checksums):
+        """Keep matches that are new or changed, clearing stored deliveries of changed ones"""
+        if self.force_reload:
+            logger.info("Force reload: processing every match")
+            pending, changed_match_ids = checksums, []
+        else:
+            pending, _, changed_match_ids = self.manifest.pending(checksums)
+        
+        if changed_match_ids:
+            # Changed matches are reloaded from scratch; the delete also marks them dirty for stats
+            with self.engine.connect() as conn:
+                deleted = conn.execute(text("DELETE FROM ball_by_ball WHERE match_id = ANY(:match_ids)"),
+                                       {"match_ids": changed_match_ids})
+                conn.commit()
+            logger.info(f"Cleared {deleted.rowcount} deliveries from {len(changed_match_ids)} changed matches")
+        
+        self.loaded_match_ids = [int(m) for m in pending.index]
+        return pending
+    
+    def prepare_ball_by_ball_chunk(self, chunk, teams_map, players_map):
+        """Map names to ids and shape a CSV chunk into ball_by_ball rows"""
+        prepared = pd.DataFrame({
+            'match_id': chunk['match_id'],
+            'innings': chunk['innings'],
+            'team_id': map_categorical(chunk['team'], teams_map),
+            'over_number': chunk['over'],
+            'ball_number': chunk['ball'],
+            'batsman_id': map_categorical(chunk['batsman'], players_map),
+            'non_striker_id': map_categorical(chunk['non_striker'], players_map),
+            'bowler_id': map_categorical(chunk['bowler'], players_map),
+            'batsman_runs': chunk['batsman_runs'],
+            'extras': chunk['extras'],
+            'total_runs': chunk['total_runs'],
+            'wides': chunk['wides'],
+            'noballs': chunk['noballs'],
+            'byes': chunk['byes'],
+            'legbyes': chunk['legbyes'],
+            'is_wicket': chunk['wicket'].notna(),
+            'player_out_id': map_categorical(chunk['player_out'], players_map),
+            'dismissal_kind': chunk['kind'].astype('object'),
+            'fielders': chunk['fielders'].astype('object'),
+        })
+        prepared, self.delivery_carry = assign_delivery_seq(prepared, self.delivery_carry)
+        return prepared.dropna(subset=['match_id', 'team_id', 'batsman_id', 'bowler_id'])
+    
+    def complete_ball_by_ball_data_streaming(self):
+        """Stream ball-by-ball data from CSV in chunks so memory stays flat"""
+        logger.info(f"⚾ Streaming ball-by-ball data loading (chunk size {self.chunk_size:,})...")
+        
+        try:
+            incomplete_matches, checksums = self.scan_csv_matches()
+            logger.info(f"Found {len(incomplete_matches)} incomplete matches to skip: {sorted(incomplete_matches)}")
+            
+            existing_matches = pd.read_sql("SELECT match_id FROM matches", self.engine)
+            valid_matches = set(existing_matches['match_id'].tolist()) - incomplete_matches
+            logger.info(f"Valid matches for ball-by-ball loading: {len(valid_matches)}")
+            
+            # Only stream matches that are new or changed since the last load
+            pending = self.select_pending_matches(checksums[checksums.index.isin(valid_matches)])
+            valid_matches = set(pending.index)
+            if not valid_matches:
+                logger.info("✅ Ball-by-ball data already complete")
+                return
+            
+            teams_map = self.get_teams_mapping()
+            players_map = self.get_players_mapping()
+            
+            rows_read = 0
+            rows_loaded = 0
+            self.delivery_carry = None
+            for chunk_number, chunk in enumerate(self.read_csv_chunks(BALL_BY_BALL_CSV_COLUMNS), start=1):
+                rows_read += len(chunk)
+                chunk = chunk[chunk['match_id'].isin(valid_matches)]
+                if chunk.empty:
+                    continue
+                
+                prepared = self.prepare_ball_by_ball_chunk(chunk, teams_map, players_map)
+                
+                if len(prepared) > 0:
+                    rows_loaded += self.insert_ball_by_ball(prepared[BALL_BY_BALL_COLUMNS])
+                
+                logger.info(f"Chunk {chunk_number}: read {rows_read:,} rows, loaded {rows_loaded:,} new records")
+            
+            self.manifest.record(pending)
+            logger.info(f"✅ Streaming load complete: {rows_loaded:,} new ball-by-ball records from {rows_read:,} CSV rows")
+            
+        except Exception as e:
+            logger.error(f"❌ Error streaming ball-by-ball data: {e}")
+            raise
+    
+    def plan_partitions(self, pending):
+        """Group pending matches into load partitions: one per season, or match_id ranges without the cache"""
+        if self.cache.ensure(chunk_size=self.chunk_size):
+            seasons = self.cache.read(['match_id', 'season']).drop_duplicates('match_id')
+            seasons = seasons.set_index('match_id')['season'].astype('int64')
+            plan = pending[['row_count']].join(seasons, how='inner')
+            partitions = [
+                {'label': f"season {season}", 'match_ids': [int(m) for m in group.index],
+                 'seasons': [int(season)], 'rows': int(group['row_count'].sum())}
+                for season, group in plan.groupby('season')
+            ]
+        else:
+            # Every worker parses the CSV itself, so keep one partition per worker
+            ranges = np.array_split(np.sort(pending.index.to_numpy()), self.workers)
+            partitions = [
+                {'label': f"matches {ids[0]}-{ids[-1]}", 'match_ids': [int(m) for m in ids],
+                 'seasons': None, 'rows': int(pending.loc[ids, 'row_count'].sum())}
+                for ids in ranges if len(ids) > 0
+            ]
+        
+        # Largest partitions first so the pool finishes evenly
+        return sorted(partitions, key=lambda partition: partition['rows'], reverse=True)
+    
+    def load_partition(self, label, match_ids, seasons, teams_map, players_map):
+        """Parse, map and load the deliveries of one partition (runs inside a worker process)"""
+        started = time.perf_counter()
+        match_ids = set(match_ids)
+        
+        if seasons is not None and self.cache.ensure(chunk_size=self.chunk_size):
+            chunks = self.cache.iter_chunks(BALL_BY_BALL_CSV_COLUMNS, self.chunk_size, seasons=seasons)
+        else:
+            chunks = self.read_csv_chunks(BALL_BY_BALL_CSV_COLUMNS)
+        
+        rows_loaded = 0
+        self.delivery_carry = None
+        for chunk in chunks:
+            chunk = chunk[chunk['match_id'].isin(match_ids)]
+            if chunk.empty:
+                continue
+            
+            prepared = self.prepare_ball_by_ball_chunk(chunk, teams_map, players_map)
+            if len(prepared) > 0:
+                rows_loaded += self.insert_ball_by_ball(prepared[BALL_BY_BALL_COLUMNS])
+        
+        return {'label': label, 'match_ids': sorted(match_ids), 'rows_processed': self.rows_loaded,
+                'rows_loaded': rows_loaded, 'seconds': time.perf_counter() - started}
+    
+    def complete_ball_by_ball_data_parallel(self):
+        """Load ball-by-ball data with a process pool, one partition per season"""
+        self.chunk_size = self.chunk_size or PARALLEL_CHUNK_SIZE
+        logger.info(f"⚾ Parallel ball-by-ball loading with {self.workers} workers...")
+        
+        try:
+            incomplete_matches, checksums = self.scan_csv_matches()
+            logger.info(f"Found {len(incomplete_matches)} incomplete matches to skip: {sorted(incomplete_matches)}")
+            
+            existing_matches = pd.read_sql("SELECT match_id FROM matches", self.engine)
+            valid_matches = set(existing_matches['match_id'].tolist()) - incomplete_matches
+            pending = self.select_pending_matches(checksums[checksums.index.isin(valid_matches)])
+            if pending.empty:
+                logger.info("✅ Ball-by-ball data already complete")
+                return
+            
+            # Global steps stay in the coordinator: id mappings are resolved once and shipped to workers
+            teams_map = self.get_teams_mapping()
+            players_map = self.get_players_mapping()
+            partitions = self.plan_partitions(pending)
+            logger.info(f"Planned {len(partitions)} partitions for {len(pending)} matches")
+            
+            # Workers merge through private temp tables; a shared staging table would serialize them
+            options = {'chunk_size': self.chunk_size, 'load_method': self.load_method, 'use_staging': False}
+            
+            started = time.perf_counter()
+            failed = []
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=reset_engine_after_fork) as pool:
+                futures = {
+                    pool.submit(load_partition_worker, options, {
+                        'label': partition['label'], 'match_ids': partition['match_ids'],
+                        'seasons': partition['seasons'], 'teams_map': teams_map, 'players_map': players_map,
+                    }): partition
+                    for partition in partitions
+                }
+                for future in as_completed(futures):
+                    partition = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f"❌ Partition {partition['label']} failed: {e}")
+                        failed.append(partition['label'])
+                        continue
+                    
+                    self.rows_loaded += result['rows_processed']
+                    self.manifest.record(pending.loc[result['match_ids']])
+                    logger.info(f"Partition {result['label']}: loaded {result['rows_loaded']:,} new records "
+                                f"in {result['seconds']:.1f}s")
+            
+            # Throughput is measured on wall-clock time across all workers
+            self.load_seconds = time.perf_counter() - started
+            if failed:
+                raise RuntimeError(f"{len(failed)} partitions failed to load: {', '.join(failed)}")
+            
+            logger.info(f"✅ Parallel load complete: {self.rows_loaded:,} rows in {self.load_seconds:.1f}s")
+            
+        except Exception as e:
+            logger.error(f"❌ Error loading ball-by-ball data in parallel: {e}")
+            raise
+    
+    def refresh_innings_summary(self, match_ids=None):
+        """Rebuild innings_summary rows for match_ids (all matches when None) in one set-based pass.
+        
+        Matches that have deliveries but no summary yet are always included, which backfills
+        the table after it is first created.
+        """
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text(INNINGS_SUMMARY_DDL))
+                
+                if match_ids is not None:
+                    missing = conn.execute(text("""
+                        SELECT m.match_id FROM matches m
+                        WHERE EXISTS (SELECT 1 FROM ball_by_ball bb WHERE bb.match_id = m.match_id)
+                        AND NOT EXISTS (SELECT 1 FROM innings_summary s WHERE s.match_id = m.match_id)
+                    """)).scalars().all()
+                    match_ids = sorted(set(match_ids) | set(missing))
+                    if not match_ids:
+                        conn.commit()
+                        return
+                
+                scope = f"{len(match_ids)} matches" if match_ids is not None else "all matches"
+                logger.info(f"📋 Refreshing innings summary for {scope}...")
+                
+                select = INNINGS_SUMMARY_SELECT.format(
+                    match_filter="AND bb.match_id = ANY(:match_ids)" if match_ids is not None else "",
+                    powerplay_overs=POWERPLAY_OVERS,
+                    death_overs_from=DEATH_OVERS_FROM
+                )
+                delete_filter = "WHERE match_id = ANY(:match_ids)" if match_ids is not None else ""
+                
+                conn.execute(text(f"DELETE FROM innings_summary {delete_filter}"), {"match_ids": match_ids})
+                inserted = conn.execute(text(f"""
+                    INSERT INTO innings_summary ({INNINGS_SUMMARY_COLUMNS})
+                    {select}
+                """), {"match_ids": match_ids})
+                conn.commit()
+            
+            logger.info(f"✅ Stored {inserted.rowcount} innings summaries")
+            
+        except Exception as e:
+            logger.error(f"❌ Error refreshing innings summary: {e}")
+            raise
+    
+    def add_match_winner_column(self, match_ids=None):
+        """Derive winner, margin and result type for matches that have no stored result.
+        
+        match_ids are recomputed as well (their deliveries just changed); None recomputes
+        every match.
+        """
         logger.info("🏆 Adding match winner information...")
         
         try:
@@ -179,63 +853,38 @@ class IPLDatabaseFinalFix:
                     ALTER TABLE matches 
                     ADD COLUMN IF NOT EXISTS winner_team_id INTEGER REFERENCES teams(team_id),
                     ADD COLUMN IF NOT EXISTS winning_margin INTEGER,
-                    ADD COLUMN IF NOT EXISTS win_type VARCHAR(20)
+                    ADD COLUMN IF NOT EXISTS win_type VARCHAR(20),
+                    ADD COLUMN IF NOT EXISTS result_computed_at TIMESTAMP
                 """))
                 conn.commit()
             
-            # Calculate match winners
-            winner_query = """
-            WITH innings_totals AS (
-                SELECT 
-                    bb.match_id,
-                    bb.innings,
-                    bb.team_id,
-                    SUM(bb.total_runs) as total_runs
-                FROM ball_by_ball bb
-                GROUP BY bb.match_id, bb.innings, bb.team_id
-            ),
-            match_scores AS (
-                SELECT 
-                    m.match_id,
-                    m.team1_id,
-                    m.team2_id,
-                    COALESCE(MAX(CASE WHEN it.team_id = m.team1_id THEN it.total_runs END), 0) as team1_score,
-                    COALESCE(MAX(CASE WHEN it.team_id = m.team2_id THEN it.total_runs END), 0) as team2_score
-                FROM matches m
-                LEFT JOIN innings_totals it ON m.match_id = it.match_id
-                GROUP BY m.match_id, m.team1_id, m.team2_id
-            )
-            UPDATE matches 
-            SET 
-                winner_team_id = CASE 
-                    WHEN ms.team1_score > ms.team2_score THEN ms.team1_id
-                    WHEN ms.team2_score > ms.team1_score THEN ms.team2_id
-                    ELSE NULL
-                END,
-                winning_margin = CASE 
-                    WHEN ms.team1_score > ms.team2_score THEN ms.team1_score - ms.team2_score
-                    WHEN ms.team2_score > ms.team1_score THEN ms.team2_score - ms.team1_score
-                    ELSE NULL
-                END,
-                win_type = 'runs'
-            FROM match_scores ms
-            WHERE matches.match_id = ms.match_id
-            AND (ms.team1_score > 0 OR ms.team2_score > 0)
-            """
+            if match_ids is None:
+                match_filter = ""
+            else:
+                match_filter = "WHERE m.result_computed_at IS NULL OR m.match_id = ANY(:match_ids)"
             
             with self.engine.connect() as conn:
-                conn.execute(text(winner_query))
+                updated = conn.execute(text(MATCH_RESULT_UPDATE.format(
+                    match_filter=match_filter,
+                    team_wickets=TEAM_WICKETS
+                )), {"match_ids": match_ids})
                 conn.commit()
             
             # Check results
             winner_stats = pd.read_sql("""
                 SELECT 
                     COUNT(*) as total_matches,
-                    COUNT(winner_team_id) as matches_with_winners
+                    COUNT(winner_team_id) as matches_with_winners,
+                    COUNT(*) FILTER (WHERE win_type = 'runs') as won_by_runs,
+                    COUNT(*) FILTER (WHERE win_type = 'wickets') as won_by_wickets,
+                    COUNT(*) FILTER (WHERE win_type IN ('tie', 'super over')) as ties
                 FROM matches
-            """, self.engine)
+            """, self.engine).iloc[0]
             
-            logger.info(f"✅ Match winners calculated: {winner_stats['matches_with_winners'].iloc[0]}/{winner_stats['total_matches'].iloc[0]} matches")
+            logger.info(f"✅ Match results computed for {updated.rowcount} matches: "
+                        f"{winner_stats['matches_with_winners']}/{winner_stats['total_matches']} matches have winners "
+                        f"({winner_stats['won_by_runs']} by runs, {winner_stats['won_by_wickets']} by wickets, "
+                        f"{winner_stats['ties']} tied)")
             
         except Exception as e:
             logger.error(f"❌ Error adding match winners: {e}")
@@ -246,115 +895,21 @@ class IPLDatabaseFinalFix:
         logger.info("📊 Fixing player match statistics...")
         
         try:
-            # Clear existing stats
+            # Clear existing stats; a full rebuild also covers any pending dirty matches
             with self.engine.connect() as conn:
+                self.ensure_stats_match_date(conn)
                 conn.execute(text("DELETE FROM player_match_stats"))
+                if self.has_dirty_match_tracking(conn):
+                    conn.execute(text("DELETE FROM stats_dirty_matches"))
                 conn.commit()
             
-            logger.info("Calculating batting statistics...")
-            
-            # Batting statistics
-            batting_stats_query = """
-            INSERT INTO player_match_stats (
-                match_id, player_id, team_id, runs_scored, balls_faced, 
-                fours, sixes, strike_rate, is_not_out
-            )
-            SELECT 
-                bb.match_id,
-                bb.batsman_id as player_id,
-                bb.team_id,
-                SUM(bb.batsman_runs) as runs_scored,
-                COUNT(*) as balls_faced,
-                COUNT(CASE WHEN bb.batsman_runs = 4 THEN 1 END) as fours,
-                COUNT(CASE WHEN bb.batsman_runs = 6 THEN 1 END) as sixes,
-                CASE 
-                    WHEN COUNT(*) > 0 THEN ROUND((SUM(bb.batsman_runs) * 100.0 / COUNT(*))::numeric, 2)
-                    ELSE 0 
-                END as strike_rate,
-                CASE 
-                    WHEN COUNT(CASE WHEN bb.is_wicket = true AND bb.player_out_id = bb.batsman_id THEN 1 END) = 0 
-                    THEN true 
-                    ELSE false 
-                END as is_not_out
-            FROM ball_by_ball bb
-            WHERE bb.batsman_id IS NOT NULL
-            GROUP BY bb.match_id, bb.batsman_id, bb.team_id
-            """
-            
-            with self.engine.connect() as conn:
-                conn.execute(text(batting_stats_query))
-                conn.commit()
-            
-            logger.info("Updating bowling statistics...")
-            
-            # Bowling statistics
-            bowling_stats_query = """
-            UPDATE player_match_stats 
-            SET 
-                overs_bowled = bowling_stats.overs_bowled,
-                runs_conceded = bowling_stats.runs_conceded,
-                wickets_taken = bowling_stats.wickets_taken,
-                economy_rate = bowling_stats.economy_rate
-            FROM (
-                SELECT 
-                    bb.match_id,
-                    bb.bowler_id as player_id,
-                    ROUND((COUNT(*) / 6.0)::numeric, 1) as overs_bowled,
-                    SUM(bb.total_runs) as runs_conceded,
-                    COUNT(CASE WHEN bb.is_wicket = true AND bb.player_out_id IS NOT NULL THEN 1 END) as wickets_taken,
-                    CASE 
-                        WHEN COUNT(*) > 0 THEN ROUND((SUM(bb.total_runs) * 6.0 / COUNT(*))::numeric, 2)
-                        ELSE 0 
-                    END as economy_rate
-                FROM ball_by_ball bb
-                WHERE bb.bowler_id IS NOT NULL
-                GROUP BY bb.match_id, bb.bowler_id
-            ) bowling_stats
-            WHERE player_match_stats.match_id = bowling_stats.match_id
-            AND player_match_stats.player_id = bowling_stats.player_id
-            """
+            logger.info("Calculating batting, bowling and fielding statistics in one pass...")
             
             with self.engine.connect() as conn:
-                conn.execute(text(bowling_stats_query))
-                conn.commit()
-            
-            logger.info("Inserting bowling-only records...")
-            
-            # Bowling-only records
-            bowling_only_query = """
-            INSERT INTO player_match_stats (
-                match_id, player_id, team_id, runs_scored, balls_faced, 
-                fours, sixes, strike_rate, is_not_out,
-                overs_bowled, runs_conceded, wickets_taken, economy_rate
-            )
-            SELECT 
-                bb.match_id,
-                bb.bowler_id as player_id,
-                bb.team_id,
-                0 as runs_scored,
-                0 as balls_faced,
-                0 as fours,
-                0 as sixes,
-                0 as strike_rate,
-                false as is_not_out,
-                ROUND((COUNT(*) / 6.0)::numeric, 1) as overs_bowled,
-                SUM(bb.total_runs) as runs_conceded,
-                COUNT(CASE WHEN bb.is_wicket = true AND bb.player_out_id IS NOT NULL THEN 1 END) as wickets_taken,
-                CASE 
-                    WHEN COUNT(*) > 0 THEN ROUND((SUM(bb.total_runs) * 6.0 / COUNT(*))::numeric, 2)
-                    ELSE 0 
-                END as economy_rate
-            FROM ball_by_ball bb
-            WHERE bb.bowler_id IS NOT NULL
-            AND NOT EXISTS (
-                SELECT 1 FROM player_match_stats pms 
-                WHERE pms.match_id = bb.match_id AND pms.player_id = bb.bowler_id
-            )
-            GROUP BY bb.match_id, bb.bowler_id, bb.team_id
-            """
-            
-            with self.engine.connect() as conn:
-                conn.execute(text(bowling_only_query))
+                conn.execute(text(f"""
+                    INSERT INTO player_match_stats ({PLAYER_MATCH_STATS_COLUMNS})
+                    {PLAYER_MATCH_STATS_SELECT.format(match_filter='')}
+                """))
                 conn.commit()
             
             # Check results
@@ -362,7 +917,8 @@ class IPLDatabaseFinalFix:
                 SELECT 
                     COUNT(*) as total_records,
                     COUNT(CASE WHEN overs_bowled > 0 THEN 1 END) as bowling_records,
-                    COUNT(CASE WHEN runs_scored > 0 THEN 1 END) as batting_records
+                    COUNT(CASE WHEN runs_scored > 0 THEN 1 END) as batting_records,
+                    COUNT(CASE WHEN catches + stumpings + run_outs > 0 THEN 1 END) as fielding_records
                 FROM player_match_stats
             """, self.engine)
             
@@ -370,20 +926,104 @@ class IPLDatabaseFinalFix:
             logger.info(f"   Total records: {stats_check['total_records'].iloc[0]}")
             logger.info(f"   Bowling records: {stats_check['bowling_records'].iloc[0]}")
             logger.info(f"   Batting records: {stats_check['batting_records'].iloc[0]}")
+            logger.info(f"   Fielding records: {stats_check['fielding_records'].iloc[0]}")
             
         except Exception as e:
             logger.error(f"❌ Error fixing player match stats: {e}")
             raise
     
+    def ensure_stats_match_date(self, conn):
+        """Add and backfill player_match_stats.match_date (read by the batch form functions) on older schemas"""
+        conn.execute(text("ALTER TABLE player_match_stats ADD COLUMN IF NOT EXISTS match_date DATE"))
+        backfilled = conn.execute(text("""
+            UPDATE player_match_stats pms
+            SET match_date = m.match_date
+            FROM matches m
+            WHERE m.match_id = pms.match_id
+            AND pms.match_date IS NULL
+        """))
+        if backfilled.rowcount:
+            logger.info(f"📅 Backfilled match_date on {backfilled.rowcount} player match stats rows")
+    
+    def has_dirty_match_tracking(self, conn):
+        """Check whether schema.sql's stats_dirty_matches table is installed"""
+        return conn.execute(text("SELECT to_regclass('stats_dirty_matches')")).scalar() is not None
+    
+    def refresh_player_match_stats_incremental(self):
+        """Recompute player match statistics only for matches marked dirty since the last refresh"""
+        logger.info("📊 Incrementally refreshing player match statistics...")
+        
+        try:
+            with self.engine.connect() as conn:
+                if not self.has_dirty_match_tracking(conn):
+                    logger.info("⚠️ stats_dirty_matches not found (apply schema.sql) - falling back to full rebuild")
+                    conn.rollback()
+                    self.fix_player_match_stats()
+                    return
+                
+                self.ensure_stats_match_date(conn)
+                
+                # Claim dirty matches; a failed refresh rolls back and leaves them queued
+                dirty_match_ids = conn.execute(text("""
+                    DELETE FROM stats_dirty_matches RETURNING match_id
+                """)).scalars().all()
+                
+                if not dirty_match_ids:
+                    conn.commit()
+                    logger.info("✅ No dirty matches - player match statistics are up to date")
+                    return
+                
+                logger.info(f"Refreshing statistics for {len(dirty_match_ids)} dirty matches...")
+                params = {"match_ids": dirty_match_ids}
+                
+                # Rows are rebuilt from scratch so players no longer in a reloaded match's deliveries drop out
+                removed = conn.execute(text("""
+                    DELETE FROM player_match_stats WHERE match_id = ANY(:match_ids)
+                """), params)
+                
+                refreshed = conn.execute(text(f"""
+                    INSERT INTO player_match_stats ({PLAYER_MATCH_STATS_COLUMNS})
+                    {PLAYER_MATCH_STATS_SELECT.format(match_filter='AND bb.match_id = ANY(:match_ids)')}
+                    ON CONFLICT (match_id, player_id) DO UPDATE SET
+                        team_id = EXCLUDED.team_id,
+                        match_date = EXCLUDED.match_date,
+                        runs_scored = EXCLUDED.runs_scored,
+                        balls_faced = EXCLUDED.balls_faced,
+                        fours = EXCLUDED.fours,
+                        sixes = EXCLUDED.sixes,
+                        strike_rate = EXCLUDED.strike_rate,
+                        is_not_out = EXCLUDED.is_not_out,
+                        overs_bowled = EXCLUDED.overs_bowled,
+                        runs_conceded = EXCLUDED.runs_conceded,
+                        wickets_taken = EXCLUDED.wickets_taken,
+                        economy_rate = EXCLUDED.economy_rate,
+                        catches = EXCLUDED.catches,
+                        stumpings = EXCLUDED.stumpings,
+                        run_outs = EXCLUDED.run_outs
+                """), params)
+                
+                conn.commit()
+            
+            logger.info(f"✅ Refreshed {len(dirty_match_ids)} matches: {removed.rowcount} player rows replaced "
+                        f"by {refreshed.rowcount}")
+            
+        except Exception as e:
+            logger.error(f"❌ Error refreshing player match stats: {e}")
+            raise
+    
+    def get_name_indexes(self):
+        """Persisted name index, rebuilt only when the players/teams/venues tables changed"""
+        if self.name_indexes is None:
+            self.name_indexes = NameIndexes.load_or_build(self.engine)
+        return self.name_indexes
+    
     def get_teams_mapping(self):
-        """Get team name to ID mapping"""
-        teams_df = pd.read_sql("SELECT team_id, team_name FROM teams", self.engine)
-        return dict(zip(teams_df['team_name'], teams_df['team_id']))
+        """Get the team name to ID index"""
+        return self.get_name_indexes().teams
     
     def get_players_mapping(self):
-        """Get player name to ID mapping"""
-        players_df = pd.read_sql("SELECT player_id, player_name FROM players", self.engine)
-        return dict(zip(players_df['player_name'], players_df['player_id']))
+        """Get the player name to ID index"""
+        return self.get_name_indexes().players
     
     def run_final_fix(self):
         """Run final comprehensive fix"""
@@ -391,13 +1031,46 @@ class IPLDatabaseFinalFix:
         
         try:
             # Complete ball-by-ball data (skipping incomplete matches)
-            self.complete_ball_by_ball_data_final()
+            self.prepare_bulk_load()
+            try:
+                if self.workers > 1:
+                    self.complete_ball_by_ball_data_parallel()
+                elif self.chunk_size:
+                    self.complete_ball_by_ball_data_streaming()
+                else:
+                    self.complete_ball_by_ball_data_final()
+            finally:
+                self.finish_bulk_load()
             
-            # Add match winners
-            self.add_match_winner_column()
+            if self.loaded_match_ids == []:
+                logger.info("No new or changed matches - winners and statistics are already current")
+                self.refresh_innings_summary([])
+                self.add_match_winner_column(None if self.recompute_winners else [])
+                # Only fills in feature and points rows that are missing, e.g. after the tables were added
+                refresh_player_form_features(self.engine, [])
+                refresh_player_match_points(self.engine, [])
+            else:
+                # Innings totals feed the winner step, venue stats and head-to-head
+                self.refresh_innings_summary(self.loaded_match_ids)
+                
+                # Add match winners
+                self.add_match_winner_column(None if self.recompute_winners else self.loaded_match_ids)
+                
+                # Fix player match statistics (also rebuilds aggregates skipped by disabled triggers)
+                if self.incremental:
+                    self.refresh_player_match_stats_incremental()
+                else:
+                    self.fix_player_match_stats()
+                
+                # Form features read player_match_stats; a full stats rebuild can touch every match
+                refresh_player_form_features(self.engine, self.loaded_match_ids, full=not self.incremental)
+                # Points come straight from ball_by_ball, so only the loaded matches are rescored
+                refresh_player_match_points(self.engine, self.loaded_match_ids)
             
-            # Fix player match statistics
-            self.fix_player_match_stats()
+            # Recent form depends on the current date, so views are refreshed even without new matches
+            refresh_materialized_views(self.engine)
+            # Everything above is committed; tell API caches that historical stats may have changed
+            bump_data_generation(self.engine, 'final_fix')
             
             logger.info("🎉 FINAL comprehensive database fix completed successfully!")
             
@@ -405,18 +1078,52 @@ class IPLDatabaseFinalFix:
             logger.error(f"💥 Final database fix failed: {e}")
             raise
         finally:
-            if self.engine:
-                self.engine.dispose()
+            peak = peak_rss_mb()
+            if peak is not None:
+                logger.info(f"📈 Peak RSS: {peak:.1f} MB")
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Final comprehensive fix for the IPL database")
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help="Stream the CSV in chunks of this many rows instead of loading it whole")
+    parser.add_argument('--load-method', choices=['copy', 'insert'], default='copy',
+                        help="Load ball_by_ball with COPY FROM STDIN (default) or batched INSERTs")
+    parser.add_argument('--staging', action='store_true',
+                        help="COPY into an unlogged staging table and merge with one INSERT ... SELECT")
+    parser.add_argument('--disable-triggers', action='store_true',
+                        help="Disable the per-row player_match_stats trigger during the bulk load")
+    parser.add_argument('--force-reload', action='store_true',
+                        help="Process every match even if its checksum matches the load manifest")
+    parser.add_argument('--recompute-winners', action='store_true',
+                        help="Recompute every match result instead of only new or changed matches")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Load partitions (one per season) in this many worker processes")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Refresh player_match_stats only for matches loaded since the last refresh")
+    return parser.parse_args()
 
 def main():
     """Main function"""
+    args = parse_args()
     try:
-        fixer = IPLDatabaseFinalFix()
+        fixer = IPLDatabaseFinalFix(
+            chunk_size=args.chunk_size,
+            load_method=args.load_method,
+            use_staging=args.staging,
+            disable_triggers=args.disable_triggers,
+            incremental=args.incremental,
+            force_reload=args.force_reload,
+            workers=args.workers,
+            recompute_winners=args.recompute_winners
+        )
         fixer.run_final_fix()
         return 0
     except Exception as e:
         logger.error(f"Application failed: {e}")
         return 1
+    finally:
+        dispose_engine()
 
 if __name__ == "__main__":
     exit(main()) 
\ No newline at end of file
@@ -2,42 +2,89 @@
 
 import pandas as pd
 import numpy as np
-from sqlalchemy import create_engine, text
-import urllib.parse
-import os
-from dotenv import load_dotenv
+from sqlalchemy import text
+import time
+from contextlib import contextmanager
+from psycopg2.extras import execute_values
 import logging
 
+from db_engine import get_engine, dispose_engine
+from ball_by_ball_cache import BallByBallCache
+from materialized_views import refresh_materialized_views
+from data_generation import bump_data_generation
+from load_manifest import MatchLoadManifest, compute_match_checksums
+from name_index import NameIndexes
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+APPEARANCE_COLUMNS = ['team', 'team1', 'team2', 'batsman', 'non_striker', 'bowler']
+
+HISTORY_COLUMNS = APPEARANCE_COLUMNS + ['match_id', 'date']
+
+def melt_player_appearances(df, extra_columns=()):
+    """Stack batsman, non-striker and bowler appearances into (player, team, ...) rows"""
+    # Bowlers belong to the side that is not batting in that delivery
+    bowling_team = df['team2'].where(df['team'] == df['team1'], df['team1'])
+    extras = {col: df[col] for col in extra_columns}
+    
+    return pd.concat([
+        pd.DataFrame({'player': df['batsman'], 'team': df['team'], **extras}),
+        pd.DataFrame({'player': df['non_striker'], 'team': df['team'], **extras}),
+        pd.DataFrame({'player': df['bowler'], 'team': bowling_team, **extras}),
+    ], ignore_index=True).dropna(subset=['player', 'team'])
+
+def count_player_team_appearances(df):
+    """Count deliveries per (player, team) across batsman, non-striker and bowler roles"""
+    appearances = melt_player_appearances(df)
+    return appearances.groupby(['player', 'team']).size().reset_index(name='appearances')
+
+def build_player_team_history(df):
+    """Aggregate appearances per (player, season, team) with match counts and date range"""
+    df = df.assign(date=pd.to_datetime(df['date']))
+    df = df.assign(season=df['date'].dt.year)
+    appearances = melt_player_appearances(df, ['match_id', 'date', 'season'])
+    
+    return appearances.groupby(['player', 'season', 'team']).agg(
+        matches_played=('match_id', 'nunique'),
+        deliveries=('match_id', 'size'),
+        first_match_date=('date', 'min'),
+        last_match_date=('date', 'max'),
+    ).reset_index()
+
+def resolve_player_teams(df):
+    """Resolve each player to the team they appeared for most often.
+    
+    Returns (resolved_assignments, conflicted_players) where resolved_assignments maps
+    player name -> team name and conflicted_players lists players seen with several teams.
+    """
+    counts = count_player_team_appearances(df)
+    
+    dominant = counts.loc[counts.groupby('player')['appearances'].idxmax()]
+    resolved_assignments = dict(zip(dominant['player'], dominant['team']))
+    
+    teams_per_player = counts.groupby('player').size()
+    conflicted_players = teams_per_player[teams_per_player > 1].index.tolist()
+    
+    return resolved_assignments, conflicted_players
+
 class PlayerTeamFixer:
     """Fix missing team assignments for players in the database"""
     
     def __init__(self):
         self.engine = None
         self.csv_file = "../data/ipl_ball_by_ball.csv"
+        self.deliveries = None
+        self.cache = BallByBallCache(self.csv_file)
+        self.phase_times = {}
         self.connect_database()
+        self.manifest = MatchLoadManifest(self.engine, 'player_teams')
         
     def connect_database(self):
-        """Connect to database"""
+        """Connect to database through the shared pooled engine"""
         try:
-            load_dotenv()
-            
-            db_user = os.getenv('DB_USER', 'postgres')
-            db_password = os.getenv('DB_PASSWORD')
-            db_host = os.getenv('DB_HOST', 'localhost')
-            db_port = os.getenv('DB_PORT', '5432')
-            db_name = os.getenv('DB_NAME', 'ipl_fantasy_db')
-            
-            if not db_password:
-                # Try common default passwords for development
-                db_password = input("Enter database password: ")
-            
-            encoded_password = urllib.parse.quote_plus(db_password)
-            connection_string = f'postgresql://{db_user}:{encoded_password}@{db_host}:{db_port}/{db_name}'
-            self.engine = create_engine(connection_string)
+            self.engine = get_engine()
             
             # Test connection
             with self.engine.connect() as conn:
@@ -58,75 +105,45 @@ class PlayerTeamFixer:
         
         return dict(zip(teams_df['team_name'], teams_df['team_id']))
     
+    @contextmanager
+    def timed_phase(self, name):
+        """Record wall time for a phase of the run"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_times[name] = self.phase_times.get(name, 0.0) + time.perf_counter() - started
+    
+    def log_phase_times(self):
+        """Log wall time per phase"""
+        for name, seconds in self.phase_times.items():
+            logger.info(f"⏱️ {name}: {seconds:.2f}s")
+    
+    def load_deliveries(self):
+        """Read the columns used for team attribution once per run"""
+        if self.deliveries is None:
+            # Names come back as categoricals; plain objects keep cross-column comparisons simple
+            deliveries = self.cache.read(HISTORY_COLUMNS)
+            self.deliveries = deliveries.astype({col: 'object' for col in APPEARANCE_COLUMNS})
+            logger.info(f"Loaded {len(self.deliveries)} records")
+        return self.deliveries
+    
     def analyze_player_team_assignments(self):
         """Analyze which teams players belong to based on CSV data"""
         logger.info("📊 Analyzing player-team assignments from CSV data...")
         
         try:
-            # Load CSV data
-            df = pd.read_csv(self.csv_file)
-            logger.info(f"Loaded {len(df)} records from CSV")
+            df = self.load_deliveries()
             
             # Get teams mapping
             teams_map = self.get_teams_mapping()
             
-            # Find player team assignments from CSV
-            player_teams = {}
-            
-            # From batsman data
-            for _, row in df[['batsman', 'team']].dropna().iterrows():
-                player = row['batsman']
-                team = row['team']
-                if player not in player_teams:
-                    player_teams[player] = set()
-                player_teams[player].add(team)
-            
-            # From non-striker data
-            for _, row in df[['non_striker', 'team']].dropna().iterrows():
-                player = row['non_striker']
-                team = row['team']
-                if player not in player_teams:
-                    player_teams[player] = set()
-                player_teams[player].add(team)
+            resolved_assignments, conflicted_players = resolve_player_teams(df)
+            conflicts = len(conflicted_players)
+            logger.info(f"Found team assignments for {len(resolved_assignments)} players")
             
-            # From bowler data (they belong to the opposing team)
-            team_pairs = df[['team1', 'team2']].drop_duplicates()
-            team_opponents = {}
-            for _, row in team_pairs.iterrows():
-                if pd.notna(row['team1']) and pd.notna(row['team2']):
-                    team_opponents[row['team1']] = row['team2']
-                    team_opponents[row['team2']] = row['team1']
-            
-            for _, row in df[['bowler', 'team']].dropna().iterrows():
-                player = row['bowler']
-                batting_team = row['team']
-                bowling_team = team_opponents.get(batting_team)
-                if bowling_team and player not in player_teams:
-                    player_teams[player] = set()
-                if bowling_team:
-                    player_teams[player].add(bowling_team)
-            
-            logger.info(f"Found team assignments for {len(player_teams)} players")
-            
-            # Resolve conflicts (players assigned to multiple teams)
-            resolved_assignments = {}
-            conflicts = 0
-            
-            for player, teams in player_teams.items():
-                if len(teams) == 1:
-                    resolved_assignments[player] = list(teams)[0]
-                else:
-                    # Take the most frequent team assignment
-                    team_counts = {}
-                    for team in teams:
-                        team_counts[team] = len(df[(df['batsman'] == player) & (df['team'] == team)]) + \
-                                          len(df[(df['non_striker'] == player) & (df['team'] == team)])
-                    
-                    if team_counts:
-                        most_frequent_team = max(team_counts, key=team_counts.get)
-                        resolved_assignments[player] = most_frequent_team
-                        conflicts += 1
-                        logger.info(f"  Conflict resolved for {player}: {list(teams)} -> {most_frequent_team}")
+            for player in conflicted_players[:10]:  # Show first 10 conflicts
+                logger.info(f"  Conflict resolved for {player} -> {resolved_assignments[player]}")
             
             logger.info(f"Resolved {conflicts} conflicts")
             logger.info(f"Final assignments: {len(resolved_assignments)} players")
@@ -143,7 +160,8 @@ class PlayerTeamFixer:
         
         try:
             # Get player-team assignments from CSV
-            player_assignments, teams_map = self.analyze_player_team_assignments()
+            with self.timed_phase("analyze assignments"):
+                player_assignments, teams_map = self.analyze_player_team_assignments()
             
             # Get current players from database
             db_players = pd.read_sql("SELECT player_id, player_name, team_id FROM players", self.engine)
@@ -155,33 +173,65 @@ class PlayerTeamFixer:
             
             logger.info(f"Current status: {players_with_teams} players have teams, {players_without_teams} don't")
             
-            updates = 0
-            not_found = 0
-            
-            with self.engine.connect() as conn:
-                for player_name, team_name in player_assignments.items():
-                    if team_name in teams_map:
-                        team_id = teams_map[team_name]
-                        
-                        # Update player team
-                        result = conn.execute(text("""
-                            UPDATE players 
-                            SET team_id = :team_id 
-                            WHERE player_name = :player_name AND (team_id IS NULL OR team_id != :team_id)
-                        """), {"team_id": team_id, "player_name": player_name})
-                        
-                        if result.rowcount > 0:
-                            updates += 1
-                            if updates <= 10:  # Show first 10 updates
-                                logger.info(f"  Updated {player_name} -> {team_name} (ID: {team_id})")
-                    else:
-                        not_found += 1
-                        if not_found <= 5:  # Show first 5 not found
-                            logger.info(f"  Team not found: {team_name} for player {player_name}")
+            raw_conn = self.engine.raw_connection()
+            try:
+                cursor = raw_conn.cursor()
                 
-                conn.commit()
-            
-            logger.info(f"✅ Updated {updates} player team assignments")
+                with self.timed_phase("stage assignments"):
+                    cursor.execute("""
+                        CREATE TEMP TABLE player_team_updates (
+                            player_name VARCHAR(100),
+                            team_name VARCHAR(100)
+                        ) ON COMMIT DROP
+                    """)
+                    execute_values(cursor, "INSERT INTO player_team_updates (player_name, team_name) VALUES %s",
+                                   list(player_assignments.items()), page_size=1000)
+                
+                with self.timed_phase("apply assignments"):
+                    # One join-based UPDATE; the outer SELECT sees the pre-update snapshot
+                    cursor.execute("""
+                        WITH resolved AS (
+                            SELECT u.player_name, u.team_name, t.team_id
+                            FROM player_team_updates u
+                            LEFT JOIN teams t ON t.team_name = u.team_name
+                        ),
+                        updated AS (
+                            UPDATE players p
+                            SET team_id = r.team_id
+                            FROM resolved r
+                            WHERE p.player_name = r.player_name
+                            AND r.team_id IS NOT NULL
+                            AND p.team_id IS DISTINCT FROM r.team_id
+                            RETURNING p.player_id
+                        )
+                        SELECT
+                            (SELECT COUNT(*) FROM updated) AS updated,
+                            (SELECT COUNT(*) FROM resolved r
+                             JOIN players p ON p.player_name = r.player_name
+                             WHERE p.team_id = r.team_id) AS unchanged,
+                            (SELECT COUNT(*) FROM resolved WHERE team_id IS NULL) AS unknown_team
+                    """)
+                    updates, unchanged, not_found = cursor.fetchone()
+                    
+                    cursor.execute("""
+                        SELECT DISTINCT u.team_name
+                        FROM player_team_updates u
+                        LEFT JOIN teams t ON t.team_name = u.team_name
+                        WHERE t.team_id IS NULL
+                        LIMIT 5
+                    """)
+                    for (team_name,) in cursor.fetchall():  # Show first 5 not found
+                        logger.info(f"  Team not found: {team_name}")
+                
+                raw_conn.commit()
+                cursor.close()
+            except Exception:
+                raw_conn.rollback()
+                raise
+            finally:
+                raw_conn.close()
+            
+            logger.info(f"✅ Updated {updates} player team assignments ({unchanged} already correct)")
             logger.info(f"⚠️ {not_found} team names not found in database")
             
             # Verify results
@@ -192,6 +242,40 @@ class PlayerTeamFixer:
             logger.error(f"❌ Error updating player teams: {e}")
             raise
     
+    def update_player_team_history(self):
+        """Rebuild season-level player team history from the CSV"""
+        logger.info("📅 Building season-aware player team history...")
+        
+        try:
+            history = build_player_team_history(self.load_deliveries())
+            
+            indexes = NameIndexes.load_or_build(self.engine)
+            history['player_id'] = indexes.players.resolve_many(history['player'], exact=True)
+            history['team_id'] = indexes.teams.resolve_many(history['team'], exact=True)
+            
+            unmapped = history['player_id'].isna() | history['team_id'].isna()
+            if unmapped.any():
+                logger.info(f"⚠️ Skipping {unmapped.sum()} history rows with unknown players or teams")
+            
+            history = history[~unmapped].astype({'player_id': 'int64', 'team_id': 'int64'})
+            history = history[[
+                'player_id', 'season', 'team_id', 'matches_played', 'deliveries',
+                'first_match_date', 'last_match_date'
+            ]]
+            
+            # One transaction: a failed insert rolls the TRUNCATE back instead of leaving the table empty
+            with self.engine.begin() as conn:
+                conn.execute(text("TRUNCATE player_team_history"))
+                history.to_sql('player_team_history', conn, if_exists='append', index=False,
+                               method='multi', chunksize=1000)
+            
+            logger.info(f"✅ Stored {len(history)} player-season-team rows "
+                        f"for {history['player_id'].nunique()} players")
+            
+        except Exception as e:
+            logger.error(f"❌ Error building player team history: {e}")
+            raise
+    
     def verify_fix(self):
         """Verify the fix worked"""
         logger.info("🔍 Verifying player team assignments...")
@@ -233,16 +317,34 @@ class PlayerTeamFixer:
         logger.info("🚀 Starting player team assignment fix...")
         
         try:
-            self.update_player_teams()
-            self.verify_fix()
+            with self.timed_phase("check manifest"):
+                self.manifest.ensure_table()
+                checksums = compute_match_checksums(self.load_deliveries(), HISTORY_COLUMNS)
+                pending, _, _ = self.manifest.pending(checksums)
+            
+            if pending.empty:
+                logger.info("🎉 No new or changed matches - player teams are already current")
+                return
+            
+            # Dominant teams are resolved over the whole history, so any change recomputes everything
+            with self.timed_phase("update player teams"):
+                self.update_player_teams()
+            with self.timed_phase("update team history"):
+                self.update_player_team_history()
+            self.manifest.record(pending)
+            with self.timed_phase("refresh views"):
+                # player_recent_form reports each player's current team
+                refresh_materialized_views(self.engine, ['player_recent_form'])
+            bump_data_generation(self.engine, 'fix_player_teams')
+            with self.timed_phase("verify"):
+                self.verify_fix()
             logger.info("🎉 Player team assignment fix completed!")
             
         except Exception as e:
             logger.error(f"💥 Fix failed: {e}")
             raise
         finally:
-            if self.engine:
-                self.engine.dispose()
+            self.log_phase_times()
 
 def main():
     """Main function"""
@@ -253,6 +355,8 @@ def main():
     except Exception as e:
         logger.error(f"Application failed: {e}")
         return 1
+    finally:
+        dispose_engine()
 
 if __name__ == "__main__":
     exit(main()) 
\ No newline at end of file
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+
+import pandas as pd
+import argparse
+import time
+import logging
+
+from sqlalchemy import text
+
+from db_engine import get_engine, dispose_engine
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Rolling windows, in appearances
+FORM_WINDOWS = (5, 10)
+# Exponential weighting: an appearance counts half as much EWM_HALFLIFE appearances later
+EWM_HALFLIFE = 5
+
+# Per-appearance counts that windows sum; rates are ratios of these sums, not averages of rates
+COUNT_COLUMNS = ['appearances', 'runs_scored', 'balls_faced', 'wickets_taken', 'runs_conceded', 'overs_bowled']
+
+PLAYER_FORM_FEATURES_DDL = """
+    CREATE TABLE IF NOT EXISTS player_form_features (
+        player_id INTEGER REFERENCES players(player_id) ON DELETE CASCADE,
+        match_id INTEGER REFERENCES matches(match_id) ON DELETE CASCADE,
+        match_date DATE NOT NULL,
+        venue_id INTEGER,
+        matches_before INTEGER NOT NULL,
+        days_since_last_match INTEGER,
+        last5_matches INTEGER,
+        last5_avg_runs DECIMAL(6,2),
+        last5_strike_rate DECIMAL(6,2),
+        last5_avg_wickets DECIMAL(6,2),
+        last5_economy DECIMAL(6,2),
+        last10_matches INTEGER,
+        last10_avg_runs DECIMAL(6,2),
+        last10_strike_rate DECIMAL(6,2),
+        last10_avg_wickets DECIMAL(6,2),
+        last10_economy DECIMAL(6,2),
+        ewm_runs DECIMAL(6,2),
+        ewm_strike_rate DECIMAL(6,2),
+        ewm_wickets DECIMAL(6,2),
+        ewm_economy DECIMAL(6,2),
+        venue_matches_before INTEGER,
+        venue_avg_runs DECIMAL(6,2),
+        venue_strike_rate DECIMAL(6,2),
+        venue_avg_wickets DECIMAL(6,2),
+        venue_economy DECIMAL(6,2),
+        computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (player_id, match_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_player_form_features_player_date
+        ON player_form_features(player_id, match_date);
+    CREATE TABLE IF NOT EXISTS player_form_latest (
+        player_id INTEGER PRIMARY KEY REFERENCES players(player_id) ON DELETE CASCADE,
+        last_match_id INTEGER REFERENCES matches(match_id) ON DELETE CASCADE,
+        last_match_date DATE NOT NULL,
+        matches_before INTEGER NOT NULL,
+        last5_matches INTEGER,
+        last5_avg_runs DECIMAL(6,2),
+        last5_strike_rate DECIMAL(6,2),
+        last5_avg_wickets DECIMAL(6,2),
+        last5_economy DECIMAL(6,2),
+        last10_matches INTEGER,
+        last10_avg_runs DECIMAL(6,2),
+        last10_strike_rate DECIMAL(6,2),
+        last10_avg_wickets DECIMAL(6,2),
+        last10_economy DECIMAL(6,2),
+        ewm_runs DECIMAL(6,2),
+        ewm_strike_rate DECIMAL(6,2),
+        ewm_wickets DECIMAL(6,2),
+        ewm_economy DECIMAL(6,2),
+        computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+STATS_SELECT = """
+    SELECT
+        pms.player_id,
+        pms.match_id,
+        m.match_date,
+        m.venue_id,
+        pms.runs_scored,
+        pms.balls_faced,
+        pms.wickets_taken,
+        pms.runs_conceded,
+        pms.overs_bowled
+    FROM player_match_stats pms
+    JOIN matches m ON pms.match_id = m.match_id
+    {player_filter}
+"""
+
+# Players whose feature rows are missing or belong to reloaded matches, with the first affected date,
+# plus players without a player_form_latest row (from_date NULL: only that row is rebuilt).
+# Rows before from_date only depend on earlier matches and stay valid.
+AFFECTED_PLAYERS = """
+    SELECT
+        pms.player_id,
+        MIN(m.match_date) FILTER (WHERE f.match_id IS NULL OR pms.match_id = ANY(:match_ids)) AS from_date
+    FROM player_match_stats pms
+    JOIN matches m ON pms.match_id = m.match_id
+    LEFT JOIN player_form_features f ON f.player_id = pms.player_id AND f.match_id = pms.match_id
+    LEFT JOIN player_form_latest l ON l.player_id = pms.player_id
+    GROUP BY pms.player_id
+    HAVING BOOL_OR(f.match_id IS NULL OR pms.match_id = ANY(:match_ids)) OR BOOL_OR(l.player_id IS NULL)
+"""
+
+DELETE_FROM_DATES = """
+    DELETE FROM player_form_features f
+    USING unnest(CAST(:player_ids AS INTEGER[]), CAST(:from_dates AS DATE[])) AS p(player_id, from_date)
+    WHERE f.player_id = p.player_id AND f.match_date >= p.from_date
+"""
+
+# Placeholder match_id of the appended "next fixture" row each player's latest form is read from
+UPCOMING_MATCH_ID = -1
+LATEST_COLUMNS = ['player_id', 'last_match_id', 'last_match_date', 'matches_before',
+                  *[f'last{window}_{name}' for window in FORM_WINDOWS
+                    for name in ('matches', 'avg_runs', 'strike_rate', 'avg_wickets', 'economy')],
+                  'ewm_runs', 'ewm_strike_rate', 'ewm_wickets', 'ewm_economy']
+
+def ratio(numerator, denominator, scale=1.0):
+    """numerator / denominator * scale, NULL where the denominator is zero or missing"""
+    return (scale * numerator / denominator.where(denominator > 0)).round(2)
+
+def compute_form_features(stats):
+    """One feature row per player appearance, using only that player's earlier matches.
+
+    stats needs player_id, match_id, match_date, venue_id and the per-match counts in
+    COUNT_COLUMNS (appearances is added here).
+    """
+    stats = stats.sort_values(['player_id', 'match_date', 'match_id']).reset_index(drop=True)
+    stats['match_date'] = pd.to_datetime(stats['match_date'])
+    stats['appearances'] = 1
+    counts = stats[COUNT_COLUMNS].astype('float64')
+    player = stats['player_id']
+
+    # Shift each player's history down one row so a row never sees its own match
+    previous = counts.groupby(player, sort=False).shift(1)
+    grouped_previous = previous.groupby(player, sort=False)
+
+    features = stats[['player_id', 'match_id', 'match_date']].copy()
+    features['venue_id'] = stats['venue_id'].astype('Int32')
+    features['matches_before'] = stats.groupby('player_id', sort=False).cumcount()
+    features['days_since_last_match'] = (
+        stats['match_date'] - stats.groupby('player_id', sort=False)['match_date'].shift(1)
+    ).dt.days.astype('Int32')
+
+    for window in FORM_WINDOWS:
+        sums = grouped_previous.rolling(window, min_periods=1).sum().reset_index(level=0, drop=True)
+        matches = sums['appearances']
+        features[f'last{window}_matches'] = matches.fillna(0).astype('int32')
+        features[f'last{window}_avg_runs'] = ratio(sums['runs_scored'], matches)
+        features[f'last{window}_strike_rate'] = ratio(sums['runs_scored'], sums['balls_faced'], 100)
+        features[f'last{window}_avg_wickets'] = ratio(sums['wickets_taken'], matches)
+        features[f'last{window}_economy'] = ratio(sums['runs_conceded'], sums['overs_bowled'])
+
+    weighted = grouped_previous.ewm(halflife=EWM_HALFLIFE).mean().reset_index(level=0, drop=True)
+    features['ewm_runs'] = weighted['runs_scored'].round(2)
+    features['ewm_strike_rate'] = ratio(weighted['runs_scored'], weighted['balls_faced'], 100)
+    features['ewm_wickets'] = weighted['wickets_taken'].round(2)
+    features['ewm_economy'] = ratio(weighted['runs_conceded'], weighted['overs_bowled'])
+
+    # Venue splits: running totals per (player, venue) minus the current match
+    at_venue = counts.groupby([player, stats['venue_id']], sort=False, dropna=False).cumsum() - counts
+    features['venue_matches_before'] = at_venue['appearances'].astype('int32')
+    features['venue_avg_runs'] = ratio(at_venue['runs_scored'], at_venue['appearances'])
+    features['venue_strike_rate'] = ratio(at_venue['runs_scored'], at_venue['balls_faced'], 100)
+    features['venue_avg_wickets'] = ratio(at_venue['wickets_taken'], at_venue['appearances'])
+    features['venue_economy'] = ratio(at_venue['runs_conceded'], at_venue['overs_bowled'])
+
+    features['match_date'] = features['match_date'].dt.date
+    return features
+
+def compute_player_form(stats):
+    """Per-appearance features plus one row per player with form through their last appearance.
+
+    The latest rows come from a placeholder appearance after each player's last match, so they
+    are exactly what an upcoming fixture sees. They carry no venue split: that depends on the
+    fixture venue and is added by get_players_form_features.
+    """
+    stats = stats.assign(match_date=pd.to_datetime(stats['match_date']))
+    last = stats.sort_values(['match_date', 'match_id']).groupby('player_id').tail(1)
+    upcoming = last[['player_id']].assign(match_id=UPCOMING_MATCH_ID, match_date=pd.Timestamp.max.normalize())
+    upcoming[COUNT_COLUMNS[1:]] = 0
+
+    features = compute_form_features(pd.concat([stats, upcoming], ignore_index=True))
+    is_upcoming = features['match_id'] == UPCOMING_MATCH_ID
+
+    latest = features[is_upcoming].merge(
+        last[['player_id', 'match_id', 'match_date']].rename(
+            columns={'match_id': 'last_match_id', 'match_date': 'last_match_date'}),
+        on='player_id')
+    latest['last_match_date'] = latest['last_match_date'].dt.date
+    return features[~is_upcoming], latest[LATEST_COLUMNS]
+
+def ensure_form_features_table(engine):
+    """Create player_form_features when schema.sql has not been re-applied"""
+    with engine.connect() as conn:
+        conn.execute(text(PLAYER_FORM_FEATURES_DDL))
+        conn.commit()
+
+def refresh_player_form_features(engine, match_ids=None, full=False):
+    """Bring player_form_features and player_form_latest up to date.
+
+    Incremental by default: players with appearances that have no feature row, or that
+    are in match_ids (reloaded matches), get their rows from the first such match onward
+    and their latest row recomputed. full=True rebuilds both tables.
+    """
+    logger.info("📈 Refreshing player form features...")
+    started = time.perf_counter()
+
+    try:
+        ensure_form_features_table(engine)
+
+        if full:
+            stats = pd.read_sql(text(STATS_SELECT.format(player_filter="")), engine)
+            affected = None
+        else:
+            affected = pd.read_sql(text(AFFECTED_PLAYERS), engine,
+                                   params={"match_ids": [int(m) for m in (match_ids or [])]})
+            if affected.empty:
+                logger.info("✅ Player form features are already current")
+                return 0
+            stats = pd.read_sql(text(STATS_SELECT.format(player_filter="WHERE pms.player_id = ANY(:player_ids)")),
+                                engine, params={"player_ids": affected['player_id'].astype(int).tolist()})
+
+        features, latest = compute_player_form(stats)
+        if affected is not None:
+            from_dates = features['player_id'].map(affected.set_index('player_id')['from_date'])
+            features = features[pd.to_datetime(features['match_date']) >= pd.to_datetime(from_dates)]
+
+        with engine.connect() as conn:
+            if full:
+                conn.execute(text("TRUNCATE player_form_features, player_form_latest"))
+            else:
+                player_ids = affected['player_id'].astype(int).tolist()
+                conn.execute(text(DELETE_FROM_DATES), {
+                    "player_ids": player_ids,
+                    "from_dates": [None if pd.isna(d) else d for d in affected['from_date']],
+                })
+                conn.execute(text("DELETE FROM player_form_latest WHERE player_id = ANY(:player_ids)"),
+                             {"player_ids": player_ids})
+            features.to_sql('player_form_features', conn, if_exists='append', index=False,
+                            method='multi', chunksize=1000)
+            latest.to_sql('player_form_latest', conn, if_exists='append', index=False,
+                          method='multi', chunksize=1000)
+            conn.commit()
+
+        logger.info(f"✅ Wrote {len(features)} player form feature rows and {len(latest)} latest rows "
+                    f"in {time.perf_counter() - started:.1f}s")
+        return len(features)
+
+    except Exception as e:
+        logger.error(f"❌ Error refreshing player form features: {e}")
+        raise
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Precompute rolling and exponentially weighted player form per match")
+    parser.add_argument('--full', action='store_true', help="Rebuild every row instead of only missing ones")
+    parser.add_argument('--match-ids', type=int, nargs='*', default=[],
+                        help="Recompute features from these (reloaded) matches onward")
+    args = parser.parse_args()
+
+    try:
+        refresh_player_form_features(get_engine(), args.match_ids, full=args.full)
+        return 0
+    except Exception:
+        return 1
+    finally:
+        dispose_engine()
+
+if __name__ == "__main__":
+    exit(main())
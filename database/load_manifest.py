@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+from pandas.util import hash_pandas_object
+from sqlalchemy import text
+import logging
+
+logger = logging.getLogger(__name__)
+
+def compute_match_checksums(df, columns):
+    """Vectorized per-match checksum: row count plus the wrapping uint64 sum of row hashes.
+
+    Integer columns are normalized to Int64 so the same CSV hashes identically whether it
+    was parsed whole (int64/float64) or in compact chunks (Int8/Int16); names hash by value
+    whether they are categoricals or strings. Sums are associative, so per-chunk results
+    can be merged with combine_match_checksums.
+    """
+    normalized = df[columns].astype({col: 'Int64' for col in columns if is_numeric_dtype(df[col])})
+    row_hashes = hash_pandas_object(normalized, index=False).to_numpy()
+
+    grouped = pd.DataFrame({'match_id': df['match_id'].to_numpy(), 'content_hash': row_hashes}).groupby('match_id')
+    checksums = grouped['content_hash'].agg(['size', 'sum'])
+    checksums.columns = ['row_count', 'content_hash']
+    return checksums
+
+def combine_match_checksums(parts):
+    """Merge checksums computed over separate chunks of the same file"""
+    if not parts:
+        return pd.DataFrame(columns=['row_count', 'content_hash'])
+    return pd.concat(parts).groupby(level=0).sum()
+
+class MatchLoadManifest:
+    """Per-match content hashes of the last successful load, used to skip unchanged matches"""
+
+    def __init__(self, engine, source):
+        self.engine = engine
+        self.source = source
+
+    def ensure_table(self):
+        """Create match_load_manifest if schema.sql has not been re-applied yet"""
+        with self.engine.connect() as conn:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS match_load_manifest (
+                    source VARCHAR(50) NOT NULL,
+                    match_id INTEGER NOT NULL,
+                    row_count INTEGER NOT NULL,
+                    content_hash CHAR(16) NOT NULL,
+                    loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (source, match_id)
+                )
+            """))
+            conn.commit()
+
+    def pending(self, checksums):
+        """Split checksums into new and changed matches compared with the stored manifest.
+
+        Returns (pending_checksums, new_match_ids, changed_match_ids).
+        """
+        stored = pd.read_sql(
+            text("SELECT match_id, row_count, content_hash FROM match_load_manifest WHERE source = :source"),
+            self.engine,
+            params={"source": self.source}
+        ).set_index('match_id')
+
+        current = checksums.assign(content_hash=[f"{value:016x}" for value in checksums['content_hash']])
+        known = current.join(stored, rsuffix='_stored', how='left')
+
+        is_new = known['content_hash_stored'].isna()
+        is_changed = ~is_new & (
+            (known['content_hash'] != known['content_hash_stored']) |
+            (known['row_count'] != known['row_count_stored'])
+        )
+
+        new_match_ids = [int(m) for m in known.index[is_new]]
+        changed_match_ids = [int(m) for m in known.index[is_changed]]
+        logger.info(f"📋 Manifest ({self.source}): {len(new_match_ids)} new, {len(changed_match_ids)} changed, "
+                    f"{len(known) - len(new_match_ids) - len(changed_match_ids)} unchanged matches")
+
+        return checksums[is_new | is_changed], new_match_ids, changed_match_ids
+
+    def record(self, checksums):
+        """Store checksums for matches that were loaded successfully"""
+        if checksums.empty:
+            return
+
+        rows = [
+            {"source": self.source, "match_id": int(match_id), "row_count": int(row_count),
+             "content_hash": f"{content_hash:016x}"}
+            for match_id, row_count, content_hash in checksums[['row_count', 'content_hash']].itertuples()
+        ]
+        with self.engine.connect() as conn:
+            conn.execute(text("""
+                INSERT INTO match_load_manifest (source, match_id, row_count, content_hash)
+                VALUES (:source, :match_id, :row_count, :content_hash)
+                ON CONFLICT (source, match_id) DO UPDATE SET
+                    row_count = EXCLUDED.row_count,
+                    content_hash = EXCLUDED.content_hash,
+                    loaded_at = CURRENT_TIMESTAMP
+            """), rows)
+            conn.commit()
+
+        logger.info(f"📋 Manifest ({self.source}): recorded {len(rows)} matches")
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+
+import pandas as pd
+import numpy as np
+import argparse
+import json
+import sys
+import time
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import text
+
+from db_engine import get_engine, dispose_engine
+from fantasy_points import DREAM11_T20_RULES
+from name_index import NameIndexes
+from player_matcher import PlayerMatcher, fetch_squad_teams, read_teams
+from team_scorer import build_team_matrix, resolve_teams, slot_multipliers
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Appearances per player sampled from
+HISTORY_MATCHES = 30
+# Share of draws taken from the pooled field instead of the player's own history is
+# PRIOR_MATCHES / (appearances + PRIOR_MATCHES), so thin histories lean on the field
+PRIOR_MATCHES = 3
+# Relative sampling weight of past appearances at the fixture's venue / against its opponent
+VENUE_WEIGHT = 2.0
+OPPOSITION_WEIGHT = 2.0
+
+# Simulations x max(teams, players) per chunk. A chunk's draws and score matrix take a few dozen
+# bytes per cell, so peak memory stays in the tens of MB whatever N, the field or the squads are
+CHUNK_CELLS = 2_000_000
+# Score histogram resolution per team, for percentiles without keeping every simulated score
+HISTOGRAM_BINS = 1024
+PERCENTILES = (5, 25, 50, 75, 95)
+
+POINTS_SAMPLES = """
+    WITH ranked AS (
+        SELECT
+            p.player_id,
+            p.total_points,
+            m.venue_id,
+            CASE
+                WHEN s.team_id = m.team1_id THEN m.team2_id
+                WHEN s.team_id = m.team2_id THEN m.team1_id
+            END AS opponent_id,
+            ROW_NUMBER() OVER (PARTITION BY p.player_id ORDER BY m.match_date DESC, m.match_id DESC) AS rn
+        FROM player_match_points p
+        JOIN matches m ON m.match_id = p.match_id
+        LEFT JOIN player_match_stats s ON s.match_id = p.match_id AND s.player_id = p.player_id
+        WHERE p.ruleset = :ruleset
+        AND p.player_id = ANY(:player_ids)
+        AND m.match_date < :match_date
+    )
+    SELECT player_id, total_points, venue_id, opponent_id
+    FROM ranked
+    WHERE rn <= :last_matches
+    ORDER BY player_id, rn
+"""
+
+def fetch_points_samples(engine, player_ids, match_date, ruleset=DREAM11_T20_RULES['name'],
+                         last_matches=HISTORY_MATCHES):
+    """Each player's last appearances before match_date with their venue and opponent"""
+    return pd.read_sql(text(POINTS_SAMPLES), engine, params={
+        "ruleset": ruleset,
+        "player_ids": [int(player_id) for player_id in player_ids],
+        "match_date": match_date,
+        "last_matches": last_matches,
+    })
+
+def build_sampling_model(player_ids, samples, venue_id=None, opponent_ids=None, prior_matches=PRIOR_MATCHES):
+    """Per-player weighted empirical distributions, padded to one players x samples matrix.
+
+    player_ids must be sorted; opponent_ids optionally maps player_id -> the team they face.
+    Cumulative weights are offset by row number so one searchsorted samples every player.
+    """
+    samples = samples[samples['player_id'].isin(player_ids)]
+    rows = np.searchsorted(player_ids, samples['player_id'].to_numpy())
+    cols = samples.groupby('player_id').cumcount().to_numpy()
+    width = int(cols.max()) + 1 if len(cols) else 1
+
+    weights = np.ones(len(samples))
+    if venue_id is not None:
+        weights *= np.where(samples['venue_id'].to_numpy() == venue_id, VENUE_WEIGHT, 1.0)
+    if opponent_ids:
+        facing = samples['player_id'].map(opponent_ids).to_numpy()
+        weights *= np.where(samples['opponent_id'].to_numpy() == facing, OPPOSITION_WEIGHT, 1.0)
+
+    values = np.zeros((len(player_ids), width), dtype=np.float32)
+    cell_weights = np.zeros((len(player_ids), width))
+    values[rows, cols] = samples['total_points'].to_numpy()
+    cell_weights[rows, cols] = weights
+
+    counts = np.bincount(rows, minlength=len(player_ids))
+    totals = cell_weights.sum(axis=1)
+    cumulative = np.cumsum(cell_weights, axis=1) / np.where(totals > 0, totals, 1.0)[:, None]
+    # Pin each row's last real sample to exactly 1 so rounding never lands on padding
+    cumulative[np.arange(width)[None, :] >= (counts - 1)[:, None]] = 1.0
+    cumulative[counts == 0] = 0.0
+
+    pool = samples['total_points'].to_numpy(dtype=np.float32)
+    return {
+        'values': values,
+        'cumulative': (cumulative + np.arange(len(player_ids))[:, None]).ravel(),
+        'own_share': counts / (counts + prior_matches),
+        'pool': pool if len(pool) else np.zeros(1, dtype=np.float32),
+    }
+
+def team_weight_matrix(slots, captains, vice_captains, player_ids):
+    """Teams x players matrix of points multipliers, so team scores are one matrix product"""
+    multipliers = slot_multipliers(slots, captains, vice_captains)
+    filled = slots >= 0
+    weights = np.zeros((len(slots), len(player_ids)), dtype=np.float32)
+    team_rows = np.nonzero(filled)[0]
+    np.add.at(weights, (team_rows, np.searchsorted(player_ids, slots[filled])), multipliers[filled])
+    return weights
+
+def histogram_range(model, weights):
+    """Lowest score, bin width for HISTOGRAM_BINS bins covering every reachable team score"""
+    largest = float(weights.sum(axis=1).max()) if len(weights) else 1.0
+    low = largest * min(float(model['pool'].min()), float(model['values'].min()), 0.0)
+    high = largest * max(float(model['pool'].max()), float(model['values'].max()), 1.0)
+    return low, (high - low) / HISTOGRAM_BINS
+
+def simulate_chunk(model, weights, histogram, seed, simulations):
+    """Simulate one chunk of matches; returns per-team sums, histogram counts and split wins"""
+    rng = np.random.default_rng(seed)
+    players = len(model['own_share'])
+    low, bin_width = histogram
+
+    # Own-history draw for every player at once through the row-offset cumulative weights
+    positions = np.searchsorted(model['cumulative'], rng.random((simulations, players)) + np.arange(players),
+                                side='right')
+    own = model['values'].ravel()[np.minimum(positions, model['values'].size - 1)]
+    pooled = model['pool'][rng.integers(0, len(model['pool']), (simulations, players))]
+    points = np.where(rng.random((simulations, players)) < model['own_share'], own, pooled).astype(np.float32)
+
+    scores = points @ weights.T
+    best = scores.max(axis=1, keepdims=True)
+    leaders = scores >= best
+    # Tied leaders share the win
+    wins = (leaders * (1.0 / leaders.sum(axis=1, keepdims=True)).astype(np.float32)).sum(axis=0, dtype=np.float64)
+
+    teams = scores.shape[1]
+    bins = np.clip(((scores - low) / bin_width).astype(np.int32), 0, HISTOGRAM_BINS - 1)
+    bins += np.arange(teams, dtype=np.int32) * HISTOGRAM_BINS
+    counts = np.bincount(bins.ravel(), minlength=teams * HISTOGRAM_BINS)
+
+    return {
+        'sum': scores.sum(axis=0, dtype=np.float64),
+        'sum_sq': np.square(scores, dtype=np.float64).sum(axis=0),
+        'wins': wins,
+        'histogram': counts.reshape(teams, HISTOGRAM_BINS).astype(np.int32),
+    }
+
+def run_simulations(model, weights, simulations, seed=None, workers=1):
+    """Simulate the contest; returns per-team mean, std, percentiles, win probability and the seed.
+
+    Chunks have a fixed size and their own child seed, so results depend on the seed and not
+    on the number of workers. At most two chunks per worker are in flight at a time.
+    """
+    teams, players = weights.shape
+    # Draws are simulations x players and scores simulations x teams; bound the larger
+    chunk = max(1, min(simulations, CHUNK_CELLS // max(teams, players, 1)))
+    sizes = [chunk] * (simulations // chunk) + ([simulations % chunk] if simulations % chunk else [])
+    sequence = np.random.SeedSequence(seed)
+    seeds = sequence.spawn(len(sizes))
+    histogram = histogram_range(model, weights)
+
+    totals = {'sum': np.zeros(teams), 'sum_sq': np.zeros(teams), 'wins': np.zeros(teams),
+              'histogram': np.zeros((teams, HISTOGRAM_BINS), dtype=np.int64)}
+
+    def combine(result):
+        for key, value in result.items():
+            totals[key] += value
+
+    if workers > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for chunk_seed, size in zip(seeds, sizes):
+                pending.append(pool.submit(simulate_chunk, model, weights, histogram, chunk_seed, size))
+                # Combined in submission order so floating-point sums are reproducible
+                if len(pending) >= 2 * workers:
+                    combine(pending.popleft().result())
+            while pending:
+                combine(pending.popleft().result())
+    else:
+        for chunk_seed, size in zip(seeds, sizes):
+            combine(simulate_chunk(model, weights, histogram, chunk_seed, size))
+
+    mean = totals['sum'] / simulations
+    std = np.sqrt(np.maximum(totals['sum_sq'] / simulations - mean ** 2, 0.0))
+    low, bin_width = histogram
+    cdf = np.cumsum(totals['histogram'], axis=1) / simulations
+    percentiles = {
+        f"p{q}": low + (np.argmax(cdf >= q / 100, axis=1) + 0.5) * bin_width
+        for q in PERCENTILES
+    }
+    return {
+        'mean': mean,
+        'std': std,
+        'percentiles': percentiles,
+        'win_probability': totals['wins'] / simulations,
+        'seed': sequence.entropy,
+    }
+
+def simulate_contest(teams, resolved, engine, match_date, simulations, seed=None, workers=1,
+                     squad_teams=None, venue_id=None, ruleset=DREAM11_T20_RULES['name']):
+    """Score distributions and win probabilities for each team; returns (results, run info).
+
+    squad_teams is (team_ids, player_id -> team_id) from fetch_squad_teams: players outside
+    the squads score nothing and samples against each player's opponent get more weight.
+    """
+    slots, captains, vice_captains = build_team_matrix(teams, resolved)
+    opponent_ids = None
+    if squad_teams is not None:
+        team_ids, player_teams = squad_teams
+        slots = np.where(np.isin(slots, list(player_teams)), slots, -1)
+        opponent_ids = {player_id: team_ids[1] if team_id == team_ids[0] else team_ids[0]
+                        for player_id, team_id in player_teams.items()}
+    player_ids = np.unique(slots[slots >= 0])
+
+    started = time.perf_counter()
+    samples = fetch_points_samples(engine, player_ids, match_date, ruleset)
+    model = build_sampling_model(player_ids, samples, venue_id, opponent_ids)
+    weights = team_weight_matrix(slots, captains, vice_captains, player_ids)
+    prepared = time.perf_counter()
+
+    outcome = run_simulations(model, weights, simulations, seed, workers)
+    simulated = time.perf_counter()
+
+    order = np.argsort(-outcome['win_probability'], kind='stable')
+    results = [{
+        'teamName': teams[row]['teamName'],
+        'winProbability': round(float(outcome['win_probability'][row]), 4),
+        'mean': round(float(outcome['mean'][row]), 2),
+        'stdDev': round(float(outcome['std'][row]), 2),
+        'percentiles': {name: round(float(values[row]), 1) for name, values in outcome['percentiles'].items()},
+    } for row in order]
+    info = {
+        'simulations': simulations,
+        'seed': outcome['seed'],
+        'players': len(player_ids),
+        'prepareMs': round((prepared - started) * 1000, 1),
+        'simulateMs': round((simulated - prepared) * 1000, 1),
+    }
+    return results, info
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Monte Carlo score distributions and win probabilities for a contest")
+    parser.add_argument('teams_file', help="Bulk-analysis CSV, JSON file, or '-' for JSON on stdin")
+    parser.add_argument('--match-date', help="Only history before this date is sampled (default: today)")
+    parser.add_argument('--teams', nargs=2, metavar=('TEAM_A', 'TEAM_B'),
+                        help="Fixture teams: limits players to their squads and weights samples by opponent")
+    parser.add_argument('--venue', help="Weight samples from this venue")
+    parser.add_argument('--simulations', type=int, default=10000, help="Number of simulated matches")
+    parser.add_argument('--seed', type=int, help="Random seed (a fresh one is drawn and reported when omitted)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Simulation processes; only worth raising on a multi-core machine")
+    parser.add_argument('--ruleset', default=DREAM11_T20_RULES['name'], help="player_match_points ruleset")
+    return parser.parse_args()
+
+def main():
+    """Main function"""
+    args = parse_args()
+    teams = read_teams(args.teams_file)
+    match_date = args.match_date or pd.Timestamp.today().strftime('%Y-%m-%d')
+
+    try:
+        engine = get_engine()
+        matcher = PlayerMatcher.from_database(engine)
+        resolved = resolve_teams(matcher, teams)
+        squad_teams = fetch_squad_teams(engine, args.teams, match_date) if args.teams else None
+        venue_id = None
+        if args.venue:
+            venue_id = NameIndexes.load_or_build(engine).venues.id_of(args.venue)
+            if venue_id is None:
+                raise ValueError(f"Unknown venue {args.venue}")
+
+        results, info = simulate_contest(teams, resolved, engine, match_date, args.simulations, args.seed,
+                                         args.workers, squad_teams, venue_id, args.ruleset)
+    except Exception as e:
+        logger.error(f"❌ Simulation failed: {e}")
+        return 1
+    finally:
+        dispose_engine()
+
+    logger.info(f"🎲 Simulated {info['simulations']:,} matches for {len(teams)} teams "
+                f"(seed {info['seed']}) in {info['simulateMs']} ms")
+    json.dump({'success': True, 'matchDate': match_date, 'teams': results, **info}, sys.stdout)
+    sys.stdout.write('\n')
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+
+from sqlalchemy import text
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Materialized views defined in schema.sql, each with a unique index for concurrent refresh
+MATERIALIZED_VIEWS = ['team_head_to_head', 'player_recent_form']
+
+def refresh_materialized_views(engine, views=MATERIALIZED_VIEWS):
+    """Refresh materialized views without blocking readers (CONCURRENTLY once populated)"""
+    with engine.connect() as conn:
+        populated = dict(conn.execute(
+            text("SELECT matviewname, ispopulated FROM pg_matviews WHERE matviewname = ANY(:views)"),
+            {"views": list(views)}
+        ).fetchall())
+    
+    for view in views:
+        if view not in populated:
+            logger.warning(f"⚠️ {view} is not a materialized view yet - re-apply schema.sql")
+            continue
+        
+        # CONCURRENTLY needs an already populated view
+        mode = "CONCURRENTLY " if populated[view] else ""
+        started = time.perf_counter()
+        with engine.connect() as conn:
+            conn.execute(text(f"REFRESH MATERIALIZED VIEW {mode}{view}"))
+            conn.commit()
+        logger.info(f"🔄 Refreshed {view} in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+
+import pandas as pd
+import numpy as np
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+import logging
+
+from sqlalchemy import text
+
+from db_engine import get_engine, dispose_engine
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "../data/cache/name_index.npz"
+
+# (kind, id column, name column, table)
+ENTITIES = [
+    ('players', 'player_id', 'player_name', 'players'),
+    ('teams', 'team_id', 'team_name', 'teams'),
+    ('venues', 'venue_id', 'venue_name', 'venues'),
+]
+
+NON_ALPHANUMERIC = re.compile(r"[^a-z0-9 ]+")
+WHITESPACE = re.compile(r"\s+")
+
+def normalize_name(name):
+    """Lowercase, strip accents and punctuation, collapse whitespace: 'M.S. Dhoni ' -> 'ms dhoni'"""
+    if name is None or (isinstance(name, float) and np.isnan(name)):
+        return ''
+    folded = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode('ascii').lower()
+    folded = NON_ALPHANUMERIC.sub('', folded.replace('-', ' '))
+    return WHITESPACE.sub(' ', folded).strip()
+
+def initials_key(name):
+    """Initials plus surname, so 'Virat Kohli' and 'V Kohli' share the key 'v kohli'.
+
+    Tokens of one or two letters are taken as initials already ('MS Dhoni' -> 'ms dhoni',
+    like 'Mahendra Singh Dhoni').
+    """
+    tokens = normalize_name(name).split(' ')
+    if len(tokens) < 2:
+        return None
+    initials = ''.join(token if len(token) <= 2 else token[0] for token in tokens[:-1])
+    return f"{initials} {tokens[-1]}"
+
+def pack_strings(values):
+    """Encode strings as one UTF-8 blob plus offsets"""
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum([len(value) for value in encoded])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+def unpack_strings(blob, offsets):
+    """Decode strings packed by pack_strings, interning them"""
+    raw = blob.tobytes()
+    return [sys.intern(raw[start:end].decode('utf-8')) for start, end in zip(offsets[:-1], offsets[1:])]
+
+def unique_keys(keys, ids):
+    """Map each key to its id, dropping keys shared by different ids"""
+    mapping = {}
+    ambiguous = set()
+    for key, entity_id in zip(keys, ids):
+        if not key or key in ambiguous:
+            continue
+        existing = mapping.setdefault(key, entity_id)
+        if existing != entity_id:
+            del mapping[key]
+            ambiguous.add(key)
+    return mapping
+
+class NameIndex:
+    """Array-backed id <-> name table with exact, normalized, alias and initials lookups"""
+
+    def __init__(self, ids, names, alias_ids=(), alias_names=()):
+        order = np.argsort(np.asarray(ids, dtype=np.int32), kind='stable')
+        self.ids = np.asarray(ids, dtype=np.int32)[order]
+        self.names = [sys.intern(str(names[i])) for i in order]
+        self.alias_ids = np.asarray(alias_ids, dtype=np.int32)
+        self.alias_names = [str(alias) for alias in alias_names]
+
+        ids_list = self.ids.tolist()
+        self.exact = dict(zip(self.names, ids_list))
+        self.alias_exact = dict(zip(self.alias_names, self.alias_ids.tolist()))
+        self.normalized = unique_keys([normalize_name(name) for name in self.names], ids_list)
+        self.aliases = unique_keys([normalize_name(alias) for alias in self.alias_names], self.alias_ids.tolist())
+        self.initials = unique_keys([initials_key(name) for name in self.names], ids_list)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def id_of(self, name):
+        """Resolve a name to an id, or None"""
+        found = self.exact.get(name)
+        if found is not None:
+            return found
+
+        key = normalize_name(name)
+        for table in (self.normalized, self.aliases):
+            found = table.get(key)
+            if found is not None:
+                return found
+        return self.initials.get(initials_key(name))
+
+    def exact_id_of(self, name):
+        """Resolve a name only by its exact spelling or an explicit alias, or None.
+
+        Loaders use this: a fuzzy hit on a name missing from the table would silently
+        attach the rows to another player.
+        """
+        found = self.exact.get(name)
+        if found is not None:
+            return found
+        return self.alias_exact.get(name)
+
+    def name_of(self, entity_id):
+        """Canonical name for an id, or None"""
+        position = np.searchsorted(self.ids, entity_id)
+        if position < len(self.ids) and self.ids[position] == entity_id:
+            return self.names[position]
+        return None
+
+    def resolve_many(self, names, exact=False):
+        """Resolve a sequence of names to a nullable Int32 array, looking up each distinct name once.
+        exact=True restricts matching to exact_id_of."""
+        codes, uniques = pd.factorize(pd.Series(names, dtype='object'), use_na_sentinel=True)
+        resolve = self.exact_id_of if exact else self.id_of
+        lookup = pd.array([resolve(name) for name in uniques], dtype='Int32')
+        return lookup.take(codes, allow_fill=True)
+
+    def as_dict(self):
+        """Exact name -> id mapping"""
+        return dict(self.exact)
+
+class NameIndexes:
+    """Player, team and venue indexes persisted together in one small .npz file"""
+
+    def __init__(self, indexes, fingerprint=None):
+        self.indexes = indexes
+        self.fingerprint = fingerprint or {}
+
+    def __getattr__(self, kind):
+        try:
+            return self.__dict__['indexes'][kind]
+        except KeyError:
+            raise AttributeError(kind)
+
+    @staticmethod
+    def database_fingerprint(engine):
+        """Row count, max id and a hash of the (id, name) pairs per table, so renames invalidate
+        the stored index too; the tables are small enough to hash on every check"""
+        with engine.connect() as conn:
+            has_aliases = conn.execute(text("SELECT to_regclass('player_aliases')")).scalar() is not None
+            parts = [
+                f"SELECT '{kind}' AS kind, COUNT(*) AS rows, COALESCE(MAX({id_col}), 0) AS max_id, "
+                f"COALESCE(md5(string_agg({id_col}::text || ':' || {name_col}, E'\\n' ORDER BY {id_col})), '') "
+                f"AS names_hash FROM {table}"
+                for kind, id_col, name_col, table in ENTITIES
+            ]
+            if has_aliases:
+                parts.append("SELECT 'aliases', COUNT(*), COALESCE(MAX(player_id), 0), "
+                             "COALESCE(md5(string_agg(player_id::text || ':' || alias_name, E'\\n' "
+                             "ORDER BY alias_name)), '') FROM player_aliases")
+            rows = conn.execute(text(" UNION ALL ".join(parts))).fetchall()
+        return {kind: [int(count), int(max_id), names_hash] for kind, count, max_id, names_hash in rows}
+
+    @classmethod
+    def build(cls, engine):
+        """Read the id/name tables (and player_aliases when present) into indexes"""
+        fingerprint = cls.database_fingerprint(engine)
+        indexes = {}
+        for kind, id_col, name_col, table in ENTITIES:
+            frame = pd.read_sql(f"SELECT {id_col} AS id, {name_col} AS name FROM {table}", engine)
+            aliases = pd.DataFrame(columns=['id', 'name'])
+            if kind == 'players' and 'aliases' in fingerprint:
+                aliases = pd.read_sql("SELECT player_id AS id, alias_name AS name FROM player_aliases", engine)
+            indexes[kind] = NameIndex(frame['id'], frame['name'], aliases['id'], aliases['name'])
+        return cls(indexes, fingerprint)
+
+    def save(self, path=INDEX_FILE):
+        """Persist ids and packed names; written to a temp file and swapped in"""
+        arrays = {'fingerprint': np.frombuffer(json.dumps(self.fingerprint).encode('utf-8'), dtype=np.uint8)}
+        for kind, index in self.indexes.items():
+            arrays[f"{kind}_ids"] = index.ids
+            arrays[f"{kind}_names"], arrays[f"{kind}_offsets"] = pack_strings(index.names)
+            arrays[f"{kind}_alias_ids"] = index.alias_ids
+            arrays[f"{kind}_alias_names"], arrays[f"{kind}_alias_offsets"] = pack_strings(index.alias_names)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        staging_path = path + '.tmp.npz'
+        np.savez(staging_path, **arrays)
+        os.replace(staging_path, path)
+
+    @classmethod
+    def load(cls, path=INDEX_FILE):
+        """Load a persisted index file"""
+        with np.load(path, allow_pickle=False) as data:
+            fingerprint = json.loads(data['fingerprint'].tobytes().decode('utf-8'))
+            indexes = {
+                kind: NameIndex(
+                    data[f"{kind}_ids"],
+                    unpack_strings(data[f"{kind}_names"], data[f"{kind}_offsets"]),
+                    data[f"{kind}_alias_ids"],
+                    unpack_strings(data[f"{kind}_alias_names"], data[f"{kind}_alias_offsets"]),
+                )
+                for kind, _, _, _ in ENTITIES
+            }
+        return cls(indexes, fingerprint)
+
+    @classmethod
+    def load_or_build(cls, engine, path=INDEX_FILE, rebuild=False):
+        """Load the persisted index, rebuilding it when the tables changed since it was written"""
+        if not rebuild and os.path.exists(path):
+            try:
+                cached = cls.load(path)
+                if cached.fingerprint == cls.database_fingerprint(engine):
+                    return cached
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"⚠️ Ignoring unreadable name index {path}: {e}")
+
+        started = time.perf_counter()
+        built = cls.build(engine)
+        built.save(path)
+        logger.info(f"📇 Built name index ({', '.join(f'{len(index)} {kind}' for kind, index in built.indexes.items())}) "
+                    f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return built
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Build the player/team/venue name index and resolve names")
+    parser.add_argument('names', nargs='*', help="Player names to resolve")
+    parser.add_argument('--rebuild', action='store_true', help="Rebuild even if the stored index is current")
+    args = parser.parse_args()
+
+    try:
+        indexes = NameIndexes.load_or_build(get_engine(), rebuild=args.rebuild)
+    finally:
+        dispose_engine()
+
+    started = time.perf_counter()
+    loaded = NameIndexes.load()
+    logger.info(f"⚡ Loaded name index in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    for name in args.names:
+        player_id = indexes.players.id_of(name)
+        resolved = indexes.players.name_of(player_id) if player_id is not None else None
+        print(f"{name} -> {resolved} ({player_id})")
+
+    return 0 if loaded.fingerprint == indexes.fingerprint else 1
+
+if __name__ == "__main__":
+    exit(main())
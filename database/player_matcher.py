@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+
+import pandas as pd
+import numpy as np
+import argparse
+import json
+import sys
+import time
+import logging
+
+from sqlalchemy import text
+
+from db_engine import get_engine, dispose_engine
+from name_index import NameIndexes, normalize_name, initials_key
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Same thresholds as validatePlayers in backend/services/validationService.js
+AUTO_REPLACE_SIMILARITY = 0.85
+SUGGESTION_SIMILARITY = 0.3
+MAX_SUGGESTIONS = 5
+
+# Trigram candidates re-ranked by edit distance per distinct input name
+RERANK_CANDIDATES = 25
+
+# Names resolved by the normalized / alias / initials keys rather than exactly
+INDEX_MATCH_CONFIDENCE = 0.95
+
+# Initials-form matches ('j bumrah' vs 'jj bumrah') lose the first names, so count for less
+INITIALS_WEIGHT = 0.9
+
+def trigrams(normalized):
+    """Distinct character trigrams of a normalized name, padded so word starts and ends count"""
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def encode_names(names):
+    """Pad normalized (ASCII) names into a uint8 matrix plus their lengths"""
+    lengths = np.array([len(name) for name in names], dtype=np.int32)
+    width = max(int(lengths.max(initial=0)), 1)
+    padded = b''.join(name.encode('ascii').ljust(width, b'\0') for name in names)
+    return np.frombuffer(padded, dtype=np.uint8).reshape(len(names), width), lengths
+
+def take_rows(encoded, rows):
+    """Select rows of an encode_names() result"""
+    codes, lengths = encoded
+    return codes[rows], lengths[rows]
+
+def batch_similarity(left, right):
+    """calculateSimilarity from the backend, (longer - edit distance) / longer, for many pairs at once.
+
+    left and right are encode_names() results with one row per pair. The Levenshtein table
+    is filled one cell at a time for all pairs together, so the Python loop runs
+    len(longest) ** 2 times however many pairs there are.
+    """
+    a, a_len = left
+    b, b_len = right
+    pairs = np.arange(len(a))
+
+    previous = np.tile(np.arange(b.shape[1] + 1, dtype=np.int32), (len(a), 1))
+    distance = b_len.copy()  # empty left names
+    for i in range(1, a.shape[1] + 1):
+        current = np.empty_like(previous)
+        current[:, 0] = i
+        for j in range(1, b.shape[1] + 1):
+            substitution = previous[:, j - 1] + (a[:, i - 1] != b[:, j - 1])
+            current[:, j] = np.minimum(substitution, np.minimum(previous[:, j], current[:, j - 1]) + 1)
+        finished = a_len == i
+        distance[finished] = current[pairs[finished], b_len[finished]]
+        previous = current
+
+    longer = np.maximum(a_len, b_len)
+    return np.where(longer > 0, (longer - distance) / np.maximum(longer, 1), 1.0)
+
+def is_missing_name(name):
+    """Blank slots and OCR placeholders are reported as missing, not matched"""
+    return name is None or not str(name).strip() or '(Missing)' in str(name)
+
+class PlayerMatcher:
+    """Trigram inverted index over player names and aliases with edit-distance re-ranking"""
+
+    def __init__(self, players_index):
+        self.index = players_index
+
+        # One entry per searchable spelling: canonical names first, then aliases
+        self.entry_ids = np.concatenate([players_index.ids, players_index.alias_ids]).astype(np.int32)
+        self.entry_names = [normalize_name(name) for name in players_index.names + players_index.alias_names]
+        self.entry_codes = encode_names(self.entry_names)
+        self.entry_initial_codes = encode_names([initials_key(name) or name for name in self.entry_names])
+        entry_trigrams = [trigrams(name) for name in self.entry_names]
+        self.entry_sizes = np.array([len(grams) for grams in entry_trigrams], dtype=np.int32)
+
+        postings = {}
+        for position, grams in enumerate(entry_trigrams):
+            for gram in grams:
+                postings.setdefault(gram, []).append(position)
+        self.postings = {gram: np.array(positions, dtype=np.int32) for gram, positions in postings.items()}
+
+    @classmethod
+    def from_database(cls, engine, rebuild=False):
+        """Build the matcher from the persisted name index"""
+        return cls(NameIndexes.load_or_build(engine, rebuild=rebuild).players)
+
+    def candidates(self, normalized, allowed=None, limit=RERANK_CANDIDATES):
+        """Entry positions ranked by trigram Dice coefficient"""
+        grams = trigrams(normalized)
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not hits:
+            return np.empty(0, dtype=np.int32)
+
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.entry_ids))
+        scores = 2.0 * shared / (len(grams) + self.entry_sizes)
+        if allowed is not None:
+            scores[~allowed] = 0.0
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > limit:
+            matched = matched[np.argpartition(scores[matched], -limit)[-limit:]]
+        return matched[np.argsort(-scores[matched], kind='stable')]
+
+    def suggest_many(self, names, allowed=None, limit=MAX_SUGGESTIONS):
+        """Best-scoring distinct players per name as lists of (player_id, similarity).
+
+        Candidates come from the trigram index; every (name, candidate) pair of the batch
+        is then scored in one vectorized edit-distance pass, on the full names and on their
+        initials forms ('Jasprit Bumrah' vs 'JJ Bumrah'), the latter weighted down.
+        """
+        pair_names, pair_positions = [], []
+        for row, name in enumerate(names):
+            positions = self.candidates(normalize_name(name), allowed)
+            pair_names.extend([row] * len(positions))
+            pair_positions.extend(positions.tolist())
+        if not pair_positions:
+            return [[] for _ in names]
+
+        normalized = [normalize_name(name) for name in names]
+        query_codes = encode_names(normalized)
+        query_initial_codes = encode_names([initials_key(name) or name for name in normalized])
+
+        rows, positions = np.array(pair_names), np.array(pair_positions)
+        full = batch_similarity(take_rows(query_codes, rows), take_rows(self.entry_codes, positions))
+        short = batch_similarity(take_rows(query_initial_codes, rows), take_rows(self.entry_initial_codes, positions))
+        scores = np.maximum(full, short * INITIALS_WEIGHT)
+
+        pairs = pd.DataFrame({
+            'row': rows,
+            'player_id': self.entry_ids[positions],
+            'similarity': scores,
+        })
+        pairs = pairs[pairs['similarity'] > SUGGESTION_SIMILARITY]
+        best = (pairs.sort_values(['row', 'similarity', 'player_id'], ascending=[True, False, True])
+                     .drop_duplicates(['row', 'player_id'])
+                     .groupby('row').head(limit))
+
+        suggestions = [[] for _ in names]
+        for row, player_id, score in best.itertuples(index=False):
+            suggestions[row].append((int(player_id), float(score)))
+        return suggestions
+
+    def allowed_mask(self, player_ids):
+        """Boolean mask over index entries limited to the given player ids"""
+        return np.isin(self.entry_ids, np.fromiter(player_ids, dtype=np.int32))
+
+    def match_names(self, names, allowed=None):
+        """Validation result per submitted name: missing, index hit, auto-replaced or suggestions"""
+        results = {}
+        fuzzy = []
+        for name in names:
+            if is_missing_name(name):
+                results[name] = {'inputName': name, 'validatedName': None, 'playerId': None, 'isValid': False,
+                                 'confidence': 0, 'suggestions': [], 'isMissing': True}
+                continue
+
+            trimmed = str(name).strip()
+            player_id = self.index.id_of(trimmed)
+            if player_id is not None and (allowed is None or allowed[self.entry_ids == player_id].any()):
+                validated = self.index.name_of(player_id)
+                results[name] = {'inputName': name, 'validatedName': validated, 'playerId': player_id,
+                                 'isValid': True,
+                                 'confidence': 1.0 if validated == trimmed else INDEX_MATCH_CONFIDENCE}
+            else:
+                fuzzy.append(name)
+
+        for name, suggestions in zip(fuzzy, self.suggest_many([str(name).strip() for name in fuzzy], allowed)):
+            if suggestions and suggestions[0][1] >= AUTO_REPLACE_SIMILARITY:
+                best_id, score = suggestions[0]
+                results[name] = {'inputName': name, 'validatedName': self.index.name_of(best_id),
+                                 'playerId': best_id, 'isValid': True, 'confidence': round(score, 4),
+                                 'autoReplaced': True}
+            else:
+                results[name] = {
+                    'inputName': name, 'validatedName': None, 'playerId': None, 'isValid': False,
+                    'confidence': 0,
+                    'suggestions': [
+                        {'playerId': player_id, 'playerName': self.index.name_of(player_id),
+                         'similarity': round(score, 4)}
+                        for player_id, score in suggestions
+                    ],
+                }
+        return results
+
+    def match_teams(self, teams, squad_ids=None):
+        """Validate many teams at once; each distinct name is matched once across all teams.
+
+        teams is a list of {'teamName', 'players'} dicts; squad_ids optionally limits
+        matches to the players of the fixture's squads.
+        """
+        allowed = self.allowed_mask(squad_ids) if squad_ids is not None else None
+
+        distinct = pd.unique(pd.Series([name for team in teams for name in team['players']], dtype='object'))
+        results = self.match_names(distinct, allowed)
+
+        validated = []
+        for team in teams:
+            players = [results[name] for name in team['players']]
+            valid = sum(1 for player in players if player['isValid'])
+            missing = sum(1 for player in players if player.get('isMissing'))
+            validated.append({
+                'teamName': team['teamName'],
+                'totalPlayers': len(players),
+                'validPlayers': valid,
+                'invalidPlayers': len(players) - valid - missing,
+                'missingPlayers': missing,
+                'requiresCorrection': valid < len(players),
+                'validationResults': players,
+            })
+        return validated, len(distinct)
+
+def fetch_squad_teams(engine, team_names, match_date):
+    """Team ids in team_names order and player_id -> team_id for the fixture's squads as of the
+    match date (get_team_squad_as_of)"""
+    with engine.connect() as conn:
+        ids_by_name = dict(conn.execute(
+            text("SELECT team_name, team_id FROM teams WHERE team_name = ANY(:names)"), {"names": list(team_names)}
+        ).fetchall())
+        if len(ids_by_name) != len(team_names):
+            raise ValueError(f"Unknown team in {team_names}")
+        team_ids = [ids_by_name[name] for name in team_names]
+        rows = conn.execute(
+            text("SELECT player_id, team_id FROM get_team_squad_as_of(:team_ids, :match_date)"),
+            {"team_ids": team_ids, "match_date": match_date}
+        )
+        return team_ids, {player_id: team_id for player_id, team_id in rows}
+
+def fetch_squad_ids(engine, team_names, match_date):
+    """Player ids in the fixture's squads as of the match date (get_team_squad_as_of)"""
+    return set(fetch_squad_teams(engine, team_names, match_date)[1])
+
+def split_players(cell):
+    """Comma separated player list from a bulk CSV cell"""
+    return [name.strip() for name in str(cell).split(',')] if pd.notna(cell) else []
+
+def read_teams(path):
+    """Teams from a bulk-analysis CSV (TeamName, Players, Captain, ViceCaptain) or JSON
+    ([{teamName, players, captain, viceCaptain}]); '-' reads JSON from stdin"""
+    if path == '-' or path.endswith('.json'):
+        handle = sys.stdin if path == '-' else open(path)
+        with handle:
+            payload = json.load(handle)
+        teams = payload.get('teams', payload) if isinstance(payload, dict) else payload
+        return [{'teamName': team.get('teamName', f"Team {i + 1}"), 'players': list(team['players']),
+                 'captain': team.get('captain'), 'viceCaptain': team.get('viceCaptain')}
+                for i, team in enumerate(teams)]
+
+    frame = pd.read_csv(path, dtype=str)
+    frame = frame.reindex(columns=frame.columns.union(['Captain', 'ViceCaptain'], sort=False))
+    return [{'teamName': row['TeamName'], 'players': split_players(row['Players']),
+             'captain': row['Captain'] if pd.notna(row['Captain']) else None,
+             'viceCaptain': row['ViceCaptain'] if pd.notna(row['ViceCaptain']) else None}
+            for _, row in frame.iterrows()]
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Validate player names of many teams in one pass")
+    parser.add_argument('teams_file', help="Bulk-analysis CSV, JSON file, or '-' for JSON on stdin")
+    parser.add_argument('--teams', nargs=2, metavar=('TEAM_A', 'TEAM_B'),
+                        help="Only match players in these teams' squads (as validatePlayers does)")
+    parser.add_argument('--match-date', help="Squad reference date for --teams (default: today)")
+    parser.add_argument('--rebuild-index', action='store_true', help="Rebuild the name index first")
+    return parser.parse_args()
+
+def main():
+    """Main function"""
+    args = parse_args()
+    teams = read_teams(args.teams_file)
+
+    try:
+        engine = get_engine()
+        matcher = PlayerMatcher.from_database(engine, rebuild=args.rebuild_index)
+        squad_ids = None
+        if args.teams:
+            squad_ids = fetch_squad_ids(engine, args.teams,
+                                        args.match_date or pd.Timestamp.today().strftime('%Y-%m-%d'))
+    except Exception as e:
+        logger.error(f"❌ Could not build the player matcher: {e}")
+        return 1
+    finally:
+        dispose_engine()
+
+    started = time.perf_counter()
+    results, distinct = matcher.match_teams(teams, squad_ids)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.info(f"⚡ Validated {len(teams)} teams ({distinct} distinct names) in {elapsed_ms:.0f} ms")
+
+    json.dump({'success': True, 'teams': results, 'distinctNames': distinct,
+               'elapsedMs': round(elapsed_ms, 1)}, sys.stdout)
+    sys.stdout.write('\n')
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
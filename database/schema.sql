@@ -65,6 +65,7 @@ CREATE TABLE IF NOT EXISTS ball_by_ball (
     team_id INTEGER REFERENCES teams(team_id),
     over_number INTEGER NOT NULL,
     ball_number INTEGER NOT NULL,
+    delivery_seq SMALLINT NOT NULL DEFAULT 0, -- orders repeated ball numbers (wides, no-balls)
     batsman_id INTEGER REFERENCES players(player_id),
     non_striker_id INTEGER REFERENCES players(player_id),
     bowler_id INTEGER REFERENCES players(player_id),
@@ -82,6 +83,30 @@ CREATE TABLE IF NOT EXISTS ball_by_ball (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Unlogged staging table for COPY-based bulk loads (final_fix.py --staging)
+CREATE UNLOGGED TABLE IF NOT EXISTS ball_by_ball_staging (
+    match_id INTEGER,
+    innings INTEGER,
+    team_id INTEGER,
+    over_number INTEGER,
+    ball_number INTEGER,
+    delivery_seq SMALLINT,
+    batsman_id INTEGER,
+    non_striker_id INTEGER,
+    bowler_id INTEGER,
+    batsman_runs INTEGER,
+    extras INTEGER,
+    total_runs INTEGER,
+    wides INTEGER,
+    noballs INTEGER,
+    byes INTEGER,
+    legbyes INTEGER,
+    is_wicket BOOLEAN,
+    player_out_id INTEGER,
+    dismissal_kind VARCHAR(50),
+    fielders VARCHAR(200)
+);
+
 -- ==============================================
 -- PLAYER MATCH STATISTICS TABLE
 -- ==============================================
@@ -90,6 +115,7 @@ CREATE TABLE IF NOT EXISTS player_match_stats (
     match_id INTEGER REFERENCES matches(match_id),
     player_id INTEGER REFERENCES players(player_id),
     team_id INTEGER REFERENCES teams(team_id),
+    match_date DATE, -- copied from matches so form lookups stay on one index
     
     -- Batting Stats
     runs_scored INTEGER DEFAULT 0,
@@ -116,6 +142,43 @@ CREATE TABLE IF NOT EXISTS player_match_stats (
     UNIQUE(match_id, player_id)
 );
 
+-- ==============================================
+-- INNINGS SUMMARY TABLE
+-- ==============================================
+-- One row per (match, innings), maintained by final_fix.py so winners, venue stats and
+-- head-to-head read ~2 rows per match instead of summing every delivery.
+-- Powerplay is the first 6 overs and the death phase the last 5 of each innings.
+CREATE TABLE IF NOT EXISTS innings_summary (
+    match_id INTEGER REFERENCES matches(match_id),
+    innings SMALLINT NOT NULL,
+    team_id INTEGER REFERENCES teams(team_id),
+    runs INTEGER NOT NULL DEFAULT 0,
+    wickets SMALLINT NOT NULL DEFAULT 0,
+    legal_balls SMALLINT NOT NULL DEFAULT 0,
+    extras SMALLINT NOT NULL DEFAULT 0,
+    powerplay_runs INTEGER NOT NULL DEFAULT 0,
+    powerplay_wickets SMALLINT NOT NULL DEFAULT 0,
+    death_runs INTEGER NOT NULL DEFAULT 0,
+    death_wickets SMALLINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (match_id, innings)
+);
+
+-- ==============================================
+-- PLAYER TEAM HISTORY TABLE
+-- ==============================================
+-- Season-level team membership, populated by fix_player_teams.py
+CREATE TABLE IF NOT EXISTS player_team_history (
+    player_id INTEGER REFERENCES players(player_id),
+    season INTEGER NOT NULL,
+    team_id INTEGER REFERENCES teams(team_id),
+    matches_played INTEGER DEFAULT 0,
+    deliveries INTEGER DEFAULT 0,
+    first_match_date DATE NOT NULL,
+    last_match_date DATE NOT NULL,
+    PRIMARY KEY (player_id, season, team_id)
+);
+
 -- ==============================================
 -- VENUE STATISTICS TABLE
 -- ==============================================
@@ -141,9 +204,19 @@ CREATE INDEX IF NOT EXISTS idx_ball_by_ball_match_id ON ball_by_ball(match_id);
 CREATE INDEX IF NOT EXISTS idx_ball_by_ball_batsman_id ON ball_by_ball(batsman_id);
 CREATE INDEX IF NOT EXISTS idx_ball_by_ball_bowler_id ON ball_by_ball(bowler_id);
 CREATE INDEX IF NOT EXISTS idx_ball_by_ball_team_id ON ball_by_ball(team_id);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_ball_by_ball_delivery
+    ON ball_by_ball(match_id, innings, over_number, ball_number, delivery_seq);
+
+-- Innings summary indexes
+CREATE INDEX IF NOT EXISTS idx_innings_summary_team_id ON innings_summary(team_id);
 
 -- Player match stats indexes
-CREATE INDEX IF NOT EXISTS idx_player_match_stats_player_id ON player_match_stats(player_id);
+-- Covering index for the form functions: a player's rows newest first, stats read from the index
+ALTER TABLE player_match_stats ADD COLUMN IF NOT EXISTS match_date DATE;
+DROP INDEX IF EXISTS idx_player_match_stats_player_id;
+CREATE INDEX IF NOT EXISTS idx_player_match_stats_player_date
+    ON player_match_stats(player_id, match_date DESC)
+    INCLUDE (match_id, runs_scored, balls_faced, strike_rate, overs_bowled, runs_conceded, wickets_taken, economy_rate);
 CREATE INDEX IF NOT EXISTS idx_player_match_stats_match_id ON player_match_stats(match_id);
 CREATE INDEX IF NOT EXISTS idx_player_match_stats_team_id ON player_match_stats(team_id);
 
@@ -157,6 +230,10 @@ CREATE INDEX IF NOT EXISTS idx_matches_team2_id ON matches(team2_id);
 CREATE INDEX IF NOT EXISTS idx_players_name ON players(player_name);
 CREATE INDEX IF NOT EXISTS idx_players_team_id ON players(team_id);
 
+-- Player team history indexes (squad lookups by team and season)
+CREATE INDEX IF NOT EXISTS idx_player_team_history_team_season
+    ON player_team_history(team_id, season, first_match_date) INCLUDE (player_id, matches_played);
+
 -- ==============================================
 -- INITIAL DATA INSERTS
 -- ==============================================
@@ -179,8 +256,19 @@ ON CONFLICT (team_name) DO NOTHING;
 -- VIEWS FOR COMMON QUERIES
 -- ==============================================
 
--- Player recent form view (last 30 days)
-CREATE OR REPLACE VIEW player_recent_form AS
+-- Earlier versions created these as plain views; replace them with materialized views
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'player_recent_form' AND relkind = 'v') THEN
+        DROP VIEW player_recent_form;
+    END IF;
+    IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'team_head_to_head' AND relkind = 'v') THEN
+        DROP VIEW team_head_to_head;
+    END IF;
+END $$;
+
+-- Player recent form (last 30 days as of the latest refresh)
+CREATE MATERIALIZED VIEW IF NOT EXISTS player_recent_form AS
 SELECT 
     p.player_id,
     p.player_name,
@@ -199,23 +287,35 @@ JOIN matches m ON pms.match_id = m.match_id
 WHERE m.match_date >= CURRENT_DATE - INTERVAL '30 days'
 GROUP BY p.player_id, p.player_name, p.role, t.team_name;
 
--- Team head to head view
-CREATE OR REPLACE VIEW team_head_to_head AS
+-- Unique indexes are required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS uq_player_recent_form_player ON player_recent_form(player_id);
+
+-- Team head to head per venue; one innings_summary row per team and match, so nothing fans out
+CREATE MATERIALIZED VIEW IF NOT EXISTS team_head_to_head AS
+WITH team_scores AS (
+    -- Regular innings only; super overs do not count towards a team's score
+    SELECT match_id, team_id, runs
+    FROM innings_summary
+    WHERE innings <= 2
+)
 SELECT 
     t1.team_name as team1,
     t2.team_name as team2,
     COUNT(*) as total_matches,
     v.venue_name,
-    AVG(CASE WHEN m.team1_id = t1.team_id THEN pms1.runs_scored END) as team1_avg_score,
-    AVG(CASE WHEN m.team2_id = t2.team_id THEN pms2.runs_scored END) as team2_avg_score
+    AVG(s1.runs) as team1_avg_score,
+    AVG(s2.runs) as team2_avg_score
 FROM matches m
 JOIN teams t1 ON m.team1_id = t1.team_id
 JOIN teams t2 ON m.team2_id = t2.team_id
 JOIN venues v ON m.venue_id = v.venue_id
-LEFT JOIN player_match_stats pms1 ON m.match_id = pms1.match_id AND pms1.team_id = t1.team_id
-LEFT JOIN player_match_stats pms2 ON m.match_id = pms2.match_id AND pms2.team_id = t2.team_id
+LEFT JOIN team_scores s1 ON m.match_id = s1.match_id AND s1.team_id = m.team1_id
+LEFT JOIN team_scores s2 ON m.match_id = s2.match_id AND s2.team_id = m.team2_id
 GROUP BY t1.team_name, t2.team_name, v.venue_name;
 
+-- Serves both the concurrent refresh and (team1, team2[, venue]) lookups from the API
+CREATE UNIQUE INDEX IF NOT EXISTS uq_team_head_to_head_teams_venue ON team_head_to_head(team1, team2, venue_name);
+
 -- ==============================================
 -- FUNCTIONS FOR COMMON CALCULATIONS
 -- ==============================================
@@ -347,6 +447,224 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Batch form functions: last N rows for many players in one call (a whole team or squad).
+-- ROW_NUMBER() ranks each player's matches newest first on idx_player_match_stats_player_date.
+CREATE OR REPLACE FUNCTION get_players_batting_form(
+    p_player_ids INTEGER[],
+    p_matches INTEGER DEFAULT 5,
+    p_reference_date DATE DEFAULT CURRENT_DATE
+)
+RETURNS TABLE(
+    player_id INTEGER,
+    form_rank INTEGER,
+    match_id INTEGER,
+    match_date DATE,
+    runs INTEGER,
+    balls_faced INTEGER,
+    strike_rate DECIMAL(5,2),
+    venue_name VARCHAR(200),
+    days_ago INTEGER
+) AS $$
+BEGIN
+    RETURN QUERY
+    WITH ranked AS (
+        SELECT 
+            pms.player_id,
+            pms.match_id,
+            pms.match_date,
+            pms.runs_scored,
+            pms.balls_faced,
+            pms.strike_rate,
+            ROW_NUMBER() OVER (PARTITION BY pms.player_id ORDER BY pms.match_date DESC, pms.match_id DESC) AS rn
+        FROM player_match_stats pms
+        WHERE pms.player_id = ANY(p_player_ids)
+        AND pms.match_date < p_reference_date  -- Only matches before the reference date
+        AND pms.runs_scored > 0  -- Only matches where player actually batted
+    )
+    SELECT 
+        r.player_id,
+        r.rn::INTEGER,
+        r.match_id,
+        r.match_date,
+        r.runs_scored,
+        r.balls_faced,
+        r.strike_rate,
+        v.venue_name,
+        (p_reference_date - r.match_date) as days_ago
+    FROM ranked r
+    JOIN matches m ON r.match_id = m.match_id
+    JOIN venues v ON m.venue_id = v.venue_id
+    WHERE r.rn <= p_matches
+    ORDER BY r.player_id, r.rn;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION get_players_bowling_form(
+    p_player_ids INTEGER[],
+    p_matches INTEGER DEFAULT 5,
+    p_reference_date DATE DEFAULT CURRENT_DATE
+)
+RETURNS TABLE(
+    player_id INTEGER,
+    form_rank INTEGER,
+    match_id INTEGER,
+    match_date DATE,
+    overs_bowled DECIMAL(3,1),
+    runs_conceded INTEGER,
+    wickets INTEGER,
+    economy_rate DECIMAL(4,2),
+    venue_name VARCHAR(200),
+    days_ago INTEGER
+) AS $$
+BEGIN
+    RETURN QUERY
+    WITH ranked AS (
+        SELECT 
+            pms.player_id,
+            pms.match_id,
+            pms.match_date,
+            pms.overs_bowled,
+            pms.runs_conceded,
+            pms.wickets_taken,
+            pms.economy_rate,
+            ROW_NUMBER() OVER (PARTITION BY pms.player_id ORDER BY pms.match_date DESC, pms.match_id DESC) AS rn
+        FROM player_match_stats pms
+        WHERE pms.player_id = ANY(p_player_ids)
+        AND pms.match_date < p_reference_date  -- Only matches before the reference date
+        AND pms.overs_bowled > 0  -- Only matches where player actually bowled
+    )
+    SELECT 
+        r.player_id,
+        r.rn::INTEGER,
+        r.match_id,
+        r.match_date,
+        r.overs_bowled,
+        r.runs_conceded,
+        r.wickets_taken,
+        r.economy_rate,
+        v.venue_name,
+        (p_reference_date - r.match_date) as days_ago
+    FROM ranked r
+    JOIN matches m ON r.match_id = m.match_id
+    JOIN venues v ON m.venue_id = v.venue_id
+    WHERE r.rn <= p_matches
+    ORDER BY r.player_id, r.rn;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Form summary over each player's last N appearances; players without a team keep a NULL team_name
+CREATE OR REPLACE FUNCTION get_players_form_summary(
+    p_player_ids INTEGER[],
+    p_reference_date DATE DEFAULT CURRENT_DATE,
+    p_last_matches INTEGER DEFAULT 5
+)
+RETURNS TABLE(
+    player_id INTEGER,
+    player_name VARCHAR(100),
+    role VARCHAR(50),
+    team_name VARCHAR(100),
+    matches_played INTEGER,
+    avg_runs DECIMAL(5,2),
+    avg_strike_rate DECIMAL(5,2),
+    avg_wickets DECIMAL(5,2),
+    avg_economy DECIMAL(5,2),
+    last_match_date DATE,
+    days_since_last_match INTEGER,
+    form_rating VARCHAR(20)
+) AS $$
+BEGIN
+    RETURN QUERY
+    WITH ranked AS (
+        SELECT 
+            pms.player_id,
+            pms.match_date,
+            pms.runs_scored,
+            pms.strike_rate,
+            pms.wickets_taken,
+            pms.economy_rate,
+            ROW_NUMBER() OVER (PARTITION BY pms.player_id ORDER BY pms.match_date DESC, pms.match_id DESC) AS rn
+        FROM player_match_stats pms
+        WHERE pms.player_id = ANY(p_player_ids)
+        AND pms.match_date < p_reference_date
+    ),
+    recent AS (
+        SELECT 
+            r.player_id,
+            COUNT(*)::INTEGER as matches_played,
+            AVG(r.runs_scored) as avg_runs,
+            AVG(r.strike_rate) as avg_strike_rate,
+            AVG(r.wickets_taken) as avg_wickets,
+            AVG(r.economy_rate) as avg_economy,
+            MAX(r.match_date) as last_match_date
+        FROM ranked r
+        WHERE r.rn <= p_last_matches
+        GROUP BY r.player_id
+    )
+    SELECT 
+        p.player_id,
+        p.player_name,
+        p.role,
+        t.team_name,
+        rc.matches_played,
+        rc.avg_runs::DECIMAL(5,2),
+        rc.avg_strike_rate::DECIMAL(5,2),
+        rc.avg_wickets::DECIMAL(5,2),
+        rc.avg_economy::DECIMAL(5,2),
+        rc.last_match_date,
+        (p_reference_date - rc.last_match_date)::INTEGER as days_since_last_match,
+        (CASE 
+            WHEN rc.avg_runs > 30 OR rc.avg_wickets > 1 THEN 'Excellent'
+            WHEN rc.avg_runs > 20 OR rc.avg_wickets > 0.5 THEN 'Good'
+            WHEN rc.avg_runs > 10 OR rc.avg_wickets > 0.2 THEN 'Average'
+            ELSE 'Poor'
+        END)::VARCHAR(20) as form_rating
+    FROM recent rc
+    JOIN players p ON p.player_id = rc.player_id
+    LEFT JOIN teams t ON p.team_id = t.team_id
+    ORDER BY p.player_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function to get each team's squad as of a date (latest season that started before it)
+CREATE OR REPLACE FUNCTION get_team_squad_as_of(
+    p_team_ids INTEGER[],
+    p_reference_date DATE DEFAULT CURRENT_DATE
+)
+RETURNS TABLE(
+    player_id INTEGER,
+    player_name VARCHAR(100),
+    role VARCHAR(50),
+    team_id INTEGER,
+    season INTEGER,
+    matches_played INTEGER,
+    last_match_date DATE
+) AS $$
+BEGIN
+    RETURN QUERY
+    WITH latest_season AS (
+        SELECT h.team_id, MAX(h.season) AS season
+        FROM player_team_history h
+        WHERE h.team_id = ANY(p_team_ids)
+        AND h.first_match_date < p_reference_date
+        GROUP BY h.team_id
+    )
+    SELECT 
+        p.player_id,
+        p.player_name,
+        p.role,
+        h.team_id,
+        h.season,
+        h.matches_played,
+        h.last_match_date
+    FROM latest_season ls
+    JOIN player_team_history h ON h.team_id = ls.team_id AND h.season = ls.season
+    JOIN players p ON p.player_id = h.player_id
+    WHERE h.first_match_date < p_reference_date
+    AND p.is_active = true
+    ORDER BY h.team_id, h.matches_played DESC;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Function to get team vs team performance at a venue before a specific date
 CREATE OR REPLACE FUNCTION get_team_vs_team_stats(
     p_team1_name VARCHAR(100),
@@ -413,8 +731,9 @@ CREATE OR REPLACE FUNCTION update_player_match_stats()
 RETURNS TRIGGER AS $$
 BEGIN
     -- Update batting stats for the batsman
-    INSERT INTO player_match_stats (match_id, player_id, team_id, runs_scored, balls_faced)
-    VALUES (NEW.match_id, NEW.batsman_id, NEW.team_id, NEW.batsman_runs, 1)
+    INSERT INTO player_match_stats (match_id, player_id, team_id, match_date, runs_scored, balls_faced)
+    VALUES (NEW.match_id, NEW.batsman_id, NEW.team_id,
+            (SELECT m.match_date FROM matches m WHERE m.match_id = NEW.match_id), NEW.batsman_runs, 1)
     ON CONFLICT (match_id, player_id) DO UPDATE SET
         runs_scored = player_match_stats.runs_scored + NEW.batsman_runs,
         balls_faced = player_match_stats.balls_faced + 1,
@@ -428,12 +747,239 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
--- Create trigger
+-- Create trigger (dropped first so schema.sql can be re-applied)
+DROP TRIGGER IF EXISTS trigger_update_player_match_stats ON ball_by_ball;
 CREATE TRIGGER trigger_update_player_match_stats
     AFTER INSERT ON ball_by_ball
     FOR EACH ROW
     EXECUTE FUNCTION update_player_match_stats();
 
+-- Queue of matches whose player_match_stats need recomputing (final_fix.py --incremental)
+CREATE TABLE IF NOT EXISTS stats_dirty_matches (
+    match_id INTEGER PRIMARY KEY,
+    marked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Mark matches dirty once per statement, so COPY and bulk INSERTs stay cheap
+CREATE OR REPLACE FUNCTION mark_stats_dirty_inserted()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO stats_dirty_matches (match_id)
+    SELECT DISTINCT match_id FROM new_rows WHERE match_id IS NOT NULL
+    ON CONFLICT (match_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION mark_stats_dirty_deleted()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO stats_dirty_matches (match_id)
+    SELECT DISTINCT match_id FROM old_rows WHERE match_id IS NOT NULL
+    ON CONFLICT (match_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_mark_stats_dirty_insert ON ball_by_ball;
+CREATE TRIGGER trigger_mark_stats_dirty_insert
+    AFTER INSERT ON ball_by_ball
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION mark_stats_dirty_inserted();
+
+DROP TRIGGER IF EXISTS trigger_mark_stats_dirty_delete ON ball_by_ball;
+CREATE TRIGGER trigger_mark_stats_dirty_delete
+    AFTER DELETE ON ball_by_ball
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION mark_stats_dirty_deleted();
+
+-- Per-match content hashes of the last successful CSV load, so unchanged matches are skipped
+CREATE TABLE IF NOT EXISTS match_load_manifest (
+    source VARCHAR(50) NOT NULL,
+    match_id INTEGER NOT NULL,
+    row_count INTEGER NOT NULL,
+    content_hash CHAR(16) NOT NULL,
+    loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (source, match_id)
+);
+
+-- Alternate spellings of player names (e.g. 'Rohit Sharma' -> 'RG Sharma'), read by name_index.py
+CREATE TABLE IF NOT EXISTS player_aliases (
+    alias_name VARCHAR(100) PRIMARY KEY,
+    player_id INTEGER NOT NULL REFERENCES players(player_id) ON DELETE CASCADE
+);
+
+-- Single-row counter bumped by the Python loaders after each committed load;
+-- the API drops its cached venue / head-to-head / form results when it changes
+CREATE TABLE IF NOT EXISTS data_generation (
+    singleton BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (singleton),
+    generation BIGINT NOT NULL DEFAULT 0,
+    updated_by VARCHAR(50),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO data_generation (singleton) VALUES (TRUE) ON CONFLICT DO NOTHING;
+
+-- Form as of before each player appearance, precomputed by form_features.py:
+-- last-5/last-10 windows, exponentially weighted averages and splits at the match venue
+CREATE TABLE IF NOT EXISTS player_form_features (
+    player_id INTEGER REFERENCES players(player_id) ON DELETE CASCADE,
+    match_id INTEGER REFERENCES matches(match_id) ON DELETE CASCADE,
+    match_date DATE NOT NULL,
+    venue_id INTEGER,
+    matches_before INTEGER NOT NULL,
+    days_since_last_match INTEGER,
+    last5_matches INTEGER,
+    last5_avg_runs DECIMAL(6,2),
+    last5_strike_rate DECIMAL(6,2),
+    last5_avg_wickets DECIMAL(6,2),
+    last5_economy DECIMAL(6,2),
+    last10_matches INTEGER,
+    last10_avg_runs DECIMAL(6,2),
+    last10_strike_rate DECIMAL(6,2),
+    last10_avg_wickets DECIMAL(6,2),
+    last10_economy DECIMAL(6,2),
+    ewm_runs DECIMAL(6,2),
+    ewm_strike_rate DECIMAL(6,2),
+    ewm_wickets DECIMAL(6,2),
+    ewm_economy DECIMAL(6,2),
+    venue_matches_before INTEGER,
+    venue_avg_runs DECIMAL(6,2),
+    venue_strike_rate DECIMAL(6,2),
+    venue_avg_wickets DECIMAL(6,2),
+    venue_economy DECIMAL(6,2),
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (player_id, match_id)
+);
+CREATE INDEX IF NOT EXISTS idx_player_form_features_player_date ON player_form_features(player_id, match_date);
+
+-- Form through each player's last appearance, for fixtures after it (form_features.py).
+-- Venue splits are left out: they depend on the fixture venue
+CREATE TABLE IF NOT EXISTS player_form_latest (
+    player_id INTEGER PRIMARY KEY REFERENCES players(player_id) ON DELETE CASCADE,
+    last_match_id INTEGER REFERENCES matches(match_id) ON DELETE CASCADE,
+    last_match_date DATE NOT NULL,
+    matches_before INTEGER NOT NULL,
+    last5_matches INTEGER,
+    last5_avg_runs DECIMAL(6,2),
+    last5_strike_rate DECIMAL(6,2),
+    last5_avg_wickets DECIMAL(6,2),
+    last5_economy DECIMAL(6,2),
+    last10_matches INTEGER,
+    last10_avg_runs DECIMAL(6,2),
+    last10_strike_rate DECIMAL(6,2),
+    last10_avg_wickets DECIMAL(6,2),
+    last10_economy DECIMAL(6,2),
+    ewm_runs DECIMAL(6,2),
+    ewm_strike_rate DECIMAL(6,2),
+    ewm_wickets DECIMAL(6,2),
+    ewm_economy DECIMAL(6,2),
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Form features as of a date for a fixture at p_venue_id. A player's first appearance on or after
+-- the date only saw earlier matches; a player with no such appearance (any upcoming fixture) gets
+-- player_form_latest, which includes their last match. Venue splits and days since the last match
+-- are taken from player_match_stats before the date, so they describe the fixture being asked about.
+DROP FUNCTION IF EXISTS get_players_form_features(INTEGER[], DATE);
+CREATE OR REPLACE FUNCTION get_players_form_features(
+    p_player_ids INTEGER[],
+    p_reference_date DATE DEFAULT CURRENT_DATE,
+    p_venue_id INTEGER DEFAULT NULL
+)
+RETURNS TABLE (
+    player_id INTEGER,
+    venue_id INTEGER,
+    matches_before INTEGER,
+    days_since_last_match INTEGER,
+    last5_matches INTEGER,
+    last5_avg_runs DECIMAL(6,2),
+    last5_strike_rate DECIMAL(6,2),
+    last5_avg_wickets DECIMAL(6,2),
+    last5_economy DECIMAL(6,2),
+    last10_matches INTEGER,
+    last10_avg_runs DECIMAL(6,2),
+    last10_strike_rate DECIMAL(6,2),
+    last10_avg_wickets DECIMAL(6,2),
+    last10_economy DECIMAL(6,2),
+    ewm_runs DECIMAL(6,2),
+    ewm_strike_rate DECIMAL(6,2),
+    ewm_wickets DECIMAL(6,2),
+    ewm_economy DECIMAL(6,2),
+    venue_matches_before INTEGER,
+    venue_avg_runs DECIMAL(6,2),
+    venue_strike_rate DECIMAL(6,2),
+    venue_avg_wickets DECIMAL(6,2),
+    venue_economy DECIMAL(6,2)
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        p.player_id,
+        p_venue_id,
+        f.matches_before,
+        (p_reference_date - h.last_match_date)::INTEGER,
+        f.last5_matches, f.last5_avg_runs, f.last5_strike_rate, f.last5_avg_wickets, f.last5_economy,
+        f.last10_matches, f.last10_avg_runs, f.last10_strike_rate, f.last10_avg_wickets, f.last10_economy,
+        f.ewm_runs, f.ewm_strike_rate, f.ewm_wickets, f.ewm_economy,
+        h.venue_matches::INTEGER,
+        ROUND(h.venue_runs::DECIMAL / NULLIF(h.venue_matches, 0), 2),
+        ROUND(h.venue_runs * 100.0 / NULLIF(h.venue_balls, 0), 2),
+        ROUND(h.venue_wickets::DECIMAL / NULLIF(h.venue_matches, 0), 2),
+        ROUND(h.venue_runs_conceded / NULLIF(h.venue_overs, 0), 2)
+    FROM unnest(p_player_ids) AS p(player_id)
+    CROSS JOIN LATERAL (
+        (
+            SELECT pff.matches_before, pff.last5_matches, pff.last5_avg_runs, pff.last5_strike_rate, pff.last5_avg_wickets, pff.last5_economy, pff.last10_matches, pff.last10_avg_runs, pff.last10_strike_rate, pff.last10_avg_wickets, pff.last10_economy, pff.ewm_runs, pff.ewm_strike_rate, pff.ewm_wickets, pff.ewm_economy
+            FROM player_form_features pff
+            WHERE pff.player_id = p.player_id
+            AND pff.match_date >= p_reference_date
+            ORDER BY pff.match_date, pff.match_id
+            LIMIT 1
+        )
+        UNION ALL
+        (
+            SELECT pfl.matches_before, pfl.last5_matches, pfl.last5_avg_runs, pfl.last5_strike_rate, pfl.last5_avg_wickets, pfl.last5_economy, pfl.last10_matches, pfl.last10_avg_runs, pfl.last10_strike_rate, pfl.last10_avg_wickets, pfl.last10_economy, pfl.ewm_runs, pfl.ewm_strike_rate, pfl.ewm_wickets, pfl.ewm_economy
+            FROM player_form_latest pfl
+            WHERE pfl.player_id = p.player_id
+            AND pfl.last_match_date < p_reference_date
+        )
+        LIMIT 1
+    ) f
+    CROSS JOIN LATERAL (
+        SELECT
+            MAX(pms.match_date) AS last_match_date,
+            COUNT(*) FILTER (WHERE m.venue_id = p_venue_id) AS venue_matches,
+            SUM(pms.runs_scored) FILTER (WHERE m.venue_id = p_venue_id) AS venue_runs,
+            SUM(pms.balls_faced) FILTER (WHERE m.venue_id = p_venue_id) AS venue_balls,
+            SUM(pms.wickets_taken) FILTER (WHERE m.venue_id = p_venue_id) AS venue_wickets,
+            SUM(pms.runs_conceded) FILTER (WHERE m.venue_id = p_venue_id) AS venue_runs_conceded,
+            SUM(pms.overs_bowled) FILTER (WHERE m.venue_id = p_venue_id) AS venue_overs
+        FROM player_match_stats pms
+        JOIN matches m ON m.match_id = pms.match_id
+        WHERE pms.player_id = p.player_id
+        AND pms.match_date < p_reference_date
+    ) h;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Fantasy points per player and match, computed from ball_by_ball by fantasy_points.py;
+-- ruleset names the scoring rules so alternative rule files can be stored side by side
+CREATE TABLE IF NOT EXISTS player_match_points (
+    ruleset VARCHAR(50) NOT NULL,
+    match_id INTEGER REFERENCES matches(match_id) ON DELETE CASCADE,
+    player_id INTEGER REFERENCES players(player_id) ON DELETE CASCADE,
+    batting_points INTEGER NOT NULL DEFAULT 0,
+    bowling_points INTEGER NOT NULL DEFAULT 0,
+    fielding_points INTEGER NOT NULL DEFAULT 0,
+    other_points INTEGER NOT NULL DEFAULT 0,
+    total_points INTEGER NOT NULL DEFAULT 0,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (ruleset, match_id, player_id)
+);
+CREATE INDEX IF NOT EXISTS idx_player_match_points_player ON player_match_points(player_id, ruleset);
+
 -- ==============================================
 -- COMMENTS FOR DOCUMENTATION
 -- ==============================================
@@ -444,7 +990,17 @@ COMMENT ON TABLE players IS 'Player information with roles and team associations
 COMMENT ON TABLE matches IS 'Match information including teams, venue, and date';
 COMMENT ON TABLE ball_by_ball IS 'Detailed ball-by-ball data from IPL matches';
 COMMENT ON TABLE player_match_stats IS 'Aggregated player statistics per match';
+COMMENT ON TABLE player_form_features IS 'Rolling, exponentially weighted and venue form per player as of before each match';
+COMMENT ON TABLE player_form_latest IS 'Rolling and exponentially weighted form per player through their last match';
+COMMENT ON TABLE player_match_points IS 'Fantasy points per player and match under a named scoring ruleset';
+COMMENT ON TABLE innings_summary IS 'Per-innings runs, wickets, legal balls, extras and phase splits';
+COMMENT ON TABLE player_team_history IS 'Per-season player team membership with appearance counts';
 COMMENT ON TABLE venue_stats IS 'Statistical analysis of venue performance';
+COMMENT ON TABLE match_load_manifest IS 'Per-match CSV checksums used to skip unchanged matches on reload';
+COMMENT ON TABLE player_aliases IS 'Alternate player name spellings resolved by the name index';
+COMMENT ON TABLE data_generation IS 'Load generation counter used to invalidate API caches';
+COMMENT ON MATERIALIZED VIEW player_recent_form IS 'Last-30-day player form, refreshed by the Python loaders';
+COMMENT ON MATERIALIZED VIEW team_head_to_head IS 'Head-to-head team scores per venue, refreshed by the Python loaders';
 
 -- ==============================================
 -- PERFORMANCE MONITORING
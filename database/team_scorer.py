@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+
+import pandas as pd
+import numpy as np
+import argparse
+import json
+import sys
+import time
+import logging
+
+from sqlalchemy import text
+
+from db_engine import get_engine, dispose_engine
+from fantasy_points import DREAM11_T20_RULES
+from player_matcher import PlayerMatcher, fetch_squad_ids, read_teams
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CAPTAIN_MULTIPLIER = 2.0
+VICE_CAPTAIN_MULTIPLIER = 1.5
+
+# Appearances per player that feed the expected-points estimate
+HISTORY_MATCHES = 10
+# Players with few appearances are pulled towards the field average as if they had this
+# many extra average matches, so one big game does not make a captain
+PRIOR_MATCHES = 3
+
+# Points distribution over each player's last N appearances before the match date
+POINTS_HISTORY = """
+    WITH ranked AS (
+        SELECT
+            p.player_id,
+            p.total_points,
+            ROW_NUMBER() OVER (PARTITION BY p.player_id ORDER BY m.match_date DESC, m.match_id DESC) AS rn
+        FROM player_match_points p
+        JOIN matches m ON m.match_id = p.match_id
+        WHERE p.ruleset = :ruleset
+        AND p.player_id = ANY(:player_ids)
+        AND m.match_date < :match_date
+    )
+    SELECT
+        player_id,
+        COUNT(*) AS matches,
+        AVG(total_points) AS mean_points,
+        COALESCE(VAR_SAMP(total_points), 0) AS var_points
+    FROM ranked
+    WHERE rn <= :last_matches
+    GROUP BY player_id
+"""
+
+def fetch_points_history(engine, player_ids, match_date, ruleset=DREAM11_T20_RULES['name'],
+                         last_matches=HISTORY_MATCHES):
+    """Per-player matches, mean and variance of fantasy points before match_date"""
+    history = pd.read_sql(text(POINTS_HISTORY), engine, params={
+        "ruleset": ruleset,
+        "player_ids": [int(player_id) for player_id in player_ids],
+        "match_date": match_date,
+        "last_matches": last_matches,
+    })
+    return history.set_index('player_id').astype('float64')
+
+def expected_points(player_ids, history, prior_matches=PRIOR_MATCHES):
+    """Shrunk mean and variance of points for each id in player_ids (float arrays)"""
+    history = history.reindex(player_ids)
+    matches = history['matches'].fillna(0).to_numpy()
+    means = history['mean_points'].to_numpy()
+    variances = history['var_points'].to_numpy()
+
+    # Field prior: appearance-weighted average over the players we have history for
+    known = matches > 0
+    prior_mean = np.average(means[known], weights=matches[known]) if known.any() else 0.0
+    prior_var = np.average(variances[known], weights=matches[known]) if known.any() else 0.0
+
+    weight = matches / (matches + prior_matches)
+    mean = weight * np.nan_to_num(means) + (1 - weight) * prior_mean
+    var = weight * np.nan_to_num(variances) + (1 - weight) * prior_var
+    return mean, var
+
+def build_team_matrix(teams, resolved):
+    """Teams x slots matrix of player ids (-1 for empty or unresolved slots) plus the
+    captain and vice-captain ids (-1 when not given or not resolved).
+
+    resolved maps each submitted name to its match_names result.
+    """
+    def player_id(name):
+        result = resolved.get(name) if name is not None else None
+        return result['playerId'] if result and result['isValid'] else -1
+
+    # At least two slots so every team has a captain and a vice-captain slot
+    width = max(max((len(team['players']) for team in teams), default=0), 2)
+    slots = np.full((len(teams), width), -1, dtype=np.int64)
+    for row, team in enumerate(teams):
+        slots[row, :len(team['players'])] = [player_id(name) for name in team['players']]
+    captains = np.array([player_id(team.get('captain')) for team in teams], dtype=np.int64)
+    vice_captains = np.array([player_id(team.get('viceCaptain')) for team in teams], dtype=np.int64)
+    return slots, captains, vice_captains
+
+def slot_multipliers(slots, captains, vice_captains):
+    """Points multiplier per slot as picked: 2x captain, 1.5x vice-captain, 0 for empty slots.
+    A captain or vice-captain outside the team earns nothing extra."""
+    filled = slots >= 0
+    multipliers = filled.astype(np.float64)
+    multipliers[filled & (slots == captains[:, None])] = CAPTAIN_MULTIPLIER
+    multipliers[filled & (slots == vice_captains[:, None]) & (slots != captains[:, None])] = VICE_CAPTAIN_MULTIPLIER
+    return multipliers
+
+def resolve_teams(matcher, teams):
+    """match_names results for every distinct player, captain and vice-captain name"""
+    names = [name for team in teams for name in [*team['players'], team.get('captain'), team.get('viceCaptain')]]
+    return matcher.match_names(pd.unique(pd.Series([name for name in names if name is not None], dtype='object')))
+
+def score_teams(slots, captains, vice_captains, player_ids, means, variances):
+    """Expected points per team as chosen and with the best captain / vice-captain pair.
+
+    slots is the teams x slots id matrix from build_team_matrix; player_ids, means and
+    variances describe every id that appears in it. Player scores are treated as independent
+    for the standard deviation. Returns a dict of per-team arrays.
+    """
+    filled = slots >= 0
+    # Empty slots point at a trailing zero entry
+    lookup = np.where(filled, np.searchsorted(player_ids, slots), len(player_ids))
+    values = np.append(means, 0.0)[lookup]
+    spreads = np.append(variances, 0.0)[lookup]
+
+    multipliers = slot_multipliers(slots, captains, vice_captains)
+    expected = (values * multipliers).sum(axis=1)
+    std = np.sqrt((spreads * multipliers ** 2).sum(axis=1))
+
+    # 2x > 1.5x, so the best pair is the two highest expected scores, highest as captain
+    top = np.argsort(-values, axis=1, kind='stable')[:, :2]
+    best_values = np.take_along_axis(values, top, axis=1)
+    best_expected = (values.sum(axis=1)
+                     + (CAPTAIN_MULTIPLIER - 1) * best_values[:, 0]
+                     + (VICE_CAPTAIN_MULTIPLIER - 1) * best_values[:, 1])
+
+    return {
+        'expected': expected,
+        'std': std,
+        'best_captain': np.take_along_axis(slots, top[:, :1], axis=1)[:, 0],
+        'best_vice_captain': np.take_along_axis(slots, top[:, 1:], axis=1)[:, 0],
+        'best_expected': best_expected,
+    }
+
+def rank_teams(teams, resolved, engine, match_date, squad_ids=None,
+               ruleset=DREAM11_T20_RULES['name'], last_matches=HISTORY_MATCHES):
+    """Score and rank teams by expected points; returns (results, timings in ms)"""
+    slots, captains, vice_captains = build_team_matrix(teams, resolved)
+    player_ids = np.unique(slots[slots >= 0])
+    if squad_ids is not None:
+        # Players outside the fixture's squads are not playing: expected 0
+        slots = np.where(np.isin(slots, list(squad_ids)), slots, -1)
+        player_ids = np.unique(slots[slots >= 0])
+
+    started = time.perf_counter()
+    history = fetch_points_history(engine, player_ids, match_date, ruleset, last_matches)
+    means, variances = expected_points(player_ids, history)
+    fetched = time.perf_counter()
+
+    scores = score_teams(slots, captains, vice_captains, player_ids, means, variances)
+    order = np.argsort(-scores['expected'], kind='stable')
+    scored = time.perf_counter()
+
+    names = {result['playerId']: result['validatedName'] for result in resolved.values() if result['isValid']}
+    results = []
+    for rank, row in enumerate(order, start=1):
+        team = teams[row]
+        best_captain = int(scores['best_captain'][row])
+        best_vice_captain = int(scores['best_vice_captain'][row])
+        results.append({
+            'teamName': team['teamName'],
+            'rank': rank,
+            'captain': team.get('captain'),
+            'viceCaptain': team.get('viceCaptain'),
+            'expectedPoints': round(float(scores['expected'][row]), 2),
+            'stdDev': round(float(scores['std'][row]), 2),
+            'suggestedCaptain': names.get(best_captain),
+            'suggestedViceCaptain': names.get(best_vice_captain),
+            'suggestedExpectedPoints': round(float(scores['best_expected'][row]), 2),
+            'gain': round(float(scores['best_expected'][row] - scores['expected'][row]), 2),
+            'unscoredPlayers': int((slots[row, :len(team['players'])] < 0).sum()),
+        })
+    timings = {'historyMs': round((fetched - started) * 1000, 1), 'scoringMs': round((scored - fetched) * 1000, 1)}
+    return results, timings
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Rank many teams by expected fantasy points and suggest captains")
+    parser.add_argument('teams_file', help="Bulk-analysis CSV, JSON file, or '-' for JSON on stdin")
+    parser.add_argument('--match-date', help="Only history before this date counts (default: today)")
+    parser.add_argument('--teams', nargs=2, metavar=('TEAM_A', 'TEAM_B'),
+                        help="Score only players in these teams' squads")
+    parser.add_argument('--ruleset', default=DREAM11_T20_RULES['name'], help="player_match_points ruleset")
+    parser.add_argument('--last-matches', type=int, default=HISTORY_MATCHES, help="Appearances per player to use")
+    return parser.parse_args()
+
+def main():
+    """Main function"""
+    args = parse_args()
+    teams = read_teams(args.teams_file)
+    match_date = args.match_date or pd.Timestamp.today().strftime('%Y-%m-%d')
+
+    try:
+        engine = get_engine()
+        matcher = PlayerMatcher.from_database(engine)
+        squad_ids = fetch_squad_ids(engine, args.teams, match_date) if args.teams else None
+
+        resolved = resolve_teams(matcher, teams)
+
+        results, timings = rank_teams(teams, resolved, engine, match_date, squad_ids, args.ruleset, args.last_matches)
+    except Exception as e:
+        logger.error(f"❌ Team scoring failed: {e}")
+        return 1
+    finally:
+        dispose_engine()
+
+    logger.info(f"⚡ Scored {len(teams)} teams - history {timings['historyMs']} ms, scoring {timings['scoringMs']} ms")
+    json.dump({'success': True, 'matchDate': match_date, 'ruleset': args.ruleset, 'teams': results, **timings},
+              sys.stdout)
+    sys.stdout.write('\n')
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -1,58 +1,76 @@
 #!/usr/bin/env python3
 
-import os
-import pandas as pd
-from sqlalchemy import create_engine, text
-from dotenv import load_dotenv
-import urllib.parse
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+from psycopg2.errors import QueryCanceled
+from sqlalchemy import text
 
-def connect_database():
+from db_engine import get_engine, dispose_engine
+
+TABLES = ['teams', 'venues', 'players', 'matches', 'ball_by_ball']
+
+# Per-check server-side timeout; the whole report is bounded by the slowest check
+DEFAULT_CHECK_TIMEOUT_MS = 5000
+
+# Share of ball_by_ball pages scanned by TABLESAMPLE checks in fast mode
+DEFAULT_SAMPLE_PERCENT = 1.0
+
+def connect_database(pool_size=None):
     """Establish database connection"""
-    load_dotenv()
-    
-    db_user = os.getenv('DB_USER')
-    db_password = os.getenv('DB_PASSWORD')
-    db_host = os.getenv('DB_HOST')
-    db_port = os.getenv('DB_PORT')
-    db_name = os.getenv('DB_NAME')
-    
-    encoded_password = urllib.parse.quote_plus(db_password)
-    connection_string = f"postgresql://{db_user}:{encoded_password}@{db_host}:{db_port}/{db_name}"
-    
-    return create_engine(connection_string)
-
-def verify_data():
-    """Verify data quality and run sample queries"""
-    engine = connect_database()
-    
-    print("🏏 IPL Fantasy Database Verification")
-    print("=" * 50)
-    
-    # Basic counts
-    print("\n📊 Database Summary:")
-    tables = ['teams', 'venues', 'players', 'matches', 'ball_by_ball']
-    for table in tables:
-        count = pd.read_sql(f"SELECT COUNT(*) as count FROM {table}", engine)['count'].iloc[0]
-        print(f"   {table.capitalize()}: {count:,} records")
-    
-    # Date range
-    print("\n📅 Data Coverage:")
-    date_range = pd.read_sql("""
-        SELECT 
+    return get_engine(pool_size=pool_size, statement_timeout_ms=60_000)
+
+def fetch_all(conn, query, params=None):
+    """Run a query and return its rows as plain dicts"""
+    return [dict(row) for row in conn.execute(text(query), params or {}).mappings()]
+
+def check_table_counts(conn, options):
+    """Row counts per table: exact COUNT(*), or planner / statistics estimates in fast mode"""
+    exact_tables = TABLES
+    counts = {}
+    if options['fast']:
+        # reltuples is -1 or 0 until the first ANALYZE / autovacuum, so a freshly bulk-loaded
+        # table falls back to the live tuple count, and then to an exact COUNT(*)
+        rows = fetch_all(conn, """
+            SELECT
+                c.relname AS table_name,
+                CASE
+                    WHEN c.reltuples > 0 THEN c.reltuples::BIGINT
+                    WHEN s.n_live_tup > 0 THEN s.n_live_tup
+                END AS count
+            FROM pg_class c
+            LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+            WHERE c.relkind = 'r' AND c.relname = ANY(:tables)
+              AND c.relnamespace = 'public'::regnamespace
+        """, {"tables": TABLES})
+        counts = {row['table_name']: row['count'] for row in rows if row['count'] is not None}
+        exact_tables = [table for table in TABLES if table not in counts]
+
+    if exact_tables:
+        counts.update(fetch_all(conn, "SELECT " + ", ".join(
+            f"(SELECT COUNT(*) FROM {table}) AS {table}" for table in exact_tables
+        ))[0])
+
+    counts = {table: counts.get(table, 0) for table in TABLES}
+    return {'counts': counts, 'estimated': options['fast'], 'passed': all(counts.values())}
+
+def check_date_range(conn, options):
+    """First and last match dates and number of seasons"""
+    return fetch_all(conn, """
+        SELECT
             MIN(match_date) as first_match,
             MAX(match_date) as last_match,
             COUNT(DISTINCT season) as seasons
         FROM matches
-    """, engine)
-    
-    print(f"   First Match: {date_range['first_match'].iloc[0]}")
-    print(f"   Last Match: {date_range['last_match'].iloc[0]}")
-    print(f"   Seasons: {date_range['seasons'].iloc[0]}")
-    
-    # Sample team statistics
-    print("\n🏆 Team Performance (Top 5 by matches played):")
-    team_stats = pd.read_sql("""
-        SELECT 
+    """)[0]
+
+def check_top_teams(conn, options):
+    """Top 5 teams by matches played"""
+    return {'teams': fetch_all(conn, """
+        SELECT
             t.team_name,
             COUNT(*) as matches_played
         FROM matches m
@@ -60,33 +78,42 @@ def verify_data():
         GROUP BY t.team_id, t.team_name
         ORDER BY matches_played DESC
         LIMIT 5
-    """, engine)
-    
-    for _, row in team_stats.iterrows():
-        print(f"   {row['team_name']}: {row['matches_played']} matches")
-    
-    # Sample player statistics
-    print("\n🏏 Top Run Scorers (All Time):")
-    batsman_stats = pd.read_sql("""
-        SELECT 
-            p.player_name,
-            SUM(bb.batsman_runs) as total_runs,
-            COUNT(*) as balls_faced
-        FROM ball_by_ball bb
-        JOIN players p ON bb.batsman_id = p.player_id
-        GROUP BY p.player_id, p.player_name
-        HAVING SUM(bb.batsman_runs) > 100
-        ORDER BY total_runs DESC
-        LIMIT 5
-    """, engine)
-    
-    for _, row in batsman_stats.iterrows():
-        print(f"   {row['player_name']}: {row['total_runs']} runs ({row['balls_faced']} balls)")
-    
-    # Sample venue statistics
-    print("\n🏟️ Most Used Venues:")
-    venue_stats = pd.read_sql("""
-        SELECT 
+    """)}
+
+def check_top_run_scorers(conn, options):
+    """Top 5 run scorers: from ball_by_ball, or the pre-aggregated player_match_stats in fast mode"""
+    if options['fast']:
+        query = """
+            SELECT
+                p.player_name,
+                SUM(pms.runs_scored) as total_runs,
+                SUM(pms.balls_faced) as balls_faced
+            FROM player_match_stats pms
+            JOIN players p ON pms.player_id = p.player_id
+            GROUP BY p.player_id, p.player_name
+            HAVING SUM(pms.runs_scored) > 100
+            ORDER BY total_runs DESC
+            LIMIT 5
+        """
+    else:
+        query = """
+            SELECT
+                p.player_name,
+                SUM(bb.batsman_runs) as total_runs,
+                COUNT(*) as balls_faced
+            FROM ball_by_ball bb
+            JOIN players p ON bb.batsman_id = p.player_id
+            GROUP BY p.player_id, p.player_name
+            HAVING SUM(bb.batsman_runs) > 100
+            ORDER BY total_runs DESC
+            LIMIT 5
+        """
+    return {'players': fetch_all(conn, query)}
+
+def check_top_venues(conn, options):
+    """Top 5 venues by matches hosted"""
+    return {'venues': fetch_all(conn, """
+        SELECT
             v.venue_name,
             COUNT(*) as matches_hosted
         FROM matches m
@@ -94,68 +121,238 @@ def verify_data():
         GROUP BY v.venue_id, v.venue_name
         ORDER BY matches_hosted DESC
         LIMIT 5
-    """, engine)
-    
-    for _, row in venue_stats.iterrows():
+    """)}
+
+def check_player_form_function(conn, options):
+    """Smoke test of the player form function"""
+    rows = fetch_all(conn, "SELECT * FROM get_player_recent_form('V Kohli', '2020-01-01', 5)")
+    runs = [row['runs_scored'] for row in rows]
+    return {'matches': len(rows), 'avg_runs': float(sum(runs)) / len(runs) if runs else None}
+
+def check_form_features_function(conn, options):
+    """Players from the latest match still get form features for a fixture the day after it"""
+    rows = fetch_all(conn, """
+        SELECT pms.player_id, m.venue_id, m.match_date
+        FROM player_match_stats pms
+        JOIN matches m ON m.match_id = pms.match_id
+        WHERE m.match_id = (SELECT match_id FROM matches ORDER BY match_date DESC, match_id DESC LIMIT 1)
+    """)
+    if not rows:
+        return {'players': 0, 'returned': 0}
+    features = fetch_all(conn, "SELECT * FROM get_players_form_features(:player_ids, :reference_date, :venue_id)", {
+        'player_ids': [row['player_id'] for row in rows],
+        'reference_date': rows[0]['match_date'] + timedelta(days=1),
+        'venue_id': rows[0]['venue_id'],
+    })
+    return {'players': len(rows), 'returned': len(features), 'passed': len(features) == len(rows)}
+
+def check_head_to_head_function(conn, options):
+    """Smoke test of the team head-to-head function"""
+    rows = fetch_all(conn, "SELECT * FROM get_team_head_to_head('Mumbai Indians', 'Chennai Super Kings')")
+    if not rows:
+        return {'found': False}
+    return {'found': True, 'team1_wins': rows[0]['team1_wins'], 'team2_wins': rows[0]['team2_wins']}
+
+def sampled_ball_by_ball(options):
+    """ball_by_ball, or a TABLESAMPLE of its pages in fast mode"""
+    if options['fast']:
+        return f"ball_by_ball bb TABLESAMPLE SYSTEM ({float(options['sample_percent'])})"
+    return "ball_by_ball bb"
+
+def sampled_count(conn, options, query):
+    """Run a COUNT over (possibly sampled) ball_by_ball and describe how it was measured"""
+    row = fetch_all(conn, query.format(source=sampled_ball_by_ball(options)))[0]
+    result = {'count': row['count'], 'rows_scanned': row['rows_scanned'], 'sampled': options['fast']}
+    if options['fast']:
+        result['sample_percent'] = options['sample_percent']
+    result['passed'] = row['count'] == 0
+    return result
+
+def check_orphaned_deliveries(conn, options):
+    """Ball-by-ball rows pointing at a missing match"""
+    return sampled_count(conn, options, """
+        SELECT COUNT(*) FILTER (WHERE m.match_id IS NULL) as count, COUNT(*) as rows_scanned
+        FROM {source}
+        LEFT JOIN matches m ON bb.match_id = m.match_id
+    """)
+
+def check_missing_player_mappings(conn, options):
+    """Ball-by-ball rows without a batsman or bowler id"""
+    return sampled_count(conn, options, """
+        SELECT COUNT(*) FILTER (WHERE bb.batsman_id IS NULL OR bb.bowler_id IS NULL) as count,
+               COUNT(*) as rows_scanned
+        FROM {source}
+    """)
+
+# (name, check, gating) - non-gating checks are reported but never fail the run
+CHECKS = [
+    ('table_counts', check_table_counts, True),
+    ('date_range', check_date_range, False),
+    ('top_teams', check_top_teams, False),
+    ('top_run_scorers', check_top_run_scorers, False),
+    ('top_venues', check_top_venues, False),
+    ('player_form_function', check_player_form_function, False),
+    ('form_features_function', check_form_features_function, False),
+    ('head_to_head_function', check_head_to_head_function, False),
+    ('orphaned_deliveries', check_orphaned_deliveries, True),
+    ('missing_player_mappings', check_missing_player_mappings, True),
+]
+
+def run_check(engine, name, check, gating, options):
+    """Run one check on its own pooled connection under a statement timeout"""
+    started = time.perf_counter()
+    outcome = {'name': name, 'gating': gating}
+    try:
+        with engine.connect() as conn:
+            # SET LOCAL ends with the transaction, so pooled connections keep their defaults
+            conn.execute(text(f"SET LOCAL statement_timeout = {int(options['timeout_ms'])}"))
+            result = check(conn, options)
+        outcome['status'] = 'ok' if result.pop('passed', True) else 'failed'
+        outcome['result'] = result
+    except Exception as e:
+        outcome['status'] = 'timeout' if isinstance(getattr(e, 'orig', None), QueryCanceled) else 'error'
+        outcome['error'] = str(getattr(e, 'orig', e)).strip()
+    outcome['seconds'] = round(time.perf_counter() - started, 4)
+    return outcome
+
+def run_checks(fast=False, timeout_ms=DEFAULT_CHECK_TIMEOUT_MS, sample_percent=DEFAULT_SAMPLE_PERCENT,
+               workers=None):
+    """Run every check concurrently and return a JSON-serializable report"""
+    workers = workers or len(CHECKS)
+    engine = connect_database(pool_size=workers)
+    options = {'fast': fast, 'timeout_ms': timeout_ms, 'sample_percent': sample_percent}
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_check, engine, name, check, gating, options)
+                   for name, check, gating in CHECKS]
+        wait(futures)
+    checks = [future.result() for future in futures]
+
+    return {
+        'mode': 'fast' if fast else 'exact',
+        'passed': all(check['status'] == 'ok' for check in checks if check['gating']),
+        'seconds': round(time.perf_counter() - started, 4),
+        'checks': checks,
+    }
+
+def print_report(report):
+    """Human-readable version of the check report"""
+    checks = {check['name']: check for check in report['checks']}
+
+    def result_of(name):
+        check = checks[name]
+        if check['status'] in ('timeout', 'error'):
+            print(f"   ⚠️ {name} {check['status']} after {check['seconds']:.2f}s: {check['error']}")
+            return None
+        return check['result']
+
+    print("🏏 IPL Fantasy Database Verification")
+    print("=" * 50)
+
+    # Basic counts
+    counts = result_of('table_counts')
+    print(f"\n📊 Database Summary{' (estimated)' if report['mode'] == 'fast' else ''}:")
+    if counts:
+        for table, count in counts['counts'].items():
+            print(f"   {table.capitalize()}: {count:,} records")
+
+    # Date range
+    print("\n📅 Data Coverage:")
+    date_range = result_of('date_range')
+    if date_range:
+        print(f"   First Match: {date_range['first_match']}")
+        print(f"   Last Match: {date_range['last_match']}")
+        print(f"   Seasons: {date_range['seasons']}")
+
+    print("\n🏆 Team Performance (Top 5 by matches played):")
+    for row in (result_of('top_teams') or {}).get('teams', []):
+        print(f"   {row['team_name']}: {row['matches_played']} matches")
+
+    print("\n🏏 Top Run Scorers (All Time):")
+    for row in (result_of('top_run_scorers') or {}).get('players', []):
+        print(f"   {row['player_name']}: {row['total_runs']} runs ({row['balls_faced']} balls)")
+
+    print("\n🏟️ Most Used Venues:")
+    for row in (result_of('top_venues') or {}).get('venues', []):
         print(f"   {row['venue_name']}: {row['matches_hosted']} matches")
-    
-    # Test the player form function
+
     print("\n📈 Testing Player Form Function:")
-    try:
-        form_test = pd.read_sql("""
-            SELECT * FROM get_player_recent_form('V Kohli', '2020-01-01', 5)
-        """, engine)
-        
-        if not form_test.empty:
-            avg_runs = form_test['runs_scored'].mean()
-            print(f"   V Kohli recent form: {avg_runs:.1f} runs per match (last 5 matches)")
+    form = result_of('player_form_function')
+    if form is not None:
+        if form['matches']:
+            print(f"   V Kohli recent form: {form['avg_runs']:.1f} runs per match (last {form['matches']} matches)")
         else:
             print("   Player form function working (no recent matches found)")
-    except Exception as e:
-        print(f"   Player form function test failed: {e}")
-    
-    # Test team head-to-head function
+
+    print("\n📈 Testing Form Features Function:")
+    features = result_of('form_features_function')
+    if features is not None:
+        if not features['players']:
+            print("   Form features function working (no matches found)")
+        elif checks['form_features_function']['status'] == 'ok':
+            print(f"   Next-fixture form for all {features['players']} players of the latest match")
+        else:
+            print(f"   ⚠️ Next-fixture form for {features['returned']} of {features['players']} players of the latest match")
+
     print("\n⚔️ Testing Team Head-to-Head Function:")
-    try:
-        h2h_test = pd.read_sql("""
-            SELECT * FROM get_team_head_to_head('Mumbai Indians', 'Chennai Super Kings')
-        """, engine)
-        
-        if not h2h_test.empty:
-            team1_wins = h2h_test['team1_wins'].iloc[0]
-            team2_wins = h2h_test['team2_wins'].iloc[0]
-            print(f"   Mumbai Indians vs Chennai Super Kings: {team1_wins}-{team2_wins}")
+    h2h = result_of('head_to_head_function')
+    if h2h is not None:
+        if h2h['found']:
+            print(f"   Mumbai Indians vs Chennai Super Kings: {h2h['team1_wins']}-{h2h['team2_wins']}")
         else:
             print("   Head-to-head function working (no matches found)")
-    except Exception as e:
-        print(f"   Head-to-head function test failed: {e}")
-    
-    # Data quality checks
+
     print("\n🔍 Data Quality Checks:")
-    
-    # Check for orphaned records
-    orphaned_balls = pd.read_sql("""
-        SELECT COUNT(*) as count 
-        FROM ball_by_ball bb 
-        LEFT JOIN matches m ON bb.match_id = m.match_id 
-        WHERE m.match_id IS NULL
-    """, engine)['count'].iloc[0]
-    
-    print(f"   Orphaned ball-by-ball records: {orphaned_balls}")
-    
-    # Check for missing player mappings
-    missing_players = pd.read_sql("""
-        SELECT COUNT(*) as count 
-        FROM ball_by_ball bb 
-        WHERE bb.batsman_id IS NULL OR bb.bowler_id IS NULL
-    """, engine)['count'].iloc[0]
-    
-    print(f"   Records with missing player mappings: {missing_players}")
-    
-    print("\n✅ Database verification completed!")
-    print("\nThe IPL Fantasy database is ready for use! 🚀")
-    
-    engine.dispose()
+    orphaned = result_of('orphaned_deliveries')
+    if orphaned:
+        print(f"   Orphaned ball-by-ball records: {orphaned['count']}"
+              f"{' (sampled ' + str(orphaned['rows_scanned']) + ' rows)' if orphaned['sampled'] else ''}")
+    missing = result_of('missing_player_mappings')
+    if missing:
+        print(f"   Records with missing player mappings: {missing['count']}"
+              f"{' (sampled ' + str(missing['rows_scanned']) + ' rows)' if missing['sampled'] else ''}")
+
+    print("\n⏱️ Check timings:")
+    for check in sorted(report['checks'], key=lambda check: check['seconds'], reverse=True):
+        print(f"   {check['name']}: {check['seconds']:.3f}s ({check['status']})")
+
+    if report['passed']:
+        print(f"\n✅ Database verification completed in {report['seconds']:.2f}s!")
+        print("\nThe IPL Fantasy database is ready for use! 🚀")
+    else:
+        print(f"\n❌ Database verification failed after {report['seconds']:.2f}s")
+
+def verify_data(fast=False, timeout_ms=DEFAULT_CHECK_TIMEOUT_MS, sample_percent=DEFAULT_SAMPLE_PERCENT,
+                workers=None, as_json=False):
+    """Verify data quality and run sample queries; returns True when all gating checks pass"""
+    try:
+        report = run_checks(fast=fast, timeout_ms=timeout_ms, sample_percent=sample_percent, workers=workers)
+    finally:
+        dispose_engine()
+
+    if as_json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        print_report(report)
+    return report['passed']
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Verify the IPL database (usable as a post-deploy health gate)")
+    parser.add_argument('--fast', action='store_true',
+                        help="Use pg_class estimates and TABLESAMPLE instead of exact full scans")
+    parser.add_argument('--timeout-ms', type=int, default=DEFAULT_CHECK_TIMEOUT_MS,
+                        help="Statement timeout for each check")
+    parser.add_argument('--sample-percent', type=float, default=DEFAULT_SAMPLE_PERCENT,
+                        help="Percentage of ball_by_ball pages sampled in fast mode")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Concurrent checks (default: one per check)")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    verify_data() 
\ No newline at end of file
+    args = parse_args()
+    passed = verify_data(fast=args.fast, timeout_ms=args.timeout_ms, sample_percent=args.sample_percent,
+                         workers=args.workers, as_json=args.json)
+    sys.exit(0 if passed else 1)
@@ -732,72 +732,58 @@ async function analyzeAllTeams() {
         showAnalysisLoading(true);
         analysisResultsSection.classList.remove('hidden');
         
-        // Get match statistics for analysis
-        const [teamFormData, headToHeadData, venueStatsData] = await Promise.all([
-            fetchTeamRecentForm(),
-            fetchHeadToHead(),
-            fetchVenueStats()
-        ]);
+        // One request: the match context is built once on the server and shared by every team
+        const response = await fetch(`${API_BASE_URL}/analyze/batch`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                teams: currentTeams.map((team, i) => ({
+                    teamId: team.teamId || i + 1,
+                    teamName: team.teamName || `Team ${i + 1}`,
+                    players: team.players,
+                    captain: team.captain,
+                    viceCaptain: team.vice_captain
+                })),
+                teamA: currentMatchDetails.teamA,
+                teamB: currentMatchDetails.teamB,
+                matchDate: currentMatchDetails.matchDate,
+                includeAiAnalysis: true
+            })
+        });
+
+        const batch = await response.json();
+        if (!batch.success) {
+            throw new Error(batch.message || 'Batch analysis failed');
+        }
 
-        // Analyze each team using the team-summary endpoint
         const analysisResults = [];
         const errors = [];
 
-        for (let i = 0; i < currentTeams.length; i++) {
-            const team = currentTeams[i];
-            try {
-                console.log(`Analyzing team ${i + 1}/${currentTeams.length}: ${team.teamName || `Team ${i + 1}`}`);
-                
-                // Convert players to the format expected by analyzeTeam function
-                const formattedPlayers = team.players.map(playerName => {
-                    return {
-                        name: playerName,
-                        role: 'Unknown',
-                        team: 'Unknown'
-                    };
-                });
-                
-                const response = await fetch(`${API_BASE_URL}/analyze`, {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
+        batch.teams.forEach(result => {
+            if (result.analysis) {
+                analysisResults.push({
+                    teamId: result.teamId,
+                    teamName: result.teamName,
+                    analysis: {
+                        summary: result.analysis,
+                        aiAnalysis: result.analysis
                     },
-                    body: JSON.stringify({
-                        players: formattedPlayers,
-                        captain: team.captain,
-                        viceCaptain: team.vice_captain,
-                        teamA: currentMatchDetails.teamA,
-                        teamB: currentMatchDetails.teamB,
-                        matchDate: currentMatchDetails.matchDate
-                    })
+                    validation: result.validation,
+                    players: result.players,
+                    captain: result.captain,
+                    vice_captain: result.viceCaptain
                 });
-
-                const result = await response.json();
-
-                if (result.success) {
-                    analysisResults.push({
-                        teamId: team.teamId || i + 1,
-                        teamName: team.teamName || `Team ${i + 1}`,
-                        analysis: {
-                            summary: result.analysis,
-                            aiAnalysis: result.analysis
-                        },
-                        players: team.players,
-                        captain: team.captain,
-                        vice_captain: team.vice_captain
-                    });
-                } else {
-                    throw new Error(result.message || 'Analysis failed');
-                }
-            } catch (error) {
-                console.error(`Error analyzing team ${i + 1}:`, error);
+            } else {
+                console.error(`Error analyzing team ${result.teamName}:`, result.error);
                 errors.push({
-                    teamId: team.teamId || i + 1,
-                    teamName: team.teamName || `Team ${i + 1}`,
-                    error: error.message
+                    teamId: result.teamId,
+                    teamName: result.teamName,
+                    error: result.error || 'Analysis failed'
                 });
             }
-        }
+        });
 
         // Generate comparative analysis
         const comparativeAnalysis = generateComparativeAnalysis(analysisResults, currentMatchDetails);
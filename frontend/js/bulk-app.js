@@ -475,7 +475,8 @@ class BulkCricketAnalyzerApp {
             const result = await this.components.playerValidation.validatePlayers(
                 allPlayers.map(p => p.player), 
                 matchDetails.teamA, 
-                matchDetails.teamB
+                matchDetails.teamB,
+                matchDetails.matchDate
             );
             
             this.showValidationLoading(false);
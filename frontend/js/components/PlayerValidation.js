@@ -9,14 +9,14 @@ class PlayerValidation {
         this.onPlayerReplaceCallback = null;
     }
 
-    async validatePlayers(players, teamA, teamB) {
+    async validatePlayers(players, teamA, teamB, matchDate = null) {
         try {
             const response = await fetch(`${this.apiBaseUrl}/validate-players`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
                 },
-                body: JSON.stringify({ players, teamA, teamB })
+                body: JSON.stringify({ players, teamA, teamB, matchDate })
             });
 
             const result = await response.json();
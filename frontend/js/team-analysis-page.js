@@ -764,7 +764,8 @@ class TeamAnalysisPage {
                 body: JSON.stringify({
                     players: players,
                     teamA: this.currentMatchDetails.teamA,
-                    teamB: this.currentMatchDetails.teamB
+                    teamB: this.currentMatchDetails.teamB,
+                    matchDate: this.currentMatchDetails.matchDate
                 })
             });
 
@@ -736,7 +736,8 @@ class TeamAnalysisPage {
             const validationResult = await this.playerValidation.validatePlayers(
                 playerNames, 
                 matchData.teamA, 
-                matchData.teamB
+                matchData.teamB,
+                matchData.matchDate
             );
             
             if (validationResult && validationResult.success) {
@@ -815,7 +816,8 @@ class TeamAnalysisPage {
             const result = await this.playerValidation.validatePlayers(
                 playerNames, 
                 matchData.teamA, 
-                matchData.teamB
+                matchData.teamB,
+                matchData.matchDate
             );
             
             this.playerValidationResults = result;